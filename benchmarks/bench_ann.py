@@ -0,0 +1,100 @@
+"""
+Open ME/CFS — ANN index benchmark
+---------------------------------
+Recall@k and QPS of the in-process IVF-flat index (utils/ann_index.py)
+against an exact brute-force scan, on synthetic clustered embeddings
+shaped like text-embedding-3-small output (1536 dims).
+
+No database or API key needed.
+
+Usage:
+    python benchmarks/bench_ann.py --vectors 50000 --queries 200
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.ann_index import IVFIndex  # noqa: E402
+
+
+def synthetic_corpus(n: int, dim: int, topics: int, seed: int):
+    """Topic-clustered unit vectors (real paper embeddings are far from uniform)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((topics, dim)).astype(np.float32)
+    topic = rng.integers(0, topics, n)
+    vectors = centers[topic] + 0.9 * rng.standard_normal((n, dim)).astype(np.float32)
+    years = rng.integers(1995, 2026, n)
+    return vectors, years, topic % 12, centers
+
+
+def timed(fn, queries):
+    t0 = time.perf_counter()
+    results = [fn(q) for q in queries]
+    return results, len(queries) / (time.perf_counter() - t0)
+
+
+def recall(approx, exact, k):
+    hits = sum(len({p for _, p in a[:k]} & {p for _, p in e[:k]})
+               for a, e in zip(approx, exact))
+    return hits / (k * len(exact))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--vectors", type=int, default=50_000)
+    ap.add_argument("--dim", type=int, default=1536)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--topics", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    vectors, years, clusters, centers = synthetic_corpus(
+        args.vectors, args.dim, args.topics, args.seed)
+    rng = np.random.default_rng(args.seed + 1)
+    queries = centers[rng.integers(0, args.topics, args.queries)] + \
+        0.9 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+
+    index = IVFIndex()
+    t0 = time.perf_counter()
+    index.rebuild(
+        (str(i), v, int(y), int(c))
+        for i, (v, y, c) in enumerate(zip(vectors, years, clusters)))
+    print(f"🏗️  Built {len(index)} × {args.dim} in {time.perf_counter() - t0:.1f}s "
+          f"({index.nlist} lists)")
+
+    k = args.k
+    exact, exact_qps = timed(lambda q: index.exact(q, k=k), queries)
+    print(f"\n{'mode':<28}{'recall@' + str(k):>10}{'QPS':>10}{'speedup':>10}")
+    print(f"{'brute force':<28}{1.0:>10.3f}{exact_qps:>10.0f}{1.0:>9.1f}x")
+    for nprobe in (1, 4, 8, 16, 32):
+        approx, qps = timed(
+            lambda q: index.search(q, k=k, nprobe=nprobe), queries)
+        print(f"{'ivf nprobe=' + str(nprobe):<28}{recall(approx, exact, k):>10.3f}"
+              f"{qps:>10.0f}{qps / exact_qps:>9.1f}x")
+
+    print("\nPre-filtered (cluster=3, ~1/12 of rows):")
+    exact_f, exact_f_qps = timed(
+        lambda q: index.exact(q, k=k, cluster=3), queries)
+    print(f"{'brute force':<28}{1.0:>10.3f}{exact_f_qps:>10.0f}{1.0:>9.1f}x")
+    for nprobe in (8, 32):
+        approx, qps = timed(
+            lambda q: index.search(q, k=k, nprobe=nprobe, cluster=3), queries)
+        print(f"{'ivf nprobe=' + str(nprobe):<28}{recall(approx, exact_f, k):>10.3f}"
+              f"{qps:>10.0f}{qps / exact_f_qps:>9.1f}x")
+
+    print("\nPre-filtered (year=2020 & cluster=3, exact path):")
+    approx, qps = timed(
+        lambda q: index.search(q, k=k, year=2020, cluster=3), queries)
+    exact_y = [index.exact(q, k=k, year=2020, cluster=3) for q in queries]
+    print(f"{'ivf (falls back to exact)':<28}{recall(approx, exact_y, k):>10.3f}{qps:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Open ME/CFS — /papers full-text benchmark
+-----------------------------------------
+Seeds a LOCAL Postgres with a synthetic corpus and compares the old
+ILIKE '%q%' search against the tsvector/GIN + pg_trgm backend added in
+supabase/migrations/06_papers_fulltext.sql.
+
+The target database is wiped (papers table dropped), so it refuses to run
+against a non-local host unless --allow-remote is given.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql://postgres@localhost:5432/bench \\
+        python benchmarks/bench_papers_fulltext.py --papers 100000
+"""
+
+import argparse
+import io
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+import psycopg2
+
+ROOT = Path(__file__).resolve().parents[1]
+MIGRATION = ROOT / "supabase" / "migrations" / "06_papers_fulltext.sql"
+
+VOCAB = (
+    "fatigue chronic myalgic encephalomyelitis syndrome immune cytokine "
+    "inflammation mitochondrial dysfunction energy metabolism oxidative stress "
+    "autonomic orthostatic intolerance tachycardia endothelial vascular "
+    "microclot platelet natural killer cell cytotoxicity lymphocyte antibody "
+    "autoantibody viral persistence epstein barr herpesvirus covid sars "
+    "neuroinflammation microglia cognition brain fog sleep pain exertion "
+    "malaise lactate pyruvate atp glycolysis lipid metabolomics proteomics "
+    "transcriptomics gut microbiome dysbiosis cortisol hypothalamic pituitary "
+    "cohort trial placebo randomized intervention treatment therapy patients "
+    "controls plasma serum biomarker marker expression signature pathway "
+    "receptor signalling regulation activation reduced elevated impaired "
+    "associated significant analysis study results methods background"
+).split()
+JOURNALS = [
+    "Journal of Translational Medicine", "Frontiers in Immunology",
+    "Brain Behavior and Immunity", "PLoS One", "Scientific Reports",
+    "Journal of Clinical Investigation", "Fatigue: Biomedicine Health & Behavior",
+]
+SURNAMES = [
+    "Smith", "Nacul", "Klimas", "Davis", "Montoya", "Hornig", "Lipkin",
+    "Komaroff", "Scheibenbogen", "Fluge", "Mella", "Naviaux", "Hanson",
+    "Staines", "Marshall-Gradisnik", "Lidbury", "Armstrong", "Wirth",
+]
+
+# Old /papers/search predicate vs the tsvector backend
+SEARCH_BEFORE = """
+    select pmid from papers
+    where title ilike %(like)s or abstract ilike %(like)s
+       or authors_text ilike %(like)s or journal ilike %(like)s
+       or keywords::text ilike %(like)s
+    limit 20"""
+SEARCH_AFTER = """
+    select pmid, ts_rank_cd(search_vector, q) as score
+    from papers, websearch_to_tsquery('english', %(q)s) q
+    where search_vector @@ q
+    order by score desc, pmid limit 20"""
+# Index cost alone (no ranking) — isolates ts_rank_cd work on common terms
+SEARCH_AFTER_UNRANKED = """
+    select pmid from papers
+    where search_vector @@ websearch_to_tsquery('english', %(q)s)
+    limit 20"""
+AUTHOR_FILTER = """
+    select pmid from papers where authors_text ilike %(like)s
+    order by year desc limit 20"""
+
+# label → ({phase: SQL}, term) — params are %(q)s / %(like)s
+SEARCH = {"before": SEARCH_BEFORE, "after": SEARCH_AFTER,
+          "unranked": SEARCH_AFTER_UNRANKED}
+AUTHOR = {"before": AUTHOR_FILTER, "after": AUTHOR_FILTER,
+          "unranked": AUTHOR_FILTER}
+QUERIES = [
+    ("search 'mitochondrial' (~10%)", SEARCH, "mitochondrial"),
+    ("search 'natural killer'", SEARCH, "natural killer"),
+    ("search 'lactate' (~2%)", SEARCH, "lactate"),
+    ("search 'rituximab' (no hits)", SEARCH, "rituximab"),
+    ("author filter 'Scheibenbogen'", AUTHOR, "Scheibenbogen"),
+]
+
+
+def dsn_from_url(url: str) -> str:
+    """Accept SQLAlchemy-style URLs (postgresql+psycopg2://…) too."""
+    scheme, rest = url.split("://", 1)
+    return "postgresql://" + rest if scheme.startswith("postgresql") else url
+
+
+def is_local(dsn: str) -> bool:
+    parsed = urlparse(dsn)
+    host = parsed.hostname or parse_qs(parsed.query).get("host", [""])[0]
+    return host in ("", "localhost", "127.0.0.1", "::1") or host.startswith("/")
+
+
+def synth_vocab(rng, size: int = 20_000) -> list[str]:
+    """Domain terms scattered through a long tail of pseudo-words."""
+    syllables = ["ka", "lo", "mi", "ne", "ro", "sa", "ti", "vu", "pel",
+                 "dor", "gan", "tex", "bri", "sul", "fen", "mor"]
+    filler = set()
+    while len(filler) < size:
+        filler.add("".join(rng.choices(syllables, k=rng.randint(2, 4))))
+    vocab = sorted(filler)
+    rng.shuffle(vocab)
+    # Domain terms land at ranks 10..~2000 → realistic document frequencies
+    for i, term in enumerate(VOCAB):
+        vocab.insert(10 + i * 20, term)
+    return vocab
+
+
+def synth_rows(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    vocab = synth_vocab(rng)
+    # Zipf word frequencies so a few terms are common and most are rare
+    cum_weights, total = [], 0.0
+    for i in range(len(vocab)):
+        total += 1 / (i + 1)
+        cum_weights.append(total)
+    for i in range(n):
+        authors = rng.sample(SURNAMES, rng.randint(1, 6))
+        authors = [f"{a} {rng.choice('ABCDEFGHJKLMNPRSTW')}" for a in authors]
+        yield (
+            f"bench{i:07d}",
+            " ".join(rng.choices(vocab, cum_weights=cum_weights, k=rng.randint(6, 14))),
+            " ".join(rng.choices(vocab, cum_weights=cum_weights, k=rng.randint(120, 250))),
+            "{" + ",".join(f'"{a}"' for a in authors) + "}",
+            rng.randint(1990, 2025),
+            ", ".join(authors),
+            rng.choice(JOURNALS),
+            "{" + ",".join(rng.sample(VOCAB, 4)) + "}",
+        )
+
+
+def seed(conn, n: int):
+    with conn.cursor() as cur:
+        cur.execute("drop table if exists papers cascade")
+        cur.execute("""
+            create table papers (
+              pmid text primary key,
+              title text,
+              abstract text,
+              authors text[],
+              year integer,
+              authors_text text,
+              journal text,
+              keywords text[],
+              created_at timestamptz default now()
+            )""")
+        buf = io.StringIO()
+        for row in synth_rows(n):
+            buf.write("\t".join(str(v) for v in row) + "\n")
+        buf.seek(0)
+        cur.copy_expert(
+            "copy papers (pmid, title, abstract, authors, year, authors_text, journal, keywords) from stdin",
+            buf,
+        )
+        cur.execute("analyze papers")
+    conn.commit()
+
+
+def apply_migration(conn) -> bool:
+    """Run 06_papers_fulltext.sql; returns False when pg_trgm is unavailable."""
+    with conn.cursor() as cur:
+        cur.execute(
+            "select 1 from pg_available_extensions where name = 'pg_trgm'")
+        has_trgm = cur.fetchone() is not None
+
+    sql = MIGRATION.read_text()
+    statements, buf, in_dollar = [], [], False
+    for line in sql.splitlines():
+        if line.strip().startswith("--") and not in_dollar:
+            continue
+        buf.append(line)
+        in_dollar ^= line.count("$$") % 2 == 1
+        if line.rstrip().endswith(";") and not in_dollar:
+            statements.append("\n".join(buf))
+            buf = []
+
+    with conn.cursor() as cur:
+        for stmt in statements:
+            if not has_trgm and ("pg_trgm" in stmt or "gin_trgm_ops" in stmt):
+                print(f"⚠️  pg_trgm unavailable — skipping: {stmt.split()[:6]}")
+                continue
+            cur.execute(stmt.replace("public.papers", "papers"))
+        cur.execute("analyze papers")
+    conn.commit()
+    return has_trgm
+
+
+def plan_summary(cur, sql, params) -> str:
+    cur.execute("explain (analyze, buffers, format text) " + sql, params)
+    lines = [r[0] for r in cur.fetchall()]
+    scans = [l.strip().lstrip("-> ").split("  (")[0] for l in lines
+             if "Scan" in l]
+    return " / ".join(dict.fromkeys(scans)) or lines[0]
+
+
+def time_query(cur, sql, params, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        cur.execute(sql, params)
+        cur.fetchall()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def run(conn, phase: str, repeat: int):
+    out = {}
+    with conn.cursor() as cur:
+        for label, sqls, term in QUERIES:
+            sql = sqls[phase]
+            params = {"q": term, "like": f"%{term}%"}
+            cur.execute(sql, params)  # warm cache
+            cur.fetchall()
+            out[label] = (time_query(cur, sql, params, repeat),
+                          plan_summary(cur, sql, params))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--papers", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--allow-remote", action="store_true")
+    args = parser.parse_args()
+
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("❌ Set BENCH_DATABASE_URL to a disposable local Postgres.")
+    dsn = dsn_from_url(url)
+    if not is_local(dsn) and not args.allow_remote:
+        sys.exit("❌ Refusing to drop `papers` on a non-local host (use --allow-remote).")
+
+    conn = psycopg2.connect(dsn)
+    t0 = time.perf_counter()
+    seed(conn, args.papers)
+    print(f"🌱 Seeded {args.papers:,} papers in {time.perf_counter() - t0:.1f}s")
+
+    before = run(conn, "before", args.repeat)
+    t0 = time.perf_counter()
+    has_trgm = apply_migration(conn)
+    print(f"🧱 Migration applied in {time.perf_counter() - t0:.1f}s "
+          f"(pg_trgm: {'yes' if has_trgm else 'no'})")
+    after = run(conn, "after", args.repeat)
+    unranked = run(conn, "unranked", args.repeat)
+
+    print("\nbefore = ILIKE chain (unranked, stops at 20 hits)")
+    print("after  = websearch_to_tsquery + ts_rank_cd top-20")
+    print("index  = GIN match only, no ranking\n")
+    print(f"{'query':32} {'before ms':>10} {'after ms':>10} {'index ms':>10} {'speedup':>8}")
+    for label in before:
+        b, a, u = before[label][0], after[label][0], unranked[label][0]
+        print(f"{label:32} {b:10.2f} {a:10.2f} {u:10.2f} {b / a if a else 0:7.1f}x")
+    print("\nPlans (median of %d runs):" % args.repeat)
+    for label in before:
+        print(f"  {label}\n    before: {before[label][1]}\n    after:  {after[label][1]}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Open ME/CFS — stats aggregation benchmark
+-----------------------------------------
+Seeds a LOCAL Postgres with synthetic papers, summaries and mechanism
+edges, then compares, for /stats, /stats/biomarker_counts and /biomarkers:
+
+    python   fetch the raw rows as JSON (what PostgREST would send) and
+             aggregate them in the API process, as utils/db did
+    rpc      the RPCs from supabase/migrations/12_stats_rpcs.sql, which
+             return only the final rows
+
+Bytes are the JSON payload sizes; latency is query + decode + aggregation
+over a local socket (no HTTP hop, so real PostgREST gaps are larger).
+
+The target database is wiped, so it refuses to run against a non-local
+host unless --allow-remote is given.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql://postgres@localhost:5432/bench \\
+        python benchmarks/bench_stats_rpc.py --papers 50000
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+import psycopg2
+
+from bench_papers_fulltext import SURNAMES, dsn_from_url, is_local
+
+ROOT = Path(__file__).resolve().parents[1]
+MIGRATION = ROOT / "supabase" / "migrations" / "12_stats_rpcs.sql"
+
+SCHEMA = """
+drop materialized view if exists stats_biomarker_counts, stats_biomarker_mechanisms,
+  stats_paper_years, stats_top_authors;
+drop table if exists mechanism_edges, mechanism_nodes, biomarker_nodes,
+  paper_summaries, papers cascade;
+create table papers (pmid text primary key, year integer, authors text[]);
+create table paper_summaries (
+  id uuid primary key, paper_pmid text not null references papers(pmid),
+  mechanisms text[] not null default '{}', biomarkers text[] not null default '{}');
+create table mechanism_nodes (id uuid primary key, name text not null unique);
+create table biomarker_nodes (id uuid primary key, name text not null unique);
+create table mechanism_edges (
+  id uuid primary key, paper_pmid text not null references papers(pmid),
+  source text not null default 'summary',
+  mechanism_id uuid references mechanism_nodes(id),
+  biomarker_id uuid references biomarker_nodes(id));
+"""
+
+# label → (raw-row queries for the Python path, RPC query)
+WORKLOADS = {
+    "/stats": (
+        ["select year, authors from papers"],
+        "select paper_stats(10)",
+    ),
+    "/stats/biomarker_counts": (
+        ["select biomarkers from paper_summaries"],
+        "select * from top_biomarkers(20)",
+    ),
+    "/biomarkers": (
+        ["select id, name from mechanism_nodes",
+         "select id, name from biomarker_nodes",
+         "select paper_pmid, source, mechanism_id, biomarker_id from mechanism_edges"],
+        "select * from biomarker_mechanisms(null)",
+    ),
+}
+
+
+# Zipf cumulative weights by list length, so a few names dominate
+CUM: dict[int, list[float]] = {}
+
+
+def zipf_choices(rng, items, k):
+    return rng.choices(items, cum_weights=CUM[len(items)], k=k)
+
+
+def seed(conn, n: int, seed_value: int = 7):
+    rng = random.Random(seed_value)
+    biomarkers = [f"BM-{i}" for i in range(800)]
+    mechanisms = [f"mechanism {i}" for i in range(250)]
+    authors = [f"{s} {c}{i}" for s in SURNAMES for c in "ABCDEFGH" for i in range(40)]
+    for items in (biomarkers, mechanisms, authors):
+        total, cum = 0.0, []
+        for i in range(len(items)):
+            total += 1 / (i + 1)
+            cum.append(total)
+        CUM[len(items)] = cum
+
+    mech_ids = {m: str(uuid.UUID(int=rng.getrandbits(128))) for m in mechanisms}
+    bio_ids = {b: str(uuid.UUID(int=rng.getrandbits(128))) for b in biomarkers}
+    papers, summaries, edges = io.StringIO(), io.StringIO(), io.StringIO()
+    for i in range(n):
+        pmid = f"bench{i:07d}"
+        names = dict.fromkeys(zipf_choices(rng, authors, rng.randint(1, 8)))
+        year = rng.randint(1990, 2025) if rng.random() > 0.02 else "\\N"
+        papers.write(f"{pmid}\t{year}\t{{{','.join(json.dumps(a) for a in names)}}}\n")
+        mechs = list(dict.fromkeys(zipf_choices(rng, mechanisms, rng.randint(1, 4))))
+        bios = list(dict.fromkeys(zipf_choices(rng, biomarkers, rng.randint(0, 6))))
+        # some summaries repeat a biomarker; every mention counts
+        mentioned = bios + bios[:1] if rng.random() < 0.1 else bios
+        summaries.write(f"{uuid.UUID(int=rng.getrandbits(128))}\t{pmid}\t"
+                        f"{{{','.join(json.dumps(m) for m in mechs)}}}\t"
+                        f"{{{','.join(json.dumps(b) for b in mentioned)}}}\n")
+        # /papers/mechanisms edges for some papers (left out of /biomarkers)
+        sources = ("summary", "mechanisms") if rng.random() < 0.2 else ("summary",)
+        for source in sources:
+            for m in mechs:
+                edges.write(f"{uuid.UUID(int=rng.getrandbits(128))}\t{pmid}\t{source}\t{mech_ids[m]}\t\\N\n")
+                for b in bios:
+                    edges.write(f"{uuid.UUID(int=rng.getrandbits(128))}\t{pmid}\t{source}\t"
+                                f"{mech_ids[m]}\t{bio_ids[b]}\n")
+
+    with conn.cursor() as cur:
+        cur.execute(SCHEMA)
+        for table, ids in (("mechanism_nodes", mech_ids), ("biomarker_nodes", bio_ids)):
+            buf = io.StringIO("".join(f"{v}\t{k}\n" for k, v in ids.items()))
+            cur.copy_expert(f"copy {table} (id, name) from stdin", buf)
+        for table, cols, buf in (
+                ("papers", "pmid, year, authors", papers),
+                ("paper_summaries", "id, paper_pmid, mechanisms, biomarkers", summaries),
+                ("mechanism_edges", "id, paper_pmid, source, mechanism_id, biomarker_id", edges)):
+            buf.seek(0)
+            cur.copy_expert(f"copy {table} ({cols}) from stdin", buf)
+        cur.execute("analyze")
+    conn.commit()
+
+
+# ------------------------------------------------------------
+# Python-side aggregation (as utils/db and the routes did)
+# ------------------------------------------------------------
+def aggregate_stats(papers):
+    year_counts, author_counts = {}, {}
+    for p in papers:
+        if p.get("year"):
+            year_counts[p["year"]] = year_counts.get(p["year"], 0) + 1
+        for a in p.get("authors") or []:
+            author_counts[a] = author_counts.get(a, 0) + 1
+    top = sorted(author_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+    return {"total_papers": len(papers), "year_distribution": year_counts,
+            "top_authors": [{"name": a, "count": c} for a, c in top]}
+
+
+def aggregate_biomarker_counts(rows):
+    counts = Counter()
+    for r in rows:
+        counts.update(b.strip() for b in r["biomarkers"] or [] if b.strip())
+    return counts.most_common(20)
+
+
+def aggregate_biomarkers(mech_nodes, bio_nodes, edges):
+    mech = {r["id"]: r["name"] for r in mech_nodes}
+    bio = {r["id"]: r["name"] for r in bio_nodes}
+    counts: dict[str, dict] = {}
+    for e in edges:
+        if e["biomarker_id"] and e["source"] == "summary":
+            entry = counts.setdefault(bio[e["biomarker_id"]], {"count": 0, "mechanisms": set()})
+            entry["count"] += 1
+            entry["mechanisms"].add(mech[e["mechanism_id"]])
+    out = [{"biomarker": b, "count": v["count"], "mechanisms": sorted(v["mechanisms"])}
+           for b, v in counts.items()]
+    out.sort(key=lambda x: x["count"], reverse=True)
+    return out
+
+
+AGGREGATE = {
+    "/stats": lambda rows: aggregate_stats(rows[0]),
+    "/stats/biomarker_counts": lambda rows: aggregate_biomarker_counts(rows[0]),
+    "/biomarkers": lambda rows: aggregate_biomarkers(*rows),
+}
+
+
+# label → (python result, rpc rows) → comparable values; both paths must agree
+SAME = {
+    "/stats": lambda py, rpc: (
+        (py["total_papers"], py["year_distribution"], [a["count"] for a in py["top_authors"]]),
+        (rpc[0]["paper_stats"]["total_papers"],
+         {int(y): c for y, c in rpc[0]["paper_stats"]["year_distribution"].items()},
+         [a["count"] for a in rpc[0]["paper_stats"]["top_authors"]])),
+    "/stats/biomarker_counts": lambda py, rpc: (
+        [c for _, c in py], [r["count"] for r in rpc]),
+    "/biomarkers": lambda py, rpc: (
+        {r["biomarker"]: (r["count"], set(r["mechanisms"])) for r in py},
+        {r["biomarker"]: (r["count"], set(r["mechanisms"])) for r in rpc}),
+}
+
+
+def fetch_json(cur, sql) -> tuple[str, object]:
+    """The query's rows as one JSON document (PostgREST serialises the same way)."""
+    cur.execute(f"select coalesce(json_agg(t), '[]')::text from ({sql}) t")
+    text = cur.fetchone()[0]
+    return text, json.loads(text)
+
+
+def measure(cur, label, repeat: int):
+    raw_sql, rpc_sql = WORKLOADS[label]
+    python_ms, rpc_ms = [], []
+    for _ in range(repeat + 1):  # first run warms the cache
+        t0 = time.perf_counter()
+        fetched = [fetch_json(cur, sql) for sql in raw_sql]
+        result = AGGREGATE[label]([rows for _, rows in fetched])
+        python_ms.append((time.perf_counter() - t0) * 1000)
+
+        t0 = time.perf_counter()
+        rpc_text, rpc_rows = fetch_json(cur, rpc_sql)
+        rpc_ms.append((time.perf_counter() - t0) * 1000)
+    expected, actual = SAME[label](result, rpc_rows)
+    if expected != actual:
+        sys.exit(f"❌ {label}: RPC result differs from the Python aggregation")
+    python_bytes = sum(len(text.encode()) for text, _ in fetched)
+    return (statistics.median(python_ms[1:]), python_bytes,
+            statistics.median(rpc_ms[1:]), len(rpc_text.encode()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--papers", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--allow-remote", action="store_true")
+    args = parser.parse_args()
+
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("❌ Set BENCH_DATABASE_URL to a disposable local Postgres.")
+    dsn = dsn_from_url(url)
+    if not is_local(dsn) and not args.allow_remote:
+        sys.exit("❌ Refusing to drop tables on a non-local host (use --allow-remote).")
+
+    conn = psycopg2.connect(dsn)
+    t0 = time.perf_counter()
+    seed(conn, args.papers)
+    print(f"🌱 Seeded {args.papers:,} papers in {time.perf_counter() - t0:.1f}s")
+
+    with conn.cursor() as cur:
+        t0 = time.perf_counter()
+        cur.execute(MIGRATION.read_text())
+        conn.commit()
+        print(f"🧱 Views built in {time.perf_counter() - t0:.2f}s")
+        t0 = time.perf_counter()
+        cur.execute("select refresh_stats_views()")
+        conn.commit()
+        print(f"🔄 refresh_stats_views() (concurrently) in {time.perf_counter() - t0:.2f}s\n")
+
+        print(f"{'endpoint':26} {'python ms':>10} {'python KB':>11} "
+              f"{'rpc ms':>8} {'rpc KB':>8} {'speedup':>8}")
+        for label in WORKLOADS:
+            p_ms, p_bytes, r_ms, r_bytes = measure(cur, label, args.repeat)
+            print(f"{label:26} {p_ms:10.1f} {p_bytes / 1024:11.1f} "
+                  f"{r_ms:8.2f} {r_bytes / 1024:8.1f} {p_ms / r_ms if r_ms else 0:7.0f}x")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
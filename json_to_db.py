@@ -10,6 +10,7 @@ from datetime import datetime
 from supabase import create_client, Client
 from dotenv import load_dotenv
 from utils.db import _search_cache
+from utils.stats_db import refresh_stats_views
 
 # Load credentials from .env
 load_dotenv()
@@ -74,4 +75,6 @@ for p in papers:
 # After successful import
 _search_cache.clear()
 print("🧹 Cache cleared after import.")
+refresh_stats_views()
+print("📊 Stats views refreshed.")
 print("✅ Import complete.")
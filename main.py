@@ -16,6 +16,13 @@ from routes.graph_global import router as graph_global_router
 from routes import biomarkers
 from routes import biomarkers_graph
 from routes import ai_hypotheses
+from routes.papers_similar import router as similar_router
+from utils.search_db import load_search_index, load_suggest_index
+from utils.vector_db import load_ann_index, load_vector_store
+from utils.graph_db import load_graph_store
+from utils.stats_db import load_stats
+from utils import store_versions
+import threading
 
 # ------------------------------------------------------------
 # 🚀 App Configuration
@@ -41,6 +48,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Snapshot-Version",
+                    "X-Snapshot-Generated-At", "X-Snapshot-Stale", "ETag"],
 )
 
 # ------------------------------------------------------------
@@ -72,6 +81,7 @@ app.include_router(summarize_router)
 # ✅ Supabase papers mounted at /papers-sb
 app.include_router(papers_supabase.router, prefix="/papers-sb")
 app.include_router(papers_sync_router)
+app.include_router(similar_router)
 
 app.include_router(embeddings_router)
 app.include_router(mechanisms_router)
@@ -82,6 +92,40 @@ app.include_router(graph_global_router)
 app.include_router(biomarkers.router)
 app.include_router(biomarkers_graph.router)
 app.include_router(ai_hypotheses.router, prefix="/ai", tags=["AI"])
+# ------------------------------------------------------------
+# 🔥 Startup — warm in-process indexes without blocking boot
+# ------------------------------------------------------------
+
+
+def _warm_indexes():
+    try:
+        store_versions.check_store_versions()  # cursor before the loads, so no write is missed
+    except Exception as e:
+        print(f"⚠️ Store change check failed (apply 17_store_changes.sql): {e}")
+    try:
+        load_search_index()
+        load_suggest_index()
+        load_stats()
+    except Exception as e:
+        print(f"⚠️ Search index warm-up failed (will retry lazily): {e}")
+    try:
+        load_graph_store()
+    except Exception as e:
+        print(f"⚠️ Graph store warm-up failed (will retry lazily): {e}")
+    try:
+        load_vector_store()  # mmap: instant, pages shared across workers
+        load_ann_index()  # snapshot, or the one full build; requests never build
+    except Exception as e:
+        print(f"⚠️ ANN index warm-up failed (requests fall back to the store/RPC): {e}")
+
+
+@app.on_event("startup")
+def warm_indexes():
+    threading.Thread(target=_warm_indexes, daemon=True).start()
+    store_versions.start_watcher()
+    ai_hypotheses.start_refresher()
+
+
 # ------------------------------------------------------------
 # 🔍 Root Route
 # ------------------------------------------------------------
@@ -101,6 +145,7 @@ def root():
             "/papers/meta",
             "/health",
             "/embeddings",
+            "/embeddings/tiles/{z}/{x}/{y}",
             "/biomarkers",  # ✅ Add to root listing
         ],
     }
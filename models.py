@@ -1,8 +1,19 @@
 # models.py
-from sqlalchemy import Column, Integer, String, Text, ARRAY, DateTime
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Column, Integer, String, Text, ARRAY, DateTime, Computed, Index, DDL, event
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import deferred
 from database import Base
 
+# Weighted document for full-text search (mirrors 06_papers_fulltext.sql):
+# title (A) > keywords (B) > abstract (C) > authors, journal (D)
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', public.immutable_array_to_string(keywords, ' ')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(abstract, '')), 'C') || "
+    "setweight(to_tsvector('english', coalesce(authors_text, '')), 'D') || "
+    "setweight(to_tsvector('english', coalesce(journal, '')), 'D')"
+)
+
 
 class Paper(Base):
     __tablename__ = "papers"
@@ -19,3 +30,30 @@ class Paper(Base):
     embedding = Column(JSONB)
     technical_summary = Column(Text, nullable=True)
     patient_summary = Column(Text, nullable=True)
+    # deferred: only loaded when a query asks for it
+    search_vector = deferred(
+        Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True)))
+
+    __table_args__ = (
+        Index("idx_papers_search_vector", "search_vector",
+              postgresql_using="gin"),
+        Index("idx_papers_authors_text_trgm", "authors_text",
+              postgresql_using="gin", postgresql_ops={"authors_text": "gin_trgm_ops"}),
+        Index("idx_papers_journal_trgm", "journal",
+              postgresql_using="gin", postgresql_ops={"journal": "gin_trgm_ops"}),
+        Index("idx_papers_keywords", "keywords", postgresql_using="gin"),
+        Index("idx_papers_year", "year"),
+    )
+
+
+# create_all() needs the extension + helper function before the table exists
+event.listen(
+    Paper.__table__,
+    "before_create",
+    DDL(
+        "create extension if not exists pg_trgm; "
+        "create or replace function public.immutable_array_to_string(arr text[], sep text) "
+        "returns text language sql immutable parallel safe "
+        "as $$ select coalesce(array_to_string(arr, sep), '') $$;"
+    ),
+)
@@ -1,7 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Header, Query, Response
 from supabase import create_client, Client
 from openai import OpenAI
+from typing import Optional
+import asyncio
 import os
+import threading
+import time
 import uuid
 import numpy as np
 from numpy.linalg import norm
@@ -9,6 +13,11 @@ import datetime
 import json
 import re
 
+try:
+    import fcntl  # cross-worker refresh lock (POSIX)
+except ImportError:
+    fcntl = None
+
 # --------------------------------------------------------------------
 # 🧠 Initialization
 # --------------------------------------------------------------------
@@ -23,13 +32,100 @@ openai = OpenAI(api_key=OPENAI_API_KEY)
 
 
 # --------------------------------------------------------------------
-# 🚀 Helper: cosine similarity
+# 🚀 Helper: hypothesis embeddings (persisted in ai_hypotheses.embedding)
 # --------------------------------------------------------------------
-def cosine_sim(a, b):
-    a, b = np.array(a), np.array(b)
-    if norm(a) == 0 or norm(b) == 0:
-        return 0
-    return float(np.dot(a, b) / (norm(a) * norm(b)))
+EMBED_MODEL = "text-embedding-3-small"
+SIM_THRESHOLD = 0.88
+
+# id → unit-length title embedding; rows are immutable, so this only grows
+_vectors: dict[str, np.ndarray] = {}
+
+# Dedup result for the stored rows, reused until the set of ids changes
+_existing_dedup = {"key": None}
+
+# Ids per `in.(...)` embedding fetch, keeping the request URL short
+EMBEDDING_FETCH_CHUNK = 200
+
+# Everything but the embedding (which never leaves the server)
+HYPOTHESIS_COLUMNS = (
+    "id, title, summary, confidence, mechanisms, biomarkers, citations, "
+    "created_at, last_synced_at"
+)
+
+
+def unit_rows(vectors) -> np.ndarray:
+    m = np.asarray(vectors, dtype=np.float32)
+    if m.ndim != 2 or not m.size:
+        return np.zeros((0, 0), dtype=np.float32)
+    norms = norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+
+def embed_titles(titles: list[str]) -> np.ndarray:
+    """One batched embeddings call → pre-normalized matrix."""
+    if not titles:
+        return np.zeros((0, 0), dtype=np.float32)
+    res = openai.embeddings.create(model=EMBED_MODEL, input=titles)
+    return unit_rows([d.embedding for d in sorted(res.data, key=lambda d: d.index)])
+
+
+def hypothesis_matrix(rows: list[dict]) -> np.ndarray:
+    """
+    Pre-normalized embedding matrix for stored hypotheses (row order kept).
+    Vectors come from the process cache, then the embedding column; only
+    legacy rows without one are embedded (once) and written back.
+    """
+    missing = [str(h["id"]) for h in rows if str(h["id"]) not in _vectors]
+    for i in range(0, len(missing), EMBEDDING_FETCH_CHUNK):
+        stored = (
+            supabase.table("ai_hypotheses")
+            .select("id, embedding")
+            .in_("id", missing[i:i + EMBEDDING_FETCH_CHUNK])
+            .execute()
+            .data
+        ) or []
+        found = [r for r in stored if r.get("embedding")]
+        if found:
+            for r, v in zip(found, unit_rows([r["embedding"] for r in found])):
+                _vectors[str(r["id"])] = v
+
+    legacy = [h for h in rows if str(h["id"]) not in _vectors]
+    if legacy:
+        vectors = embed_titles([h["title"] for h in legacy])
+        for h, v in zip(legacy, vectors):
+            _vectors[str(h["id"])] = v
+        try:
+            supabase.table("ai_hypotheses").upsert(
+                [{"id": h["id"], "title": h["title"], "embedding": v.tolist()}
+                 for h, v in zip(legacy, vectors)]
+            ).execute()
+            print(f"DEBUG: Back-filled {len(legacy)} hypothesis embeddings.")
+        except Exception as e:
+            print(f"WARNING: Could not store hypothesis embeddings: {e}")
+
+    if not rows:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.stack([_vectors[str(h["id"])] for h in rows])
+
+
+def semantic_keep(candidates: np.ndarray, kept: np.ndarray,
+                  threshold: float = SIM_THRESHOLD) -> np.ndarray:
+    """
+    Greedy dedup as one matrix product per side: a candidate survives if it
+    is below `threshold` against every `kept` row and every earlier survivor.
+    """
+    n = len(candidates)
+    if not n:
+        return np.zeros(0, dtype=bool)
+    dup = np.zeros(n, dtype=bool)
+    if kept.size:
+        dup |= (candidates @ kept.T >= threshold).any(axis=1)
+    close = np.triu(candidates @ candidates.T >= threshold, k=1)  # close[j, i], j < i
+    keep = np.zeros(n, dtype=bool)
+    for i in range(n):
+        keep[i] = not dup[i] and not close[:i, i][keep[:i]].any()
+    return keep
 
 
 # --------------------------------------------------------------------
@@ -42,13 +138,48 @@ def normalize_title(title: str) -> str:
     return title
 
 
+def title_prefilter(items: list[dict], seen_titles: set) -> list[dict]:
+    """Drop items whose normalized title contains / is contained in a seen one."""
+    filtered = []
+    for h in items:
+        title_key = normalize_title(h.get("title", ""))
+        if any(
+            title_key in t or t in title_key
+            for t in seen_titles
+            if len(title_key) > 10
+        ):
+            continue
+        seen_titles.add(title_key)
+        filtered.append(h)
+    return filtered
+
+
+def dedup_existing(existing: list[dict]):
+    """
+    (kept rows, kept matrix, prefilter titles) for the stored hypotheses.
+    Recomputed only when the set of stored ids changes.
+    """
+    key = tuple(str(h.get("id")) for h in existing)
+    if _existing_dedup["key"] != key:
+        titles = set()
+        filtered = [h for h in title_prefilter(existing, titles) if h.get("title")]
+        matrix = hypothesis_matrix(filtered)
+        keep = semantic_keep(matrix, np.zeros((0, 0), dtype=np.float32))
+        _existing_dedup.update(
+            key=key,
+            kept=[h for h, k in zip(filtered, keep) if k],
+            matrix=matrix[keep] if len(filtered) else matrix,
+            titles=titles,
+        )
+    return _existing_dedup["kept"], _existing_dedup["matrix"], set(_existing_dedup["titles"])
+
+
 # --------------------------------------------------------------------
-# 🚀 Combined Hypotheses Endpoint (Non-destructive sync + timestamp)
+# 🚀 Generation (runs in the background refresher, never on a GET)
 # --------------------------------------------------------------------
-@router.get("/hypotheses")
-async def get_ai_hypotheses():
+def generate_hypotheses() -> list[dict]:
     """
-    Returns both:
+    Builds the combined list:
       1. Existing hypotheses stored in Supabase (ai_hypotheses table)
       2. New AI-generated hypotheses from paper_summaries
          — with semantic + textual deduplication
@@ -56,175 +187,326 @@ async def get_ai_hypotheses():
          — includes last_synced_at timestamp for each hypothesis
     """
 
+    print("DEBUG: Generating hypotheses snapshot ✅")
+
+    # 1️⃣ Pull existing hypotheses
+    existing = (
+        supabase.table("ai_hypotheses")
+        .select(HYPOTHESIS_COLUMNS)
+        .order("created_at", desc=True)
+        .execute()
+        .data
+    ) or []
+    print(f"DEBUG: Retrieved {len(existing)} existing hypotheses.")
+
+    # 2️⃣ Gather paper summaries
+    summaries = (
+        supabase.table("paper_summaries")
+        .select("one_sentence")
+        .limit(40)
+        .execute()
+        .data
+    ) or []
+    print(f"DEBUG: Retrieved {len(summaries)} paper summaries.")
+
+    if not summaries:
+        return existing
+
+    text_corpus = "\n".join(f"- {s['one_sentence']}" for s in summaries)
+
+    # ----------------------------------------------------------------
+    # 3️⃣ Generate fresh hypotheses via GPT
+    # ----------------------------------------------------------------
+    prompt = f"""
+    You are a biomedical research AI specializing in ME/CFS.
+    Review the following study summaries and propose 3 new causal hypotheses
+    linking biological mechanisms and biomarkers.
+
+    Each hypothesis must be returned as a JSON array of objects with:
+      title (string),
+      summary (string),
+      confidence (float 0–1),
+      mechanisms (array of strings),
+      biomarkers (array of strings),
+      citations (array of short references).
+
+    Summaries:
+    {text_corpus}
+    """
+
     try:
-        print("DEBUG: /ai/hypotheses endpoint hit ✅")
+        completion = openai.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": "You are a biomedical AI researcher."},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.4,
+        )
 
-        # 1️⃣ Pull existing hypotheses
-        existing = (
-            supabase.table("ai_hypotheses")
-            .select("*")
-            .order("created_at", desc=True)
-            .execute()
-            .data
-        ) or []
-        print(f"DEBUG: Retrieved {len(existing)} existing hypotheses.")
+        content = completion.choices[0].message.content.strip()
+        ai_generated = json.loads(content)
+        print(f"DEBUG: GPT returned {len(ai_generated)} raw hypotheses.")
 
-        # 2️⃣ Gather paper summaries
-        summaries = (
-            supabase.table("paper_summaries")
-            .select("one_sentence")
-            .limit(40)
-            .execute()
-            .data
-        ) or []
-        print(f"DEBUG: Retrieved {len(summaries)} paper summaries.")
+    except json.JSONDecodeError:
+        print("WARNING: GPT output was not valid JSON — skipping parse.")
+        ai_generated = []
+    except Exception as e:
+        print(f"ERROR: GPT generation failed: {e}")
+        ai_generated = []
+
+    # ----------------------------------------------------------------
+    # 4️⃣ Normalize + assign metadata
+    # ----------------------------------------------------------------
+    now = datetime.datetime.utcnow().isoformat()
+    for h in ai_generated:
+        h["id"] = str(uuid.uuid4())
+        conf = h.get("confidence", 0.5)
+        if not isinstance(conf, (int, float)):
+            conf = 0.5
+        h["confidence"] = max(0, min(1, conf))
+        h["created_at"] = now
+        h["last_synced_at"] = now
+
+    # ----------------------------------------------------------------
+    # 5️⃣ Stored hypotheses: deduped once per change, vectors from the table
+    # ----------------------------------------------------------------
+    kept, kept_matrix, seen_titles = dedup_existing(existing)
+    print(f"DEBUG: {len(kept)} stored hypotheses after dedup.")
+
+    # ----------------------------------------------------------------
+    # 6️⃣ New hypotheses: title prefilter, then embed only these titles
+    # ----------------------------------------------------------------
+    fresh = [h for h in title_prefilter(ai_generated, seen_titles)
+             if h.get("title")]
+    fresh_matrix = embed_titles([h["title"] for h in fresh])
+
+    # ----------------------------------------------------------------
+    # 7️⃣ Semantic deduplication (threshold = 0.88): two matrix products
+    # ----------------------------------------------------------------
+    keep = semantic_keep(fresh_matrix, kept_matrix)
+    new_unique_rows = []
+    for h, v, k in zip(fresh, fresh_matrix, keep):
+        if k:
+            _vectors[h["id"]] = v
+            new_unique_rows.append({**h, "embedding": v.tolist()})
+    unique = kept + [
+        {k: v for k, v in h.items() if k != "embedding"} for h in new_unique_rows
+    ]
+
+    print(
+        f"DEBUG: Deduped to {len(unique)} unique hypotheses (threshold={SIM_THRESHOLD}).")
+
+    # ----------------------------------------------------------------
+    # 8️⃣ Supabase sync — Non-destructive append + last_synced_at
+    # ----------------------------------------------------------------
+    try:
+        print("DEBUG: Syncing deduped hypotheses to Supabase...")
 
-        if not summaries:
-            return existing
+        existing_titles = {normalize_title(
+            h["title"]) for h in existing if "title" in h}
+        new_unique = [
+            {**h, "last_synced_at": now}
+            for h in new_unique_rows
+            if normalize_title(h["title"]) not in existing_titles
+        ]
 
-        text_corpus = "\n".join(f"- {s['one_sentence']}" for s in summaries)
+        if new_unique:
+            supabase.table("ai_hypotheses").insert(new_unique).execute()
+            print(f"DEBUG: Inserted {len(new_unique)} new hypotheses.")
+        else:
+            print("DEBUG: No new unique hypotheses to insert.")
 
-        # ----------------------------------------------------------------
-        # 3️⃣ Generate fresh hypotheses via GPT
-        # ----------------------------------------------------------------
-        prompt = f"""
-        You are a biomedical research AI specializing in ME/CFS.
-        Review the following study summaries and propose 3 new causal hypotheses
-        linking biological mechanisms and biomarkers.
+    except Exception as sync_err:
+        print(f"WARNING: Could not sync new hypotheses: {sync_err}")
 
-        Each hypothesis must be returned as a JSON array of objects with:
-          title (string),
-          summary (string),
-          confidence (float 0–1),
-          mechanisms (array of strings),
-          biomarkers (array of strings),
-          citations (array of short references).
+    return unique
 
-        Summaries:
-        {text_corpus}
-        """
 
-        try:
-            completion = openai.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a biomedical AI researcher."},
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.4,
-            )
-
-            content = completion.choices[0].message.content.strip()
-            ai_generated = json.loads(content)
-            print(f"DEBUG: GPT returned {len(ai_generated)} raw hypotheses.")
-
-        except json.JSONDecodeError:
-            print("WARNING: GPT output was not valid JSON — skipping parse.")
-            ai_generated = []
-        except Exception as e:
-            print(f"ERROR: GPT generation failed: {e}")
-            ai_generated = []
-
-        # ----------------------------------------------------------------
-        # 4️⃣ Normalize + assign metadata
-        # ----------------------------------------------------------------
-        now = datetime.datetime.utcnow().isoformat()
-        for h in ai_generated:
-            h["id"] = str(uuid.uuid4())
-            conf = h.get("confidence", 0.5)
-            if not isinstance(conf, (int, float)):
-                conf = 0.5
-            h["confidence"] = max(0, min(1, conf))
-            h["created_at"] = now
-            h["last_synced_at"] = now
-
-        combined = existing + ai_generated
-        print(f"DEBUG: Total before dedup: {len(combined)}")
-
-        # ----------------------------------------------------------------
-        # 5️⃣ Lightweight title prefilter
-        # ----------------------------------------------------------------
-        seen_titles = set()
-        filtered = []
-        for h in combined:
-            title_key = normalize_title(h.get("title", ""))
-            if any(
-                title_key in t or t in title_key
-                for t in seen_titles
-                if len(title_key) > 10
-            ):
-                continue
-            seen_titles.add(title_key)
-            filtered.append(h)
-
-        print(f"DEBUG: After title prefilter: {len(filtered)} remain.")
-
-        # ----------------------------------------------------------------
-        # 6️⃣ Compute embeddings via OpenAI
-        # ----------------------------------------------------------------
-        titles = [h["title"] for h in filtered if "title" in h]
-        if not titles:
-            return filtered
-
-        embedding_response = openai.embeddings.create(
-            model="text-embedding-3-small",
-            input=titles,
-        )
+# --------------------------------------------------------------------
+# 📸 Versioned snapshot + background refresher
+# --------------------------------------------------------------------
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# Regenerate this often; a snapshot older than this is served as stale
+REFRESH_SECONDS = int(os.getenv("HYPOTHESES_REFRESH_SECONDS", 6 * 3600))
+
+SNAPSHOT_PATH = os.getenv(
+    "HYPOTHESES_SNAPSHOT_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                 "data", "hypotheses_snapshot.json"),
+)
+
+_snapshot = {"version": 0, "generated_at": None, "items": [], "mtime": None}
+_refresh_lock = threading.Lock()  # single-flight within a worker
 
-        embeddings = [d.embedding for d in embedding_response.data]
-
-        # ----------------------------------------------------------------
-        # 7️⃣ Semantic deduplication (threshold = 0.88)
-        # ----------------------------------------------------------------
-        unique = []
-        seen = []
-
-        for i, emb in enumerate(embeddings):
-            if not isinstance(emb, (list, np.ndarray)) or len(emb) == 0:
-                continue
-
-            duplicate = False
-            for seen_emb in seen:
-                try:
-                    if cosine_sim(emb, seen_emb) >= 0.88:
-                        duplicate = True
-                        break
-                except Exception:
-                    continue
-
-            if not duplicate:
-                unique.append(filtered[i])
-                seen.append(emb)
-
-        print(
-            f"DEBUG: Deduped to {len(unique)} unique hypotheses (threshold=0.88).")
-
-        # ----------------------------------------------------------------
-        # 8️⃣ Supabase sync — Non-destructive append + last_synced_at
-        # ----------------------------------------------------------------
+
+def read_snapshot() -> dict:
+    """Current snapshot, re-read when another worker has written a newer file."""
+    try:
+        mtime = os.path.getmtime(SNAPSHOT_PATH)
+    except OSError:
+        return _snapshot
+    if mtime != _snapshot["mtime"]:
         try:
-            print("DEBUG: Syncing deduped hypotheses to Supabase...")
+            with open(SNAPSHOT_PATH) as f:
+                data = json.load(f)
+            _snapshot.update(data, mtime=mtime)
+        except (OSError, ValueError) as e:
+            print(f"WARNING: Could not read hypotheses snapshot: {e}")
+    return _snapshot
+
+
+def write_snapshot(items: list[dict]) -> dict:
+    snap = {
+        "version": read_snapshot()["version"] + 1,
+        "generated_at": datetime.datetime.utcnow().isoformat(),
+        "items": items,
+    }
+    os.makedirs(os.path.dirname(SNAPSHOT_PATH), exist_ok=True)
+    tmp = f"{SNAPSHOT_PATH}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(snap, f, default=str)
+    os.replace(tmp, SNAPSHOT_PATH)
+    _snapshot.update(snap, mtime=os.path.getmtime(SNAPSHOT_PATH))
+    return _snapshot
+
+
+def snapshot_age(snap: dict) -> float | None:
+    if not snap["generated_at"]:
+        return None
+    generated = datetime.datetime.fromisoformat(snap["generated_at"])
+    return (datetime.datetime.utcnow() - generated).total_seconds()
+
+
+def refresh_hypotheses(force: bool = False) -> bool:
+    """
+    Generate and publish a new snapshot. Single-flight: returns False if a
+    refresh is already running here or (via a file lock) in another worker,
+    or — unless forced — if the snapshot is already fresh.
+    """
+    if not _refresh_lock.acquire(blocking=False):
+        return False
+    lock_file = None
+    try:
+        if fcntl:
+            os.makedirs(os.path.dirname(SNAPSHOT_PATH), exist_ok=True)
+            lock_file = open(f"{SNAPSHOT_PATH}.lock", "w")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return False
+        age = snapshot_age(read_snapshot())
+        if not force and age is not None and age < REFRESH_SECONDS:
+            return False
+        started = time.perf_counter()
+        snap = write_snapshot(generate_hypotheses())
+        print(f"DEBUG: Hypotheses snapshot v{snap['version']} "
+              f"({len(snap['items'])} items) in {time.perf_counter() - started:.1f}s.")
+        return True
+    except Exception as e:
+        print(f"ERROR: Hypotheses refresh failed: {e}")
+        return False
+    finally:
+        if lock_file:
+            lock_file.close()
+        _refresh_lock.release()
 
-            existing_titles = {normalize_title(
-                h["title"]) for h in existing if "title" in h}
-            new_unique = [
-                {**h, "last_synced_at": now}
-                for h in unique
-                if normalize_title(h["title"]) not in existing_titles
-            ]
 
-            if new_unique:
-                supabase.table("ai_hypotheses").insert(new_unique).execute()
-                print(f"DEBUG: Inserted {len(new_unique)} new hypotheses.")
-            else:
-                print("DEBUG: No new unique hypotheses to insert.")
+def refresh_in_background(force: bool = False) -> bool:
+    """Kick off a refresh thread unless one is already running in this worker."""
+    if _refresh_lock.locked():
+        return False
+    threading.Thread(target=refresh_hypotheses, args=(force,), daemon=True).start()
+    return True
 
-        except Exception as sync_err:
-            print(f"WARNING: Could not sync new hypotheses: {sync_err}")
 
-        return unique
+def _refresh_loop():
+    while True:
+        refresh_hypotheses()
+        time.sleep(min(REFRESH_SECONDS, 600))
 
-    except Exception as e:
-        print(f"ERROR: {e}")
+
+def start_refresher():
+    """Background scheduler (started from main.py on app startup)."""
+    threading.Thread(target=_refresh_loop, daemon=True).start()
+
+
+def _stored_hypotheses() -> list[dict]:
+    """Cold-start fallback before the first snapshot: stored rows only, no GPT."""
+    return (
+        supabase.table("ai_hypotheses")
+        .select(HYPOTHESIS_COLUMNS)
+        .order("created_at", desc=True)
+        .execute()
+        .data
+    ) or []
+
+
+# --------------------------------------------------------------------
+# 🚀 Combined Hypotheses Endpoint (served from the snapshot)
+# --------------------------------------------------------------------
+@router.get("/hypotheses")
+async def get_ai_hypotheses(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+):
+    """
+    Stored + AI-generated hypotheses from the latest snapshot, instantly.
+    Stale-while-revalidate: an old snapshot is still served while a
+    background refresh runs. Paging via limit/offset; totals and snapshot
+    metadata are in X-* headers so the body stays a plain list.
+    """
+    snap = read_snapshot()
+    age = snapshot_age(snap)
+
+    if age is None:
+        try:
+            items = await asyncio.to_thread(_stored_hypotheses)
+        except Exception as e:
+            print(f"ERROR: {e}")
+            raise HTTPException(
+                status_code=500, detail=f"Error loading hypotheses: {e}")
+        refresh_in_background()
+        stale = True
+    else:
+        items = snap["items"]
+        stale = age >= REFRESH_SECONDS
+        if stale:
+            refresh_in_background()
+
+    response.headers["X-Total-Count"] = str(len(items))
+    response.headers["X-Snapshot-Version"] = str(snap["version"])
+    response.headers["X-Snapshot-Generated-At"] = snap["generated_at"] or ""
+    response.headers["X-Snapshot-Stale"] = "true" if stale else "false"
+    response.headers["Cache-Control"] = (
+        f"public, max-age=60, stale-while-revalidate={REFRESH_SECONDS}")
+
+    end = offset + limit if limit else None
+    return items[offset:end]
+
+
+@router.post("/hypotheses/refresh", status_code=202)
+def force_refresh_hypotheses(
+    wait: bool = Query(False, description="Block until the new snapshot is written"),
+    x_admin_token: str | None = Header(None),
+):
+    """
+    Force regeneration now (ignores snapshot age).
+    Requires X-Admin-Token header if ADMIN_TOKEN is set in environment.
+    """
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
         raise HTTPException(
-            status_code=500, detail=f"Error generating hypotheses: {e}")
+            status_code=403, detail="Forbidden: invalid admin token.")
+
+    if wait:
+        started = refresh_hypotheses(force=True)
+    else:
+        started = refresh_in_background(force=True)
+    snap = read_snapshot()
+    return {
+        "status": ("refreshed" if wait else "started") if started else "already_running",
+        "version": snap["version"],
+        "generated_at": snap["generated_at"],
+    }
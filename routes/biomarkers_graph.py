@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException
-from utils.db import supabase
+from utils.graph_db import load_graph_store
+from utils.graph_store import MECHANISM, MECH_BIO
 
 router = APIRouter(prefix="/biomarkers", tags=["Biomarkers"])
 
@@ -8,28 +9,23 @@ router = APIRouter(prefix="/biomarkers", tags=["Biomarkers"])
 def biomarker_graph():
     """Return nodes and links for biomarkers ↔ mechanisms"""
     try:
-        res = (
-            supabase.table("paper_graph")
-            .select("mechanism, biomarker, edge_type")
-            .execute()
-        )
-        rows = [r for r in res.data if r.get(
-            "mechanism") and r.get("biomarker")]
+        graph = load_graph_store()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
     nodes, links = {}, []
 
-    for row in rows:
-        mech = row["mechanism"].strip()
-        biom = row["biomarker"].strip()
-
-        if mech not in nodes:
-            nodes[mech] = {"id": mech, "type": "mechanism", "val": 5}
-        if biom not in nodes:
-            nodes[biom] = {"id": biom, "type": "biomarker", "val": 2}
-
-        links.append({"source": mech, "target": biom,
-                     "type": "mechanism→biomarker"})
+    offsets, targets, weights = graph.csr(MECH_BIO)
+    for mech in graph.nodes_of_kind(MECHANISM).tolist():
+        lo, hi = offsets[mech], offsets[mech + 1]
+        if lo == hi:
+            continue
+        mech_name = graph.names[mech]
+        nodes.setdefault(mech_name, {"id": mech_name, "type": "mechanism", "val": 5})
+        for biom, weight in zip(targets[lo:hi].tolist(), weights[lo:hi].tolist()):
+            biom_name = graph.names[biom]
+            nodes.setdefault(biom_name, {"id": biom_name, "type": "biomarker", "val": 2})
+            links.append({"source": mech_name, "target": biom_name,
+                         "type": "mechanism→biomarker", "weight": weight})
 
     return {"nodes": list(nodes.values()), "links": links}
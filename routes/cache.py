@@ -2,6 +2,14 @@
 import os
 from fastapi import APIRouter, HTTPException, Header
 from utils.db import _search_cache
+from utils.search_index import search_index
+from utils.embedding_cache import query_embedding_cache
+from utils.vector_store import vector_store
+from utils.clustering import cluster_model
+from utils.graph_store import graph_store
+from utils.cooccurrence import cooccurrence
+from utils.stats_accumulator import stats_accumulator
+from utils.store_versions import rebuild_stores_in_background
 
 router = APIRouter(prefix="/cache", tags=["cache"])
 
@@ -16,13 +24,26 @@ def cache_status():
         "search_cache_items": len(_search_cache),
         "cache_ttl_seconds": _search_cache.ttl,
         "maxsize": _search_cache.maxsize,
+        "search_index_papers": len(search_index),
+        "search_index_terms": len(search_index.postings),
+        "query_embeddings": query_embedding_cache.status(),
+        "vector_store": vector_store.status(),
+        "cluster_model": cluster_model.status(),
+        "graph_store": graph_store.status(),
+        "cooccurrence": cooccurrence.status(),
+        "stats": stats_accumulator.status(),
     }
 
 
 @router.post("/clear")
 def clear_cache(x_admin_token: str | None = Header(None)):
     """
-    Clears all cached search results.
+    Clears all cached search results and rebuilds the search index,
+    suggestions, graph store (with co-occurrence) and stats of the worker
+    that serves this request in the background; requests keep using the
+    current copies until each is swapped. Other workers pick up
+    out-of-process writes (e.g. json_to_db.py) within
+    utils.store_versions.STORE_VERSION_INTERVAL seconds on their own.
     Requires X-Admin-Token header if ADMIN_TOKEN is set in environment.
     """
     if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
@@ -30,4 +51,8 @@ def clear_cache(x_admin_token: str | None = Header(None)):
             status_code=403, detail="Forbidden: invalid admin token.")
 
     _search_cache.clear()
-    return {"message": "✅ Search cache cleared successfully."}
+    started = rebuild_stores_in_background()
+    return {
+        "message": "✅ Search cache cleared successfully.",
+        "rebuild": "started" if started else "already running",
+    }
@@ -1,30 +1,150 @@
-from fastapi import APIRouter
-from supabase import create_client
-import os
+# routes/embeddings.py
+"""
+Open ME/CFS — UMAP Scatter
+------------------------------------------------------------
+GET /embeddings → every paper's 2-D map position + cluster.
+
+Content negotiation:
+  Accept: application/json (default)          [{id, cluster_label, x, y}, …]
+  Accept: application/vnd.openmecfs.scatter   packed binary (or ?format=binary)
+
+Binary layout: see utils/scatter.py (OMCS v1, typed-array friendly).
+
+GET /embeddings/tiles            → pyramid bounds, max zoom, version
+GET /embeddings/tiles/{z}/{x}/{y} → one XYZ tile of the map: per-cell
+    cluster counts ("cells") where the tile is dense, individual points
+    ("points") once it holds ≤ 2000. Tiles carry an ETag derived from the
+    map version, so clients revalidate with If-None-Match → 304.
+
+Both encodings and the pyramid are built once and cached under the map
+version (18_paper_positions_version.sql), which every write that moves a
+paper bumps — a recluster or sync by any worker or script. The version
+is re-read every MAP_VERSION_TTL seconds.
+"""
+
+import json
+
+from cachetools import TTLCache
+from fastapi import APIRouter, HTTPException, Path, Query, Request, Response
+
+from utils.db import supabase, iter_rows
+from utils.scatter import BINARY_MEDIA_TYPE, MAX_ZOOM, TilePyramid, encode_scatter
 
 router = APIRouter()
 
-supabase = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-)
+# Encoded payloads and the pyramid keyed by (map version, "json" | "binary" | "pyramid")
+_scatter_cache = TTLCache(maxsize=6, ttl=600)
 
+# Rendered tiles keyed by (ETag version, z, x, y)
+_tile_cache = TTLCache(maxsize=4096, ttl=600)
 
-@router.get("/embeddings")
-def get_embeddings():
-    result = supabase.table("papers").select(
-        "pmid, cluster, umap_x, umap_y"
-    ).execute()
+TILE_CACHE_CONTROL = "public, max-age=300"
+
+# How long a read map version is trusted before asking again
+MAP_VERSION_TTL = 5  # seconds
+_map_version_cache = TTLCache(maxsize=1, ttl=MAP_VERSION_TTL)
+
+
+def invalidate_scatter_cache():
+    """Drop cached payloads, tiles and the map version (this process's own writes)."""
+    _scatter_cache.clear()
+    _tile_cache.clear()
+    _map_version_cache.clear()
+
+
+def map_version() -> int | None:
+    """Counter bumped by every write that moves a paper on the map (None if unavailable)."""
+    if "version" not in _map_version_cache:
+        try:
+            _map_version_cache["version"] = supabase.rpc("paper_positions_version", {}).execute().data
+        except Exception as e:
+            print(f"⚠️ Map version check failed (apply 18_paper_positions_version.sql?): {e}")
+            _map_version_cache["version"] = None  # caches fall back to their TTL
+    return _map_version_cache["version"]
 
-    rows = result.data or []
 
+def _fetch_points() -> list[dict]:
     return [
-        {
-            "id": r["pmid"],
-            "cluster_label": r["cluster"],
-            "x": r["umap_x"],
-            "y": r["umap_y"],
-        }
-        for r in rows
+        r for r in iter_rows("papers", "pmid, cluster, umap_x, umap_y")
         if r.get("umap_x") is not None and r.get("umap_y") is not None
     ]
+
+
+def _pyramid(version: int | None) -> TilePyramid:
+    pyramid = _scatter_cache.get((version, "pyramid"))
+    if pyramid is None:
+        pyramid = _scatter_cache[(version, "pyramid")] = TilePyramid(_fetch_points())
+    return pyramid
+
+
+def _payload(fmt: str) -> bytes:
+    # Version read before the points, so a write in between only costs a rebuild
+    version = map_version()
+    cached = _scatter_cache.get((version, fmt))
+    if cached is not None:
+        return cached
+    points = _fetch_points()
+    if fmt == "binary":
+        body = encode_scatter(points)
+    else:
+        body = json.dumps([
+            {
+                "id": r["pmid"],
+                "cluster_label": r["cluster"],
+                "x": r["umap_x"],
+                "y": r["umap_y"],
+            }
+            for r in points
+        ], separators=(",", ":")).encode()
+    _scatter_cache[(version, fmt)] = body
+    return body
+
+
+@router.get("/embeddings")
+def get_embeddings(
+    request: Request,
+    format: str | None = Query(None, description="json (default) or binary"),
+):
+    accept = request.headers.get("accept", "")
+    binary = format == "binary" or (
+        format is None and (BINARY_MEDIA_TYPE in accept or "application/octet-stream" in accept))
+    if binary:
+        return Response(_payload("binary"), media_type=BINARY_MEDIA_TYPE,
+                        headers={"Vary": "Accept"})
+    return Response(_payload("json"), media_type="application/json",
+                    headers={"Vary": "Accept"})
+
+
+# ------------------------------------------------------------
+# 🗺️ Level-of-detail tiles
+# ------------------------------------------------------------
+@router.get("/embeddings/tiles")
+def get_tile_index():
+    return _pyramid(map_version()).status()
+
+
+@router.get("/embeddings/tiles/{z}/{x}/{y}")
+def get_tile(
+    request: Request,
+    z: int = Path(..., ge=0, le=MAX_ZOOM),
+    x: int = Path(..., ge=0),
+    y: int = Path(..., ge=0),
+):
+    version = map_version()
+    # Without a map version, fall back to the pyramid's own digest
+    tag = f"m{version}" if version is not None else _pyramid(version).version
+    etag = f'"{tag}-{z}-{x}-{y}"'
+    headers = {"ETag": etag, "Cache-Control": TILE_CACHE_CONTROL}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    key = (tag, z, x, y)
+    body = _tile_cache.get(key)
+    if body is None:
+        pyramid = _pyramid(version)
+        try:
+            tile = pyramid.tile(z, x, y)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        body = _tile_cache[key] = json.dumps(tile, separators=(",", ":")).encode()
+    return Response(body, media_type="application/json", headers=headers)
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from utils.db import supabase
+from utils.indexing import index_summary
 from utils.openai_client import client
 import hashlib
 import os
@@ -108,5 +109,6 @@ Return JSON ONLY in this format:
     }
 
     inserted = supabase.table("paper_summaries").insert(row).execute()
+    index_summary(inserted.data[0] if inserted.data else row)
 
     return {"status": "done", "summary_id": inserted.data[0]["id"], **parsed}
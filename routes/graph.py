@@ -1,6 +1,12 @@
 # routes/graph.py
-from fastapi import APIRouter, Query
-from utils.db import supabase
+from fastapi import APIRouter, HTTPException, Query
+from utils.graph_db import load_graph_store
+from utils.graph_store import PAPER, MECHANISM, BIOMARKER
+
+# Node id prefixes, as used in the /graph payloads
+PREFIXES = {"paper": PAPER, "mech": MECHANISM, "bio": BIOMARKER}
+PREFIX_OF = {kind: prefix for prefix, kind in PREFIXES.items()}
+TYPE_OF = {PAPER: "paper", MECHANISM: "mechanism", BIOMARKER: "biomarker"}
 
 router = APIRouter(prefix="/graph", tags=["graph"])
 
@@ -16,15 +22,7 @@ def global_graph(limit: int = Query(200, ge=10, le=2000)):
       - paper -> mech
       - paper -> bio
     """
-    # pull the latest N summaries
-    res = (
-        supabase.table("paper_summaries")
-        .select("paper_pmid, mechanisms, biomarkers, created_at, one_sentence")
-        .order("created_at", desc=True)
-        .limit(limit)
-        .execute()
-    )
-    rows = res.data or []
+    graph = load_graph_store()
 
     nodes = {}
     links = []
@@ -41,31 +39,22 @@ def global_graph(limit: int = Query(200, ge=10, le=2000)):
         else:
             nodes[node_id]["size"] += 1
 
-    for r in rows:
-        pmid = r.get("paper_pmid")
-        if not pmid:
-            continue
+    # the latest N summaries
+    for idx in graph.recent_summaries(limit):
+        pmid = graph.names[graph.summary_paper[idx]]
         paper_id = f"paper:{pmid}"
         add_node(paper_id, pmid, "paper")
-        paper_meta[paper_id] = r.get("one_sentence") or ""
-
-        for m in (r.get("mechanisms") or []):
-            m = (m or "").strip()
-            if not m:
-                continue
-            mech_id = f"mech:{m}"
-            add_node(mech_id, m, "mechanism")
-            links.append(
-                {"source": paper_id, "target": mech_id, "type": "paper-mech"})
-
-        for b in (r.get("biomarkers") or []):
-            b = (b or "").strip()
-            if not b:
-                continue
-            bio_id = f"bio:{b}"
-            add_node(bio_id, b, "biomarker")
+        paper_meta[paper_id] = graph.summary_meta[idx]["one_sentence"]
+
+        for t in graph.summary_terms(idx):
+            name = graph.names[t]
+            if graph.kinds[t] == MECHANISM:
+                node_id, ntype, ltype = f"mech:{name}", "mechanism", "paper-mech"
+            else:
+                node_id, ntype, ltype = f"bio:{name}", "biomarker", "paper-bio"
+            add_node(node_id, name, ntype)
             links.append(
-                {"source": paper_id, "target": bio_id, "type": "paper-bio"})
+                {"source": paper_id, "target": node_id, "type": ltype})
 
     # convert to arrays + attach meta
     node_list = list(nodes.values())
@@ -81,39 +70,101 @@ def paper_graph(pmid: str):
     """
     Mini graph for a single paper: paper node + its mechanisms/biomarkers
     """
-    res = (
-        supabase.table("paper_summaries")
-        .select("mechanisms, biomarkers, one_sentence, created_at")
-        .eq("paper_pmid", pmid)
-        .order("created_at", desc=True)
-        .limit(1)
-        .execute()
-    )
-    rows = res.data or []
-    if not rows:
+    graph = load_graph_store()
+    idx = graph.latest_summary(pmid)
+    if idx is None:
         return {"nodes": [], "links": []}
 
-    r = rows[0]
     nodes = [{"id": f"paper:{pmid}", "label": pmid, "type": "paper", "size": 3,
-              "meta": {"one_sentence": r.get("one_sentence", "")}}]
+              "meta": {"one_sentence": graph.summary_meta[idx]["one_sentence"]}}]
     links = []
 
-    for m in (r.get("mechanisms") or []):
-        m = (m or "").strip()
-        if not m:
-            continue
-        nodes.append({"id": f"mech:{m}", "label": m,
-                     "type": "mechanism", "size": 1})
-        links.append({"source": f"paper:{pmid}",
-                     "target": f"mech:{m}", "type": "paper-mech"})
-
-    for b in (r.get("biomarkers") or []):
-        b = (b or "").strip()
-        if not b:
-            continue
-        nodes.append({"id": f"bio:{b}", "label": b,
-                     "type": "biomarker", "size": 1})
-        links.append({"source": f"paper:{pmid}",
-                     "target": f"bio:{b}", "type": "paper-bio"})
+    for t in graph.summary_terms(idx):
+        name = graph.names[t]
+        if graph.kinds[t] == MECHANISM:
+            nodes.append({"id": f"mech:{name}", "label": name,
+                         "type": "mechanism", "size": 1})
+            links.append({"source": f"paper:{pmid}",
+                         "target": f"mech:{name}", "type": "paper-mech"})
+        else:
+            nodes.append({"id": f"bio:{name}", "label": name,
+                         "type": "biomarker", "size": 1})
+            links.append({"source": f"paper:{pmid}",
+                         "target": f"bio:{name}", "type": "paper-bio"})
 
     return {"nodes": nodes, "links": links}
+
+
+# ------------------------------------------------------------
+# 🧭 Graph queries (k-hop neighbourhoods, shortest paths)
+# ------------------------------------------------------------
+def _resolve(graph, node: str) -> int:
+    prefix, _, name = node.partition(":")
+    if prefix not in PREFIXES or not name:
+        raise HTTPException(
+            400, f"Node ids look like paper:<pmid>, mech:<name> or bio:<name> (got {node!r}).")
+    nid = graph.find(PREFIXES[prefix], name)
+    if nid is None:
+        raise HTTPException(404, f"Unknown node {node!r}.")
+    return nid
+
+
+def _node_json(graph, nid: int, **extra):
+    kind = graph.kinds[nid]
+    name = graph.names[nid]
+    return {"id": f"{PREFIX_OF[kind]}:{name}", "label": name, "type": TYPE_OF[kind],
+            "size": graph.mentions[nid], "degree": graph.degree(nid), **extra}
+
+
+def _link_json(graph, a: int, b: int, weight: int):
+    # paper first, then mechanism, then biomarker (matches the /graph link types)
+    a, b = sorted((a, b), key=lambda n: graph.kinds[n])
+    ltype = f"{PREFIX_OF[graph.kinds[a]]}-{PREFIX_OF[graph.kinds[b]]}"
+    return {"source": f"{PREFIX_OF[graph.kinds[a]]}:{graph.names[a]}",
+            "target": f"{PREFIX_OF[graph.kinds[b]]}:{graph.names[b]}",
+            "type": ltype, "weight": weight}
+
+
+@router.get("/neighbors/{node:path}")
+def neighbors(
+    node: str,
+    hops: int = Query(1, ge=1, le=4),
+    max_degree: int = Query(25, ge=1, le=500,
+                            description="Heaviest edges followed per node"),
+    limit: int = Query(300, ge=1, le=5000, description="Max nodes returned"),
+):
+    """k-hop neighbourhood of one node (e.g. mech:immune), degree-limited."""
+    graph = load_graph_store()
+    start = _resolve(graph, node)
+    dist, links, truncated = graph.neighborhood(start, hops, max_degree, limit)
+    return {
+        "center": _node_json(graph, start)["id"],
+        "nodes": [_node_json(graph, n, distance=d) for n, d in dist.items()],
+        "links": [_link_json(graph, a, b, w) for (a, b), w in links.items()],
+        "truncated": truncated,
+    }
+
+
+@router.get("/path")
+def shortest_path(
+    source: str = Query(..., description="e.g. mech:immune"),
+    target: str = Query(..., description="e.g. bio:IL-6"),
+):
+    """Fewest-hop path between two nodes (bidirectional BFS)."""
+    graph = load_graph_store()
+    a, b = _resolve(graph, source), _resolve(graph, target)
+    path = graph.shortest_path(a, b)
+    if path is None:
+        raise HTTPException(404, f"No path between {source!r} and {target!r}.")
+    offsets, targets, weights = graph.adjacency()
+
+    def weight(u, v):
+        lo, hi = offsets[u], offsets[u + 1]
+        hit = (targets[lo:hi] == v).nonzero()[0]
+        return int(weights[lo + hit[0]]) if len(hit) else 0
+
+    return {
+        "length": len(path) - 1,
+        "nodes": [_node_json(graph, n) for n in path],
+        "links": [_link_json(graph, u, v, weight(u, v)) for u, v in zip(path, path[1:])],
+    }
@@ -1,36 +1,19 @@
 # routes/graph_global.py
 from fastapi import APIRouter
-from utils.db import supabase
+from utils.graph_db import load_graph_store
+from utils.graph_store import MECHANISM
+from utils.mechanisms_ontology import MECH_GROUPS, mechanism_classifier
 
 router = APIRouter(prefix="/graph", tags=["graph"])
 
-# Core ME/CFS mechanism families
-MECH_GROUPS = {
-    "immune": ["immune", "inflammation", "cytokine", "t-cell", "autoimmune"],
-    "mitochondrial": ["mito", "oxidative", "redox", "energy", "metabolic"],
-    "vascular": ["endothelial", "vascular", "microclot", "blood flow"],
-    "autonomic": ["dysautonomia", "pots", "autonomic", "orthostatic"],
-    "neuroinflammation": ["neuro", "brain", "microglia", "neuroinflammation"],
-    "viral": ["viral", "persistent", "post-viral", "ebv", "hhv6"],
-}
-
 
 def categorize_mech(mech: str):
-    mech_l = mech.lower()
-    for group, keywords in MECH_GROUPS.items():
-        if any(k in mech_l for k in keywords):
-            return group
-    return "other"
+    return mechanism_classifier.group(mech, "hub", default="other")
 
 
 @router.get("/global")
 def global_graph(limit: int = 300):
-    res = (
-        supabase.table("paper_summaries")
-        .select("paper_pmid, mechanisms, one_sentence, confidence")
-        .limit(limit)
-        .execute()
-    )
+    graph = load_graph_store()
 
     nodes = []
     links = []
@@ -48,21 +31,30 @@ def global_graph(limit: int = 300):
 
     awaiting = []  # orphan papers (no mechanism)
 
-    for row in res.data or []:
-        pmid = row.get("paper_pmid")
-        mechs = row.get("mechanisms") or []
-        sentence = row.get("one_sentence", "")
-        confidence = row.get("confidence", None)
+    rows = []
+    for idx in graph.recent_summaries(limit):
+        mechs = [t for t in graph.summary_terms(idx) if graph.kinds[t] == MECHANISM]
+        rows.append((idx, mechs))
+
+    # one automaton pass over every distinct mechanism in the window
+    distinct = list({t for _, mechs in rows for t in mechs})
+    groups = {
+        t: c["hub"] or "other"
+        for t, c in zip(distinct, mechanism_classifier.classify_many(
+            [graph.names[t] for t in distinct]))
+    }
 
-        if not pmid:
-            continue
+    for idx, mechs in rows:
+        pmid = graph.names[graph.summary_paper[idx]]
+        meta = graph.summary_meta[idx]
+        sentence = meta["one_sentence"]
 
         if pmid not in seen:
             nodes.append({
                 "id": pmid,
                 "label": pmid,
                 "title": sentence[:90] + "…" if sentence else "",
-                "confidence": confidence,
+                "confidence": meta["confidence"],
                 "type": "paper"
             })
             seen.add(pmid)
@@ -72,12 +64,7 @@ def global_graph(limit: int = 300):
             continue
 
         for mech in mechs:
-            mech = mech.strip()
-            if not mech:
-                continue
-
-            group = categorize_mech(mech)
-            hub_id = f"hub:{group}"
+            hub_id = f"hub:{groups[mech]}"
 
             links.append({
                 "source": pmid,
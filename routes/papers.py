@@ -1,13 +1,20 @@
 # routes/papers.py
 from fastapi import APIRouter, HTTPException, Query, Depends
 from sqlalchemy.orm import Session
-from sqlalchemy import String  # ✅ needed for keyword cast search
+from sqlalchemy import func, or_, and_
 from database import SessionLocal
 from models import Paper
+from utils.search_db import load_search_index, load_suggest_index
+from utils.search_index import search_index
+from utils.suggest import suggest_index, TOP_K
+from utils.pagination import SORTABLE, encode_cursor, decode_cursor
 from typing import Optional
 
 router = APIRouter(prefix="/papers", tags=["papers"])
 
+# Postgres text-search config used by papers.search_vector
+TS_CONFIG = "english"
+
 # Dependency: open a DB session per request
 
 
@@ -18,6 +25,26 @@ def get_db():
     finally:
         db.close()
 
+
+def _tsquery(q: str):
+    """Google-style query ("quoted phrases", -exclusions, or) → tsquery"""
+    return func.websearch_to_tsquery(TS_CONFIG, q)
+
+
+def _serialize(paper: Paper, score=None) -> dict:
+    row = {
+        "pmid": paper.pmid,
+        "title": paper.title,
+        "authors": paper.authors,
+        "year": paper.year,
+        "journal": paper.journal,
+        "keywords": paper.keywords,
+        "abstract": paper.abstract,
+    }
+    if score is not None:
+        row["score"] = round(float(score), 4)
+    return row
+
 # 🧠 List Papers (filters, pagination, sorting)
 
 
@@ -26,8 +53,11 @@ def list_papers(
     db: Session = Depends(get_db),
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
-    sort: str = Query("year", description="Sort by pmid, title, or year"),
+    sort: str = Query(
+        "year", description="Sort by pmid, title, year, or relevance (with q)"),
     order: str = Query("desc", description="asc or desc"),
+    q: Optional[str] = Query(
+        None, description="Full-text filter (websearch syntax)"),
     author: Optional[str] = Query(
         None, description="Filter by author substring"),
     year: Optional[int] = Query(
@@ -36,10 +66,15 @@ def list_papers(
     keyword: Optional[str] = Query(None, description="Filter by keyword"),
     cluster: Optional[int] = Query(
         None, description="Filter by cluster label"),  # ✅ NEW
+    cursor: Optional[str] = Query(
+        None, description="next_cursor from the previous page (keyset mode; ignores page)"),
 ):
     query = db.query(Paper)
+    desc = order.lower() == "desc"
 
-    # Filters
+    # Filters (GIN: search_vector, keywords · pg_trgm: authors_text, journal)
+    if q and q.strip():
+        query = query.filter(Paper.search_vector.op("@@")(_tsquery(q)))
     if author:
         query = query.filter(Paper.authors_text.ilike(f"%{author}%"))
     if year:
@@ -47,22 +82,76 @@ def list_papers(
     if journal:
         query = query.filter(Paper.journal.ilike(f"%{journal}%"))
     if keyword:
-        query = query.filter(Paper.keywords.any(
-            keyword))  # ✅ Postgres array lookup
+        query = query.filter(Paper.keywords.contains(
+            [keyword]))  # ✅ keywords @> array[...] (GIN-indexed)
     if cluster is not None:
         query = query.filter(Paper.cluster_label ==
                              cluster)  # ✅ cluster support
 
     # Sorting
-    sort_field = getattr(Paper, sort, Paper.year)
-    query = query.order_by(
-        sort_field.desc() if order.lower() == "desc" else sort_field.asc()
-    )
+    if sort == "relevance" and q and q.strip():
+        query = query.order_by(
+            func.ts_rank_cd(Paper.search_vector, _tsquery(q)).desc(), Paper.pmid)
+        results = query.offset((page - 1) * limit).limit(limit).all()
+        return {
+            "results": [_serialize(p) for p in results],
+            "count": len(results),
+            "limit": limit,
+            "page": page,
+            "next_cursor": None,
+        }
+
+    # Keyset order (sort key, pmid): NULLs last desc / first asc,
+    # matching the composite indexes in 08_papers_keyset_indexes.sql
+    sort_key = sort if sort in SORTABLE else "year"
+    order_name = "desc" if desc else "asc"
+    sort_field = getattr(Paper, sort_key)
+
+    if cursor:
+        try:
+            value, pmid = decode_cursor(cursor, sort_key, order_name)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        after_pmid = Paper.pmid < pmid if desc else Paper.pmid > pmid
+        if sort_key == "pmid":
+            query = query.filter(after_pmid)
+        elif value is None:
+            branch = and_(sort_field.is_(None), after_pmid)
+            query = query.filter(
+                branch if desc else or_(branch, sort_field.isnot(None)))
+        elif desc:
+            query = query.filter(or_(
+                sort_field < value,
+                and_(sort_field == value, after_pmid),
+                sort_field.is_(None),
+            ))
+        else:
+            query = query.filter(or_(
+                sort_field > value,
+                and_(sort_field == value, after_pmid),
+            ))
+
+    if desc:
+        query = query.order_by(sort_field.desc().nulls_last(), Paper.pmid.desc())
+    else:
+        query = query.order_by(sort_field.asc().nulls_first(), Paper.pmid.asc())
+
+    if not cursor:
+        query = query.offset((page - 1) * limit)
+    results = query.limit(limit).all()
+    rows = [_serialize(p) for p in results]
 
-    results = query.offset((page - 1) * limit).limit(limit).all()
-    return results
+    return {
+        "results": rows,
+        "count": len(rows),
+        "limit": limit,
+        "page": None if cursor else page,
+        "next_cursor": encode_cursor(sort_key, order_name, rows[-1]) if len(rows) == limit else None,
+    }
 
 # 🔍 Search Endpoint
+#   backend=postgres → tsvector/GIN + ts_rank_cd (default)
+#   backend=index    → BM25F over the in-process index
 
 
 @router.get("/search")
@@ -70,21 +159,56 @@ def search_papers(
     q: str = Query(..., description="Full-text search"),
     db: Session = Depends(get_db),
     limit: int = Query(20, ge=1, le=100),
+    author: Optional[str] = Query(None, description="Filter by author"),
+    year: Optional[int] = Query(None, description="Filter by publication year"),
+    backend: str = Query("postgres", description="postgres or index"),
+):
+    if not q.strip():
+        return {"message": "Empty query.", "query": q, "count": 0, "results": []}
+
+    if backend == "index":
+        load_search_index()
+        ranked = search_index.ranked(q, k=limit, author=author, year=year)
+        results = [
+            {
+                "pmid": p.get("pmid"),
+                "title": p.get("title"),
+                "authors": p.get("authors"),
+                "year": p.get("year"),
+                "journal": p.get("journal"),
+                "keywords": p.get("keywords"),
+                "abstract": p.get("abstract"),
+                "score": score,
+            }
+            for score, p in ranked
+        ]
+        return {"query": q, "backend": backend, "count": len(results), "results": results}
+
+    tsq = _tsquery(q)
+    rank = func.ts_rank_cd(Paper.search_vector, tsq)
+    query = db.query(Paper, rank.label("score")).filter(
+        Paper.search_vector.op("@@")(tsq))
+    if author:
+        query = query.filter(Paper.authors_text.ilike(f"%{author}%"))
+    if year:
+        query = query.filter(Paper.year == year)
+
+    rows = query.order_by(rank.desc(), Paper.pmid).limit(limit).all()
+    results = [_serialize(paper, score) for paper, score in rows]
+    return {"query": q, "backend": "postgres", "count": len(results), "results": results}
+
+# 🔤 Autocomplete (in-memory radix trie, no DB on the keystroke path)
+
+
+@router.get("/suggest")
+def suggest(
+    q: str = Query("", description="Prefix typed so far"),
+    limit: int = Query(5, ge=1, le=TOP_K),
 ):
-    search = f"%{q.lower()}%"
-    results = (
-        db.query(Paper)
-        .filter(
-            (Paper.title.ilike(search))
-            | (Paper.abstract.ilike(search))
-            | (Paper.authors_text.ilike(search))
-            | (Paper.journal.ilike(search))
-            | (Paper.keywords.cast(String).ilike(search))  # ✅ keyword search
-        )
-        .limit(limit)
-        .all()
-    )
-    return results
+    if not q.strip():
+        return {"query": q, "suggestions": []}
+    load_suggest_index()
+    return {"query": q, "suggestions": suggest_index.suggest(q, limit)}
 
 # 📄 Single Paper by PMID
 
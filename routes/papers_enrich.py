@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from utils.db import supabase
+from utils.indexing import index_summary
 from utils.openai_client import client  # your wrapper
 import json
 
@@ -67,12 +68,13 @@ Return JSON only.
     except:
         raise HTTPException(500, "Model returned invalid JSON")
 
-    supabase.table("paper_summaries").upsert({
+    saved = supabase.table("paper_summaries").upsert({
         "paper_pmid": pmid,
         "one_sentence": out.get("one_sentence"),
         "mechanisms": out.get("mechanisms"),
         "biomarkers": out.get("biomarkers"),
         "confidence": out.get("confidence"),
     }).execute()
+    index_summary(saved.data[0] if saved.data else {"paper_pmid": pmid, **out})
 
     return {"pmid": pmid, "result": out, "status": "saved"}
@@ -12,12 +12,14 @@ Purpose:
 Flow:
     Supabase `papers` (sync first) -> /papers/mechanisms/{pmid}
       -> GPT-5 hybrid extraction -> upsert `paper_mechanisms`
+      -> mechanism/biomarker names -> node ids -> `mechanism_edges` (source "mechanisms")
 
 One row per (pmid, provider, model).
 """
 
 from fastapi import APIRouter, HTTPException
 from utils.db import supabase
+from utils.graph_db import paper_graph_edges, replace_mechanism_edges
 from utils.openai import client
 import json
 
@@ -125,6 +127,10 @@ def extract_mechanisms(pmid: str):
         raise HTTPException(
             status_code=500, detail="Failed to store mechanisms.")
 
+    # 5) Replace this paper's extracted edges in the normalized graph
+    replace_mechanism_edges(
+        {pmid: paper_graph_edges(pmid, mechanisms, biomarkers)}, source="mechanisms")
+
     return {
         "pmid": pmid,
         "categories": categories,
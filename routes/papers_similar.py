@@ -0,0 +1,43 @@
+# routes/papers_similar.py
+"""
+Open ME/CFS — More Like This
+------------------------------------------------------------
+GET /papers/{pmid}/similar → nearest papers by the stored embedding.
+
+No OpenAI call: the paper's own vector is the query. Answers come from
+(in order) the per-pmid cache, the precomputed neighbour lists
+(python -m utils.neighbors) or a live query: the ANN index once the
+startup warm-up has loaded it, else a scan of the mmap store, else the
+match_papers RPC. Requests never build the ANN index. Cached and precomputed
+lists are keyed by a digest of the vector, so they are ignored as soon
+as the paper's embedding changes.
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+from utils.vector_db import similar_papers
+from utils.search_db import hydrate_hits
+
+router = APIRouter(prefix="/papers", tags=["papers"])
+
+
+@router.get("/{pmid}/similar")
+def get_similar_papers(
+    pmid: str,
+    limit: int = Query(10, ge=1, le=50),
+):
+    try:
+        found = similar_papers(pmid, limit)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Similar papers lookup failed: {e}")
+    if found is None:
+        raise HTTPException(
+            status_code=404, detail="Paper not found or has no embedding yet.")
+
+    hits, source = found
+    return {
+        "pmid": pmid,
+        "source": source,
+        "count": len(hits),
+        "results": hydrate_hits(hits),
+    }
@@ -2,6 +2,8 @@
 
 from fastapi import APIRouter, HTTPException
 from utils.db import supabase
+from utils.indexing import index_summary
+from utils.graph_db import paper_graph_edges, replace_paper_graph
 from utils.openai_client import client
 import hashlib
 import datetime
@@ -77,21 +79,8 @@ def clean_list(items):
 
 
 def store_graph(pmid: str, mechs: list, biomarkers: list):
-    """Store paper → mechanism → biomarker edges"""
-    for m in mechs:
-        supabase.table("paper_graph").insert({
-            "paper_pmid": pmid,
-            "mechanism": m,
-            "edge_type": "paper→mechanism",
-        }).execute()
-
-        for b in biomarkers:
-            supabase.table("paper_graph").insert({
-                "paper_pmid": pmid,
-                "mechanism": m,
-                "biomarker": b,
-                "edge_type": "mechanism→biomarker",
-            }).execute()
+    """Replace the paper's paper → mechanism → biomarker edges (one round trip)"""
+    replace_paper_graph({pmid: paper_graph_edges(pmid, mechs, biomarkers)})
 
 # ✅ Add this GET endpoint (for frontend to retrieve existing summaries)
 
@@ -157,7 +146,7 @@ async def summarize_paper(pmid: str):
     biomarkers = clean_list(ai.get("biomarkers"))
 
     # ✅ store summary
-    supabase.table("paper_summaries").insert({
+    saved = supabase.table("paper_summaries").insert({
         "paper_pmid": pmid,
         "provider": "openai",
         "model": "gpt-5",
@@ -177,6 +166,8 @@ async def summarize_paper(pmid: str):
 
     # ✅ FIX: no await
     store_graph(pmid, mechs, biomarkers)
+    index_summary(saved.data[0] if saved.data else {
+        "paper_pmid": pmid, "mechanisms": mechs, "biomarkers": biomarkers})
 
     return {
         "status": "done",
@@ -1,8 +1,12 @@
 # openmecfs-platform/routes/papers_supabase.py
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional
-from utils.db import supabase
+from utils.db import supabase, get_topic_names
+from utils.indexing import index_paper
+from utils.cluster_db import place_paper
+from routes.embeddings import invalidate_scatter_cache
 from utils.europepmc import fetch_paper_by_pmid
+from utils.pagination import SORTABLE, encode_cursor, decode_cursor, postgrest_keyset
 import datetime
 
 router = APIRouter(tags=["Papers (Supabase)"])
@@ -14,42 +18,47 @@ router = APIRouter(tags=["Papers (Supabase)"])
 @router.get("/")
 def get_papers(
     sort: Optional[str] = Query("year"),
+    order: str = Query("desc", description="asc or desc"),
     limit: int = Query(10, ge=1, le=200),
     page: int = Query(1, ge=1),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor from the previous page (keyset mode; ignores page)"),
     topic: Optional[str] = None,
     q: Optional[str] = None,
     year: Optional[int] = None,
     cluster: Optional[int] = None,
     cluster_label: Optional[int] = None,
 ):
-    try:
-        offset = (page - 1) * limit
-
-        query = (
-            supabase
-            .table("papers")
-            .select("*")
-            .range(offset, offset + limit - 1)
-        )
-
-        if q:
-            query = query.or_(f"title.ilike.%{q}%,abstract.ilike.%{q}%")
+    sort_key = sort if sort in SORTABLE else "year"
+    desc = order.lower() != "asc"
+    order_name = "desc" if desc else "asc"
 
-        topic_map = {
-            "treat": ["treat", "therapy", "trial", "drug", "intervention"],
-            "neuro": ["neuro", "brain", "cogn", "nervous"],
-            "immun": ["immune", "inflamm", "cytokine", "t cell", "antibody"],
-            "long covid": ["long covid", "covid", "post-viral", "sars"],
-        }
+    try:
+        keyset = decode_cursor(
+            cursor, sort_key, order_name) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
+    try:
+        query = supabase.table("papers").select("*")
+
+        # `or=` body for q; a request can carry only one `or=`
+        q_conditions = f"title.ilike.%{q}%,abstract.ilike.%{q}%" if q else None
+        if keyset:
+            # keyset mode: WHERE (sort, pmid) after cursor — flat cost at any depth
+            query = query.or_(postgrest_keyset(
+                sort_key, desc, *keyset,
+                within=f"or({q_conditions})" if q_conditions else None))
+        elif q_conditions:
+            query = query.or_(q_conditions)
+
+        # Topics are materialized into papers.topics at ingest (GIN-indexed);
+        # the dictionary lives in the topic_definitions table.
         if topic:
             topic = topic.lower().replace("-", " ")
-            if topic in topic_map:
-                filters = []
-                for term in topic_map[topic]:
-                    filters += [f"title.ilike.%{term}%",
-                                f"abstract.ilike.%{term}%"]
-                query = query.or_(",".join(filters))
+            known = get_topic_names()
+            if not known or topic in known:
+                query = query.contains("topics", [topic])
 
         if year:
             query = query.eq("year", year)
@@ -58,14 +67,27 @@ def get_papers(
         if cluster_id is not None:
             query = query.eq("cluster", cluster_id)
 
+        # Stable total order (sort key, pmid) — matches 08_papers_keyset_indexes
+        query = query.order(sort_key, desc=desc, nullsfirst=not desc)
+        if sort_key != "pmid":
+            query = query.order("pmid", desc=desc)
+
+        if keyset:
+            query = query.limit(limit)
+        else:
+            offset = (page - 1) * limit
+            query = query.range(offset, offset + limit - 1)
+
         result = query.execute()
         data = result.data or []
 
+        has_more = len(data) == limit
         return {
             "data": data,
-            "page": page,
+            "page": None if keyset else page,
             "count": len(data),
-            "has_more": len(data) == limit,
+            "has_more": has_more,
+            "next_cursor": encode_cursor(sort_key, order_name, data[-1]) if has_more else None,
         }
 
     except Exception as e:
@@ -116,4 +138,17 @@ def sync_paper(pmid: str):
             status_code=500, detail="Failed to read back paper after upsert"
         )
 
+    # 5️⃣ Keep the in-process search index current
+    index_paper(db_paper.data)
+
+    # 6️⃣ Map position + cluster from the fitted model (no refit)
+    try:
+        placed = place_paper(db_paper.data)
+    except Exception as e:
+        print(f"⚠️ Cluster assignment failed for {pmid}: {e}")
+        placed = None
+    if placed:
+        invalidate_scatter_cache()
+        return {**db_paper.data, **placed}
+
     return db_paper.data
@@ -1,6 +1,9 @@
 from fastapi import APIRouter, HTTPException
 from utils.db import supabase
+from utils.indexing import index_paper
+from utils.cluster_db import place_paper
 from utils.europepmc import fetch_paper_by_pmid
+from routes.embeddings import invalidate_scatter_cache
 import asyncio
 
 router = APIRouter(prefix="/papers", tags=["Papers"])
@@ -73,5 +76,19 @@ async def sync_paper(pmid: str):
             status_code=500, detail="Upsert failed: no data returned"
         )
 
+    paper = res.data[0]
+    index_paper(paper)
+
+    # 4️⃣ Map position + cluster from the fitted model (no refit)
+    try:
+        placed = await asyncio.to_thread(place_paper, paper)
+    except Exception as e:
+        print(f"[SYNC WARNING] Cluster assignment failed: {e}")
+        placed = None
+    if placed:
+        paper = {**paper, **placed}
+        invalidate_scatter_cache()
+        print(f"[SYNC] Placed {pmid} in cluster {placed['cluster']}")
+
     print(f"[SYNC] ✅ Saved paper {pmid}")
-    return res.data[0]
+    return paper
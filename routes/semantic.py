@@ -1,47 +1,201 @@
 # routes/semantic.py
 from fastapi import APIRouter, HTTPException, Query
 from utils.db import supabase
+from utils.search_db import load_search_index, hydrate_hits
+from utils.vector_db import load_ann_index, load_vector_store
+from utils.search_index import search_index
+from utils.rank_fusion import reciprocal_rank_fusion, RRF_K
+from utils.embedding_cache import query_embedding_cache
+from utils.ann_index import ann_index, DEFAULT_NPROBE
+from utils.vector_store import vector_store
 from openai import OpenAI
+from typing import Optional
+import asyncio
 import os
+import time
 
 router = APIRouter(prefix="/semantic", tags=["semantic"])
 
 _MODEL = "text-embedding-3-small"
 
 
+_client = None
+
+
 def get_openai_client():
-    """Return a configured OpenAI client or None if key missing."""
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        print("⚠️ Warning: OPENAI_API_KEY not set. Semantic routes disabled.")
-        return None
-    return OpenAI(api_key=api_key)
+    """Return the shared OpenAI client (keeps its HTTP pool) or None if key missing."""
+    global _client
+    if _client is None:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            print("⚠️ Warning: OPENAI_API_KEY not set. Semantic routes disabled.")
+            return None
+        _client = OpenAI(api_key=api_key)
+    return _client
+
+
+def embed_query(_client, q: str) -> list[float]:
+    """Query embedding via the memory/SQLite cache; the API is only called on a miss"""
+    return query_embedding_cache.get_or_embed(
+        q, _MODEL,
+        lambda text: _client.embeddings.create(
+            input=text, model=_MODEL).data[0].embedding,
+    )
+
+
+def _ann_search(embedding, limit: int, nprobe: int = DEFAULT_NPROBE, year=None, cluster=None):
+    """Top matches from the in-process IVF index, hydrated from the search index"""
+    if not load_ann_index(build=False).loaded:
+        raise RuntimeError(
+            "ANN index is still being built at startup; use backend=rpc or store.")
+    hits = ann_index.search(embedding, k=limit, nprobe=nprobe,
+                            year=year, cluster=cluster)
+    return hydrate_hits(hits)
+
+
+def _store_search(embedding, limit: int):
+    """Exact scan of the quantized mmap store, top candidates re-scored in float32"""
+    if not load_vector_store().loaded:
+        raise RuntimeError(
+            "Vector store not exported (python -m utils.vector_store).")
+    return hydrate_hits(vector_store.search(embedding, k=limit))
+
+
+def _vector_search(_client, q: str, limit: int, backend: str = "rpc", **filters):
+    """Embed the query, then match_papers RPC (rpc), the ANN index (ann) or the mmap store (store)"""
+    embedding = embed_query(_client, q)
+    if backend == "ann":
+        return _ann_search(embedding, limit, **filters)
+    if backend == "store":
+        return _store_search(embedding, limit)
+    res = supabase.rpc(
+        "match_papers", {
+            "query_embedding": embedding, "match_count": limit}
+    ).execute()
+    return res.data or []
+
+
+def _check_backend(backend: str, year, cluster):
+    if backend not in ("rpc", "ann", "store"):
+        raise HTTPException(
+            status_code=400, detail="backend must be 'rpc', 'ann' or 'store'.")
+    if backend != "ann" and (year is not None or cluster is not None):
+        raise HTTPException(
+            status_code=400, detail="year/cluster filters require backend=ann.")
 
 
 @router.get("/")
 def semantic_search(
     q: str = Query(..., description="Semantic search query"),
     limit: int = Query(5, ge=1, le=50),
+    backend: str = Query(
+        "rpc", description="rpc (Supabase match_papers), ann (in-process IVF index) or store (quantized mmap scan)"),
+    nprobe: int = Query(DEFAULT_NPROBE, ge=1, le=256,
+                        description="ANN lists scanned (higher = better recall)"),
+    year: Optional[int] = Query(None, description="ANN pre-filter: publication year"),
+    cluster: Optional[int] = Query(None, description="ANN pre-filter: cluster label"),
 ):
-    """Semantic similarity search using OpenAI embeddings + Supabase RPC"""
+    """Semantic similarity search using OpenAI embeddings + Supabase RPC or local ANN"""
+    _check_backend(backend, year, cluster)
 
     _client = get_openai_client()
     if not _client:
         return {"message": "Semantic search unavailable in this environment."}
 
     try:
-        embedding = _client.embeddings.create(
-            input=q, model=_MODEL).data[0].embedding
-        res = supabase.rpc(
-            "match_papers", {
-                "query_embedding": embedding, "match_count": limit}
-        ).execute()
-
+        filters = {"nprobe": nprobe, "year": year,
+                   "cluster": cluster} if backend == "ann" else {}
+        results = _vector_search(_client, q, limit, backend, **filters)
         return {
             "query": q,
-            "count": len(res.data or []),
-            "results": res.data or [],
+            "backend": backend,
+            "count": len(results),
+            "results": results,
         }
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# ------------------------------------------------------------
+# 🔀 Hybrid: BM25 (in-process) + vector (match_papers), fused with RRF
+# ------------------------------------------------------------
+async def _timed(fn, *args):
+    """Run a blocking retriever in a worker thread → (results, ms, error)"""
+    t0 = time.perf_counter()
+    try:
+        results, error = await asyncio.to_thread(fn, *args), None
+    except Exception as e:
+        results, error = [], str(e)
+    return results, round((time.perf_counter() - t0) * 1000, 2), error
+
+
+def _lexical_search(q: str, depth: int):
+    load_search_index()
+    return [{**p, "score": s} for s, p in search_index.ranked(q, k=depth)]
+
+
+@router.get("/hybrid")
+async def hybrid_search(
+    q: str = Query(..., description="Search query"),
+    limit: int = Query(5, ge=1, le=50),
+    lexical_weight: float = Query(1.0, ge=0, description="RRF weight for BM25"),
+    vector_weight: float = Query(1.0, ge=0, description="RRF weight for embeddings"),
+    rrf_k: int = Query(RRF_K, ge=1, le=1000, description="RRF rank damping"),
+    depth: int = Query(50, ge=1, le=200, description="Candidates per retriever"),
+    vector_backend: str = Query("rpc", description="rpc, ann or store"),
+):
+    """
+    Lexical and vector retrievers run concurrently (latency ≈ the slower
+    of the two), then their rankings are merged with reciprocal rank fusion.
+    If one retriever fails the other's ranking is still returned.
+    """
+    _check_backend(vector_backend, None, None)
+    t0 = time.perf_counter()
+    _client = get_openai_client()
+
+    lexical_task = _timed(_lexical_search, q, depth)
+    if _client:
+        vector_task = _timed(_vector_search, _client, q, depth, vector_backend)
+    else:
+        vector_task = asyncio.sleep(
+            0, result=([], 0.0, "OPENAI_API_KEY not set"))
+
+    (lexical, lexical_ms, lexical_err), (vector, vector_ms, vector_err) = \
+        await asyncio.gather(lexical_task, vector_task)
+
+    if lexical_err and vector_err:
+        raise HTTPException(
+            status_code=500, detail=f"lexical: {lexical_err}; vector: {vector_err}")
+
+    docs = {}
+    for row in vector + lexical:
+        pmid = row.get("pmid")
+        if pmid:
+            docs.setdefault(str(pmid), {}).update(row)
+
+    fused = reciprocal_rank_fusion(
+        {
+            "lexical": [str(r["pmid"]) for r in lexical if r.get("pmid")],
+            "vector": [str(r["pmid"]) for r in vector if r.get("pmid")],
+        },
+        weights={"lexical": lexical_weight, "vector": vector_weight},
+        k=rrf_k,
+    )[:limit]
+
+    results = []
+    for pmid, score, ranks in fused:
+        doc = {k: v for k, v in docs[pmid].items() if k != "score"}
+        results.append({**doc, "rrf_score": round(score, 6), "ranks": ranks})
+
+    return {
+        "query": q,
+        "count": len(results),
+        "results": results,
+        "timings_ms": {
+            "lexical": lexical_ms,
+            "vector": vector_ms,
+            "total": round((time.perf_counter() - t0) * 1000, 2),
+        },
+        "errors": {k: v for k, v in (("lexical", lexical_err), ("vector", vector_err)) if v},
+    }
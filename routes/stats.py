@@ -1,7 +1,6 @@
 # routes/stats.py
 from fastapi import APIRouter
-from utils.db import get_stats
-from functools import lru_cache
+from utils.stats_db import get_stats
 from datetime import datetime
 
 router = APIRouter(prefix="/stats", tags=["stats"])
@@ -13,7 +12,7 @@ router = APIRouter(prefix="/stats", tags=["stats"])
 
 @router.get("/")
 def stats():
-    """Return live statistics for ME/CFS dataset (fetched fresh from Supabase)"""
+    """Return live statistics for ME/CFS dataset (kept current as papers and summaries are written)"""
     data = get_stats()
     return {
         **data,
@@ -22,16 +21,10 @@ def stats():
     }
 
 
-@lru_cache(maxsize=1)
-def _cached_stats_internal():
-    """Internal cached helper — stores results in memory"""
-    return get_stats()
-
-
 @router.get("/cached")
 def cached_stats():
-    """Return cached statistics for faster UI rendering"""
-    data = _cached_stats_internal()
+    """Return cached statistics for faster UI rendering (same counters as /stats)"""
+    data = get_stats()
     return {
         **data,
         "source": "cached",
@@ -1,7 +1,8 @@
 # routes/stats_biomarkers.py
-from fastapi import APIRouter
-from utils.db import supabase
-from collections import Counter
+from fastapi import APIRouter, HTTPException, Query
+from utils.graph_db import load_cooccurrence
+from utils.stats_db import top_biomarkers
+from utils.cooccurrence import MATRICES, SCORES
 
 router = APIRouter(prefix="/stats", tags=["stats"])
 
@@ -11,20 +12,45 @@ def biomarker_counts(limit: int = 20):
     """
     Returns most frequently appearing biomarkers from structured AI evidence.
     """
-    res = (
-        supabase.table("paper_summaries")
-        .select("biomarkers")
-        .not_.is_("biomarkers", None)
-        .execute()
-    )
+    try:
+        return top_biomarkers(limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-    all_biomarkers = []
-    for row in res.data or []:
-        for b in (row.get("biomarkers") or []):
-            b = b.strip()
-            if b:
-                all_biomarkers.append(b)
 
-    counts = Counter(all_biomarkers).most_common(limit)
+@router.get("/cooccurrence")
+def cooccurrence_top(
+    matrix: str = Query("mechanism_biomarker", description=", ".join(MATRICES)),
+    term: str = Query(..., description="Row term, e.g. a mechanism name"),
+    k: int = Query(10, ge=1, le=200),
+    score: str = Query("count", description=", ".join(SCORES)),
+    min_count: int = Query(1, ge=1),
+    transpose: bool = Query(False, description="Look the term up as a column instead"),
+):
+    """Top-k co-occurring terms for one term, ranked by count, PMI or lift."""
+    if matrix not in MATRICES:
+        raise HTTPException(400, f"matrix must be one of {list(MATRICES)}")
+    if score not in SCORES:
+        raise HTTPException(400, f"score must be one of {list(SCORES)}")
+    engine = load_cooccurrence()
+    row_axis = MATRICES[matrix][1 if transpose else 0]
+    return {
+        "matrix": matrix,
+        "term": term,
+        "axis": row_axis,
+        "count": engine.count(row_axis, term),
+        "summaries": engine.total,
+        "results": engine.top(matrix, term, k, score, min_count, transpose),
+    }
 
-    return [{"biomarker": b, "count": c} for b, c in counts]
+
+@router.get("/cooccurrence/pair")
+def cooccurrence_pair(
+    a: str,
+    b: str,
+    matrix: str = Query("mechanism_biomarker", description=", ".join(MATRICES)),
+):
+    """Joint count, PMI and lift for one pair."""
+    if matrix not in MATRICES:
+        raise HTTPException(400, f"matrix must be one of {list(MATRICES)}")
+    return {"matrix": matrix, "a": a, "b": b, **load_cooccurrence().scores(matrix, a, b)}
@@ -0,0 +1,45 @@
+-- ==========================================
+-- 06_papers_fulltext.sql
+-- Weighted full-text search + trigram filters on papers
+-- ==========================================
+
+create extension if not exists pg_trgm;
+
+-- array_to_string() is only STABLE, so it cannot feed a generated column.
+-- Joining text[] with a fixed separator is immutable in practice.
+create or replace function public.immutable_array_to_string(arr text[], sep text)
+returns text
+language sql
+immutable
+parallel safe
+as $$ select coalesce(array_to_string(arr, sep), '') $$;
+
+-- Weighted document: title (A) > keywords (B) > abstract (C) > authors, journal (D)
+alter table public.papers
+  add column if not exists search_vector tsvector
+  generated always as (
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', public.immutable_array_to_string(keywords, ' ')), 'B') ||
+    setweight(to_tsvector('english', coalesce(abstract, '')), 'C') ||
+    setweight(to_tsvector('english', coalesce(authors_text, '')), 'D') ||
+    setweight(to_tsvector('english', coalesce(journal, '')), 'D')
+  ) stored;
+
+-- websearch_to_tsquery / @@ lookups
+create index if not exists idx_papers_search_vector
+  on public.papers using gin (search_vector);
+
+-- ILIKE '%…%' author / journal filters
+create index if not exists idx_papers_authors_text_trgm
+  on public.papers using gin (authors_text gin_trgm_ops);
+
+create index if not exists idx_papers_journal_trgm
+  on public.papers using gin (journal gin_trgm_ops);
+
+-- keywords @> array[...] filter
+create index if not exists idx_papers_keywords
+  on public.papers using gin (keywords);
+
+-- Year filter / default sort
+create index if not exists idx_papers_year
+  on public.papers (year);
@@ -0,0 +1,79 @@
+-- ==========================================
+-- 07_paper_topics.sql
+-- Materialized topic tags on papers (replaces per-request ILIKE chains)
+-- ==========================================
+
+-- Data-driven topic dictionary: add a row, then run the backfill
+--   python -m utils.backfill_topics
+create table if not exists public.topic_definitions (
+  topic text primary key,
+  terms text[] not null default '{}',
+  updated_at timestamptz not null default now()
+);
+
+insert into public.topic_definitions (topic, terms) values
+  ('treat',      array['treat', 'therapy', 'trial', 'drug', 'intervention']),
+  ('neuro',      array['neuro', 'brain', 'cogn', 'nervous']),
+  ('immun',      array['immune', 'inflamm', 'cytokine', 't cell', 'antibody']),
+  ('long covid', array['long covid', 'covid', 'post-viral', 'sars'])
+on conflict (topic) do nothing;
+
+alter table public.papers
+  add column if not exists topics text[] not null default '{}';
+
+create index if not exists idx_papers_topics
+  on public.papers using gin (topics);
+
+-- Topics whose terms appear (case-insensitive substring) in title or abstract
+create or replace function public.paper_topics(p_title text, p_abstract text)
+returns text[]
+language sql
+stable
+as $$
+  select coalesce(array_agg(d.topic order by d.topic), '{}')
+  from public.topic_definitions d
+  where exists (
+    select 1 from unnest(d.terms) as t(term)
+    where p_title ilike '%' || t.term || '%'
+       or p_abstract ilike '%' || t.term || '%'
+  )
+$$;
+
+-- Tag at ingest / sync time
+create or replace function public.papers_set_topics()
+returns trigger
+language plpgsql
+as $$
+begin
+  new.topics := public.paper_topics(new.title, new.abstract);
+  return new;
+end
+$$;
+
+drop trigger if exists trg_papers_set_topics on public.papers;
+create trigger trg_papers_set_topics
+  before insert or update of title, abstract on public.papers
+  for each row execute function public.papers_set_topics();
+
+-- Bulk backfill in pmid-ordered batches (resumable from `after_pmid`)
+create or replace function public.backfill_paper_topics(batch_size int default 1000,
+                                                        after_pmid text default '')
+returns table (updated int, last_pmid text)
+language sql
+as $$
+  with batch as (
+    select pmid, public.paper_topics(title, abstract) as topics
+    from public.papers
+    where pmid > after_pmid
+    order by pmid
+    limit batch_size
+  ),
+  changed as (
+    update public.papers p
+    set topics = b.topics
+    from batch b
+    where p.pmid = b.pmid and p.topics is distinct from b.topics
+    returning p.pmid
+  )
+  select (select count(*) from changed)::int, (select max(pmid) from batch)
+$$;
@@ -0,0 +1,15 @@
+-- ==========================================
+-- 08_papers_keyset_indexes.sql
+-- Composite indexes matching keyset pagination order (sort key, pmid).
+-- Descending = nulls last; the backward scan serves ascending (nulls first).
+-- ==========================================
+
+create index if not exists idx_papers_year_pmid
+  on public.papers (year desc nulls last, pmid desc);
+
+create index if not exists idx_papers_title_pmid
+  on public.papers (title desc nulls last, pmid desc);
+
+-- Cluster-filtered explorer pages
+create index if not exists idx_papers_cluster_year_pmid
+  on public.papers (cluster, year desc nulls last, pmid desc);
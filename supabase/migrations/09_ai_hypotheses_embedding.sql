@@ -0,0 +1,9 @@
+-- ==========================================
+-- 09_ai_hypotheses_embedding.sql
+-- Persist each hypothesis' title embedding (text-embedding-3-small)
+-- so /ai/hypotheses only embeds newly generated titles.
+-- real[] keeps 4 bytes/dim; rows without one are back-filled lazily.
+-- ==========================================
+
+alter table public.ai_hypotheses
+  add column if not exists embedding real[];
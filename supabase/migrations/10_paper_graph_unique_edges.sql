@@ -0,0 +1,58 @@
+-- ==========================================
+-- 10_paper_graph_unique_edges.sql
+-- One row per edge + atomic per-paper edge replacement
+-- ==========================================
+
+-- Drop duplicates left by re-summarized papers (keep the oldest row)
+delete from public.paper_graph a
+using public.paper_graph b
+where a.paper_pmid = b.paper_pmid
+  and a.mechanism is not distinct from b.mechanism
+  and a.biomarker is not distinct from b.biomarker
+  and a.edge_type = b.edge_type
+  and (a.created_at, a.id) > (b.created_at, b.id);
+
+-- biomarker is null on paper→mechanism edges, so nulls must collide too (PG 15+)
+create unique index if not exists uq_paper_graph_edge
+  on public.paper_graph (paper_pmid, mechanism, biomarker, edge_type)
+  nulls not distinct;
+
+-- Replace the edge sets of `p_pmids` with `p_edges` in one transaction:
+-- edges no longer present are deleted, new ones inserted, unchanged rows kept.
+--   p_edges: [{"paper_pmid", "mechanism", "biomarker", "edge_type"}, …]
+-- Returns the number of inserted edges.
+create or replace function public.replace_paper_graph(p_pmids text[], p_edges jsonb)
+returns integer
+language plpgsql
+as $$
+declare
+  inserted integer;
+begin
+  with incoming as (
+    select e->>'paper_pmid' as paper_pmid,
+           nullif(e->>'mechanism', '') as mechanism,
+           nullif(e->>'biomarker', '') as biomarker,
+           e->>'edge_type' as edge_type
+    from jsonb_array_elements(coalesce(p_edges, '[]'::jsonb)) as e
+  )
+  delete from public.paper_graph g
+  where g.paper_pmid = any(p_pmids)
+    and not exists (
+      select 1 from incoming i
+      where i.paper_pmid = g.paper_pmid
+        and i.mechanism is not distinct from g.mechanism
+        and i.biomarker is not distinct from g.biomarker
+        and i.edge_type = g.edge_type
+    );
+
+  insert into public.paper_graph (paper_pmid, mechanism, biomarker, edge_type)
+  select distinct e->>'paper_pmid', nullif(e->>'mechanism', ''),
+         nullif(e->>'biomarker', ''), e->>'edge_type'
+  from jsonb_array_elements(coalesce(p_edges, '[]'::jsonb)) as e
+  where e->>'paper_pmid' = any(p_pmids)
+  on conflict (paper_pmid, mechanism, biomarker, edge_type) do nothing;
+  get diagnostics inserted = row_count;
+
+  return inserted;
+end
+$$;
@@ -0,0 +1,88 @@
+-- ==========================================
+-- 11_mechanism_edges_sync.sql
+-- Id-keyed mechanism_edges: per-source replacement + paper_graph backfill
+-- ==========================================
+
+-- Which pipeline asserted the edge ('summary' = /papers/summarize,
+-- 'mechanisms' = /papers/mechanisms); each replaces only its own edges
+alter table public.mechanism_edges
+  add column if not exists source text not null default 'summary';
+
+-- biomarker_id is null on paper→mechanism edges, so nulls must collide too (PG 15+)
+create unique index if not exists uq_mechanism_edge
+  on public.mechanism_edges (paper_pmid, source, mechanism_id, biomarker_id)
+  nulls not distinct;
+
+-- Replace the `p_source` edge sets of `p_pmids` with `p_edges` in one transaction:
+-- edges no longer present are deleted, new ones inserted, unchanged rows kept.
+--   p_edges: [{"paper_pmid", "mechanism_id", "biomarker_id"}, …]
+-- Returns the number of inserted edges.
+create or replace function public.replace_mechanism_edges(
+  p_source text, p_pmids text[], p_edges jsonb)
+returns integer
+language plpgsql
+as $$
+declare
+  inserted integer;
+begin
+  with incoming as (
+    select e->>'paper_pmid' as paper_pmid,
+           (e->>'mechanism_id')::uuid as mechanism_id,
+           (nullif(e->>'biomarker_id', ''))::uuid as biomarker_id
+    from jsonb_array_elements(coalesce(p_edges, '[]'::jsonb)) as e
+  )
+  delete from public.mechanism_edges g
+  where g.paper_pmid = any(p_pmids)
+    and g.source = p_source
+    and not exists (
+      select 1 from incoming i
+      where i.paper_pmid = g.paper_pmid
+        and i.mechanism_id is not distinct from g.mechanism_id
+        and i.biomarker_id is not distinct from g.biomarker_id
+    );
+
+  insert into public.mechanism_edges (paper_pmid, source, mechanism_id, biomarker_id)
+  select distinct e->>'paper_pmid', p_source, (e->>'mechanism_id')::uuid,
+         (nullif(e->>'biomarker_id', ''))::uuid
+  from jsonb_array_elements(coalesce(p_edges, '[]'::jsonb)) as e
+  where e->>'paper_pmid' = any(p_pmids)
+  on conflict (paper_pmid, source, mechanism_id, biomarker_id) do nothing;
+  get diagnostics inserted = row_count;
+
+  return inserted;
+end
+$$;
+
+-- One-shot conversion of paper_graph (text edges) into interned nodes and
+-- 'summary' mechanism_edges. Idempotent; returns the number of inserted edges.
+create or replace function public.backfill_mechanism_edges()
+returns integer
+language plpgsql
+as $$
+declare
+  inserted integer;
+begin
+  insert into public.mechanism_nodes (name)
+  select distinct btrim(mechanism) from public.paper_graph
+  where btrim(mechanism) <> ''
+  on conflict (name) do nothing;
+
+  insert into public.biomarker_nodes (name)
+  select distinct btrim(biomarker) from public.paper_graph
+  where btrim(biomarker) <> ''
+  on conflict (name) do nothing;
+
+  insert into public.mechanism_edges (paper_pmid, source, mechanism_id, biomarker_id)
+  select distinct g.paper_pmid, 'summary', m.id, b.id
+  from public.paper_graph g
+  join public.mechanism_nodes m on m.name = btrim(g.mechanism)
+  left join public.biomarker_nodes b on b.name = btrim(g.biomarker)
+  where g.biomarker is null or btrim(g.biomarker) = '' or b.id is not null
+  on conflict (paper_pmid, source, mechanism_id, biomarker_id) do nothing;
+  get diagnostics inserted = row_count;
+
+  return inserted;
+end
+$$;
+
+select public.backfill_mechanism_edges();
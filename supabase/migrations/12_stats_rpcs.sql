@@ -0,0 +1,134 @@
+-- ==========================================
+-- 12_stats_rpcs.sql
+-- Server-side aggregates for /stats, /stats/biomarker_counts, /biomarkers
+-- ==========================================
+
+-- Biomarker mentions across paper_summaries rows (trimmed; every mention
+-- counts, as the Python Counter over all summaries did)
+create materialized view if not exists public.stats_biomarker_counts as
+select btrim(b) as biomarker, count(*) as count
+from public.paper_summaries s, unnest(s.biomarkers) as b
+where btrim(b) <> ''
+group by btrim(b);
+
+create unique index if not exists uq_stats_biomarker_counts
+  on public.stats_biomarker_counts (biomarker);
+create index if not exists idx_stats_biomarker_counts_rank
+  on public.stats_biomarker_counts (count desc, biomarker);
+
+-- Biomarker → mechanism→biomarker edges written by /summarize (the rows
+-- paper_graph holds) + the mechanisms; one edge per (paper, mechanism)
+create materialized view if not exists public.stats_biomarker_mechanisms as
+select b.name as biomarker,
+       count(*) as count,
+       array_agg(distinct m.name order by m.name) as mechanisms
+from public.mechanism_edges e
+join public.biomarker_nodes b on b.id = e.biomarker_id
+join public.mechanism_nodes m on m.id = e.mechanism_id
+where e.source = 'summary'
+group by b.name;
+
+create unique index if not exists uq_stats_biomarker_mechanisms
+  on public.stats_biomarker_mechanisms (biomarker);
+create index if not exists idx_stats_biomarker_mechanisms_rank
+  on public.stats_biomarker_mechanisms (count desc, biomarker);
+
+-- Papers per publication year (null year kept so the total adds up)
+create materialized view if not exists public.stats_paper_years as
+select year, count(*) as count
+from public.papers
+group by year;
+
+create unique index if not exists uq_stats_paper_years
+  on public.stats_paper_years (year) nulls not distinct;
+
+-- Papers per author
+create materialized view if not exists public.stats_top_authors as
+select author, count(*) as count
+from (
+  select distinct p.pmid, a as author
+  from public.papers p, unnest(p.authors) as a
+  where a is not null and a <> ''
+) t
+group by author;
+
+create unique index if not exists uq_stats_top_authors
+  on public.stats_top_authors (author);
+create index if not exists idx_stats_top_authors_rank
+  on public.stats_top_authors (count desc, author);
+
+-- ------------------------------------------
+-- RPCs (only the final rows leave the database)
+-- ------------------------------------------
+create or replace function public.top_biomarkers(p_limit integer default 20)
+returns table (biomarker text, count bigint)
+language sql
+stable
+as $$
+  select biomarker, count from public.stats_biomarker_counts
+  order by count desc, biomarker
+  limit p_limit
+$$;
+
+-- p_limit null → every biomarker
+create or replace function public.biomarker_mechanisms(p_limit integer default null)
+returns table (biomarker text, count bigint, mechanisms text[])
+language sql
+stable
+as $$
+  select biomarker, count, mechanisms from public.stats_biomarker_mechanisms
+  order by count desc, biomarker
+  limit p_limit
+$$;
+
+-- {"total_papers", "year_distribution": {year: n}, "top_authors": [{"name", "count"}]}
+create or replace function public.paper_stats(p_authors integer default 10)
+returns jsonb
+language sql
+stable
+as $$
+  select jsonb_build_object(
+    'total_papers', (select coalesce(sum(count), 0) from public.stats_paper_years),
+    'year_distribution', (
+      select coalesce(jsonb_object_agg(year, count order by year), '{}'::jsonb)
+      from public.stats_paper_years where year is not null),
+    'top_authors', (
+      select coalesce(jsonb_agg(jsonb_build_object('name', author, 'count', count)
+                                order by count desc, author), '[]'::jsonb)
+      from (select author, count from public.stats_top_authors
+            order by count desc, author limit p_authors) t)
+  )
+$$;
+
+-- ------------------------------------------
+-- Refresh: CONCURRENTLY keeps the views readable while they rebuild.
+-- Called (debounced) by the API after writes and by bulk importers;
+-- pg_cron, where installed, also refreshes every 15 minutes.
+-- ------------------------------------------
+-- security definer: the views belong to the migration role, and only their
+-- owner may refresh them; service_role (PostgREST, importers) calls this.
+create or replace function public.refresh_stats_views()
+returns void
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  refresh materialized view concurrently public.stats_biomarker_counts;
+  refresh materialized view concurrently public.stats_biomarker_mechanisms;
+  refresh materialized view concurrently public.stats_paper_years;
+  refresh materialized view concurrently public.stats_top_authors;
+end
+$$;
+
+revoke execute on function public.refresh_stats_views() from public;
+grant execute on function public.refresh_stats_views() to service_role;
+
+do $$
+begin
+  if exists (select 1 from pg_extension where extname = 'pg_cron') then
+    perform cron.schedule('refresh-stats-views', '*/15 * * * *',
+                          'select public.refresh_stats_views()');
+  end if;
+end
+$$;
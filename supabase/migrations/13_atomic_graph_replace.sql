@@ -0,0 +1,101 @@
+-- ==========================================
+-- 13_atomic_graph_replace.sql
+-- Node resolution + mechanism_edges replacement inside the database, and
+-- replace_paper_graph updating both edge tables in one transaction
+-- ==========================================
+
+-- Same signature as in 11_mechanism_edges_sync.sql, but `p_edges` is now
+-- name-keyed (as built by utils.graph_db.paper_graph_edges):
+--   p_edges: [{"paper_pmid", "mechanism", "biomarker"}, …]
+-- Missing mechanism/biomarker nodes are created, then the `p_source` edge
+-- sets of `p_pmids` are replaced; all of it in the caller's transaction.
+-- Returns the number of inserted edges.
+create or replace function public.replace_mechanism_edges(
+  p_source text, p_pmids text[], p_edges jsonb)
+returns integer
+language plpgsql
+as $$
+declare
+  inserted integer;
+begin
+  insert into public.mechanism_nodes (name)
+  select distinct btrim(e->>'mechanism')
+  from jsonb_array_elements(coalesce(p_edges, '[]'::jsonb)) as e
+  where btrim(e->>'mechanism') <> ''
+  on conflict (name) do nothing;
+
+  insert into public.biomarker_nodes (name)
+  select distinct btrim(e->>'biomarker')
+  from jsonb_array_elements(coalesce(p_edges, '[]'::jsonb)) as e
+  where btrim(e->>'mechanism') <> '' and btrim(e->>'biomarker') <> ''
+  on conflict (name) do nothing;
+
+  with incoming as (
+    select e->>'paper_pmid' as paper_pmid, m.id as mechanism_id, b.id as biomarker_id
+    from jsonb_array_elements(coalesce(p_edges, '[]'::jsonb)) as e
+    join public.mechanism_nodes m on m.name = btrim(e->>'mechanism')
+    left join public.biomarker_nodes b on b.name = btrim(e->>'biomarker')
+  )
+  delete from public.mechanism_edges g
+  where g.paper_pmid = any(p_pmids)
+    and g.source = p_source
+    and not exists (
+      select 1 from incoming i
+      where i.paper_pmid = g.paper_pmid
+        and i.mechanism_id is not distinct from g.mechanism_id
+        and i.biomarker_id is not distinct from g.biomarker_id
+    );
+
+  insert into public.mechanism_edges (paper_pmid, source, mechanism_id, biomarker_id)
+  select distinct e->>'paper_pmid', p_source, m.id, b.id
+  from jsonb_array_elements(coalesce(p_edges, '[]'::jsonb)) as e
+  join public.mechanism_nodes m on m.name = btrim(e->>'mechanism')
+  left join public.biomarker_nodes b on b.name = btrim(e->>'biomarker')
+  where e->>'paper_pmid' = any(p_pmids)
+  on conflict (paper_pmid, source, mechanism_id, biomarker_id) do nothing;
+  get diagnostics inserted = row_count;
+
+  return inserted;
+end
+$$;
+
+-- As in 10_paper_graph_unique_edges.sql, plus the 'summary' mechanism_edges
+-- of the same papers, so both edge tables change together or not at all.
+-- Returns the number of inserted paper_graph edges.
+create or replace function public.replace_paper_graph(p_pmids text[], p_edges jsonb)
+returns integer
+language plpgsql
+as $$
+declare
+  inserted integer;
+begin
+  with incoming as (
+    select e->>'paper_pmid' as paper_pmid,
+           nullif(e->>'mechanism', '') as mechanism,
+           nullif(e->>'biomarker', '') as biomarker,
+           e->>'edge_type' as edge_type
+    from jsonb_array_elements(coalesce(p_edges, '[]'::jsonb)) as e
+  )
+  delete from public.paper_graph g
+  where g.paper_pmid = any(p_pmids)
+    and not exists (
+      select 1 from incoming i
+      where i.paper_pmid = g.paper_pmid
+        and i.mechanism is not distinct from g.mechanism
+        and i.biomarker is not distinct from g.biomarker
+        and i.edge_type = g.edge_type
+    );
+
+  insert into public.paper_graph (paper_pmid, mechanism, biomarker, edge_type)
+  select distinct e->>'paper_pmid', nullif(e->>'mechanism', ''),
+         nullif(e->>'biomarker', ''), e->>'edge_type'
+  from jsonb_array_elements(coalesce(p_edges, '[]'::jsonb)) as e
+  where e->>'paper_pmid' = any(p_pmids)
+  on conflict (paper_pmid, mechanism, biomarker, edge_type) do nothing;
+  get diagnostics inserted = row_count;
+
+  perform public.replace_mechanism_edges('summary', p_pmids, p_edges);
+
+  return inserted;
+end
+$$;
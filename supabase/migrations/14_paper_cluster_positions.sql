@@ -0,0 +1,27 @@
+-- ==========================================
+-- 14_paper_cluster_positions.sql
+-- Bulk write of recluster results that touches only the cluster columns
+-- ==========================================
+
+-- Set cluster / umap_x / umap_y for existing papers; every other column
+-- (title included) is left as it is, and unknown pmids are ignored.
+--   p_rows: [{"pmid", "cluster", "umap_x", "umap_y"}, …]
+-- Returns the number of papers whose position changed.
+create or replace function public.set_paper_clusters(p_rows jsonb)
+returns integer
+language plpgsql
+as $$
+declare
+  updated integer;
+begin
+  update public.papers p
+  set cluster = r.cluster, umap_x = r.umap_x, umap_y = r.umap_y
+  from jsonb_to_recordset(coalesce(p_rows, '[]'::jsonb))
+       as r(pmid text, cluster integer, umap_x double precision, umap_y double precision)
+  where p.pmid = r.pmid
+    and (p.cluster, p.umap_x, p.umap_y) is distinct from (r.cluster, r.umap_x, r.umap_y);
+  get diagnostics updated = row_count;
+
+  return updated;
+end
+$$;
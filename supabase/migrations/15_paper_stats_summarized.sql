@@ -0,0 +1,26 @@
+-- ==========================================
+-- 15_paper_stats_summarized.sql
+-- paper_stats also reports how many papers have at least one summary
+-- ==========================================
+
+-- As in 12_stats_rpcs.sql, plus "summarized_papers": distinct paper_pmid in
+-- paper_summaries (re-summarised papers count once; index-only scan on
+-- idx_paper_summaries_paper_id)
+create or replace function public.paper_stats(p_authors integer default 10)
+returns jsonb
+language sql
+stable
+as $$
+  select jsonb_build_object(
+    'total_papers', (select coalesce(sum(count), 0) from public.stats_paper_years),
+    'summarized_papers', (select count(distinct paper_pmid) from public.paper_summaries),
+    'year_distribution', (
+      select coalesce(jsonb_object_agg(year, count order by year), '{}'::jsonb)
+      from public.stats_paper_years where year is not null),
+    'top_authors', (
+      select coalesce(jsonb_agg(jsonb_build_object('name', author, 'count', count)
+                                order by count desc, author), '[]'::jsonb)
+      from (select author, count from public.stats_top_authors
+            order by count desc, author limit p_authors) t)
+  )
+$$;
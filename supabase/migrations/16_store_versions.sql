@@ -0,0 +1,67 @@
+-- ==========================================
+-- 16_store_versions.sql
+-- Change counters for the tables the API keeps in process memory
+-- ==========================================
+
+-- One sequence per source table; writes bump it, API workers poll
+-- store_versions() and rebuild their copy when a counter has moved
+-- (utils/store_versions.py). Sequences are non-transactional, so bumping
+-- never blocks concurrent writers; a rolled-back write only costs a
+-- needless rebuild.
+create sequence if not exists public.papers_version;
+create sequence if not exists public.summaries_version;
+create sequence if not exists public.mechanism_edges_version;
+
+create or replace function public.bump_store_version()
+returns trigger
+language plpgsql
+as $$
+begin
+  perform nextval(tg_argv[0]::regclass);
+  return null;
+end
+$$;
+
+-- papers: only the columns the search index, suggestions and /stats read,
+-- so embedding / topic / cluster-position writes don't trigger rebuilds
+drop trigger if exists trg_papers_version_rows on public.papers;
+create trigger trg_papers_version_rows
+  after insert or delete on public.papers
+  for each row execute function public.bump_store_version('public.papers_version');
+
+drop trigger if exists trg_papers_version_update on public.papers;
+create trigger trg_papers_version_update
+  after update on public.papers
+  for each row
+  when ((old.title, old.abstract, old.authors, old.authors_text, old.journal,
+         old.keywords, old.year, old.cluster)
+        is distinct from
+        (new.title, new.abstract, new.authors, new.authors_text, new.journal,
+         new.keywords, new.year, new.cluster))
+  execute function public.bump_store_version('public.papers_version');
+
+drop trigger if exists trg_paper_summaries_version on public.paper_summaries;
+create trigger trg_paper_summaries_version
+  after insert or update or delete or truncate on public.paper_summaries
+  for each statement execute function public.bump_store_version('public.summaries_version');
+
+drop trigger if exists trg_mechanism_edges_version on public.mechanism_edges;
+create trigger trg_mechanism_edges_version
+  after insert or update or delete or truncate on public.mechanism_edges
+  for each statement execute function public.bump_store_version('public.mechanism_edges_version');
+
+create or replace function public.store_versions()
+returns jsonb
+language sql
+stable
+as $$
+  -- last_value is already 1 before the first nextval; is_called tells them apart
+  select jsonb_build_object(
+    'papers', (select case when is_called then last_value else 0 end
+               from public.papers_version),
+    'summaries', (select case when is_called then last_value else 0 end
+                  from public.summaries_version),
+    'mechanism_edges', (select case when is_called then last_value else 0 end
+                        from public.mechanism_edges_version)
+  )
+$$;
@@ -0,0 +1,129 @@
+-- ==========================================
+-- 17_store_changes.sql
+-- Row-level change log for the in-process stores (replaces the
+-- counters of 16_store_versions.sql)
+-- ==========================================
+
+-- API workers poll store_changes() and apply just the changed rows
+-- (utils/store_versions.py). Each log row names the writing worker (the
+-- X-Store-Writer header, see utils/db.py) so a worker skips the writes it
+-- has already applied in process; scripts send no header.
+create table if not exists public.store_changes (
+  id bigserial primary key,
+  tbl text not null,          -- papers | paper_summaries | mechanism_edges
+  row_key text not null,      -- pmid (papers, mechanism_edges) or summary id
+  writer text,
+  xid xid8 not null default pg_current_xact_id(),
+  changed_at timestamptz not null default now()
+);
+
+create index if not exists idx_store_changes_xid on public.store_changes (xid);
+create index if not exists idx_store_changes_changed_at on public.store_changes (changed_at);
+
+create or replace function public.log_store_change()
+returns trigger
+language plpgsql
+as $$
+begin
+  insert into public.store_changes (tbl, row_key, writer)
+  values (
+    tg_table_name,
+    case tg_argv[0]
+      when 'id' then coalesce(new.id, old.id)::text
+      else coalesce(new.paper_pmid, old.paper_pmid)
+    end,
+    nullif(current_setting('request.headers', true), '')::json ->> 'x-store-writer'
+  );
+  return null;
+end
+$$;
+
+create or replace function public.log_paper_change()
+returns trigger
+language plpgsql
+as $$
+begin
+  insert into public.store_changes (tbl, row_key, writer)
+  values ('papers', coalesce(new.pmid, old.pmid),
+          nullif(current_setting('request.headers', true), '')::json ->> 'x-store-writer');
+  return null;
+end
+$$;
+
+-- The counters of 16_store_versions.sql are superseded
+drop trigger if exists trg_papers_version_rows on public.papers;
+drop trigger if exists trg_papers_version_update on public.papers;
+drop trigger if exists trg_paper_summaries_version on public.paper_summaries;
+drop trigger if exists trg_mechanism_edges_version on public.mechanism_edges;
+drop function if exists public.store_versions();
+drop function if exists public.bump_store_version();
+drop sequence if exists public.papers_version;
+drop sequence if exists public.summaries_version;
+drop sequence if exists public.mechanism_edges_version;
+
+-- papers: only the columns the search index, suggestions and /stats read,
+-- so embedding / topic / cluster-position writes are not logged
+drop trigger if exists trg_papers_changes on public.papers;
+create trigger trg_papers_changes
+  after insert or delete on public.papers
+  for each row execute function public.log_paper_change();
+
+drop trigger if exists trg_papers_changes_update on public.papers;
+create trigger trg_papers_changes_update
+  after update on public.papers
+  for each row
+  when ((old.title, old.abstract, old.authors, old.authors_text, old.journal,
+         old.keywords, old.year, old.cluster)
+        is distinct from
+        (new.title, new.abstract, new.authors, new.authors_text, new.journal,
+         new.keywords, new.year, new.cluster))
+  execute function public.log_paper_change();
+
+drop trigger if exists trg_paper_summaries_changes on public.paper_summaries;
+create trigger trg_paper_summaries_changes
+  after insert or update or delete on public.paper_summaries
+  for each row execute function public.log_store_change('id');
+
+drop trigger if exists trg_mechanism_edges_changes on public.mechanism_edges;
+create trigger trg_mechanism_edges_changes
+  after insert or update or delete on public.mechanism_edges
+  for each row execute function public.log_store_change('paper_pmid');
+
+-- Changed keys per table since `p_after` (the xmin returned by the
+-- previous call), leaving out `p_writer`'s own rows. Keyed on the writing
+-- transaction, so rows committed after an earlier call by a transaction
+-- that was already running then are still returned (re-applying is
+-- harmless). A table with more than `p_limit` changed keys maps to null:
+-- rebuild it instead. Without `p_after`, only the cursor is returned.
+create or replace function public.store_changes(p_after text default null,
+                                                p_writer text default null,
+                                                p_limit integer default 1000)
+returns jsonb
+language sql
+stable
+as $$
+  select jsonb_build_object(
+    'xmin', pg_snapshot_xmin(pg_current_snapshot())::text,
+    'changes', case when p_after is null then '{}'::jsonb else coalesce((
+      select jsonb_object_agg(tbl, keys)
+      from (
+        select tbl,
+               case when count(distinct row_key) > p_limit then null
+                    else jsonb_agg(distinct row_key) end as keys
+        from public.store_changes
+        where xid >= p_after::xid8
+          and writer is distinct from p_writer
+        group by tbl
+      ) t), '{}'::jsonb) end
+  )
+$$;
+
+create or replace function public.prune_store_changes(p_keep interval default '1 day')
+returns integer
+language sql
+as $$
+  with gone as (
+    delete from public.store_changes where changed_at < now() - p_keep returning 1
+  )
+  select count(*)::int from gone
+$$;
@@ -0,0 +1,68 @@
+-- ==========================================
+-- 18_paper_positions_version.sql
+-- Version of the UMAP map (papers.cluster / umap_x / umap_y)
+-- ==========================================
+
+-- API workers key their cached scatter payloads, tile pyramid and tile
+-- ETags on this counter (routes/embeddings.py), so a recluster, a placed
+-- paper or a deleted one reaches every worker. It is a row rather than a
+-- sequence so that the bump commits with the write: a reader that sees
+-- the new version also sees the new positions.
+create table if not exists public.paper_positions_version (
+  id boolean primary key default true check (id),
+  version bigint not null default 0
+);
+
+insert into public.paper_positions_version (id) values (true) on conflict do nothing;
+
+-- Statement-level, so a recluster bumps once rather than once per paper
+create or replace function public.bump_paper_positions_version()
+returns trigger
+language plpgsql
+as $$
+declare
+  moved boolean;
+begin
+  -- Each branch only names the transition tables its event has
+  if tg_op = 'UPDATE' then
+    moved := exists (
+      select 1 from new_rows n join old_rows o using (pmid)
+      where (n.cluster, n.umap_x, n.umap_y) is distinct from (o.cluster, o.umap_x, o.umap_y));
+  elsif tg_op = 'INSERT' then
+    moved := exists (select 1 from new_rows where umap_x is not null);
+  else
+    moved := exists (select 1 from old_rows where umap_x is not null);
+  end if;
+
+  if moved then
+    update public.paper_positions_version set version = version + 1;
+  end if;
+  return null;
+end
+$$;
+
+drop trigger if exists trg_papers_positions_insert on public.papers;
+create trigger trg_papers_positions_insert
+  after insert on public.papers
+  referencing new table as new_rows
+  for each statement execute function public.bump_paper_positions_version();
+
+drop trigger if exists trg_papers_positions_update on public.papers;
+create trigger trg_papers_positions_update
+  after update on public.papers
+  referencing old table as old_rows new table as new_rows
+  for each statement execute function public.bump_paper_positions_version();
+
+drop trigger if exists trg_papers_positions_delete on public.papers;
+create trigger trg_papers_positions_delete
+  after delete on public.papers
+  referencing old table as old_rows
+  for each statement execute function public.bump_paper_positions_version();
+
+create or replace function public.paper_positions_version()
+returns bigint
+language sql
+stable
+as $$
+  select coalesce((select version from public.paper_positions_version), 0)
+$$;
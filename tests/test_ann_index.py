@@ -0,0 +1,50 @@
+"""
+ANN (IVF-flat) Index Unit Tests
+-------------------------------
+Run with:
+    pytest -v tests/test_ann_index.py
+"""
+
+import numpy as np
+
+from utils.ann_index import IVFIndex
+
+
+def _corpus(n=3000, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((20, dim))
+    vectors = centers[rng.integers(0, 20, n)] + 0.5 * rng.standard_normal((n, dim))
+    return [(str(i), v, 2000 + i % 5, i % 3) for i, v in enumerate(vectors)]
+
+
+def test_full_probe_matches_brute_force():
+    index = IVFIndex()
+    index.rebuild(_corpus(), nlist=16)
+    q = index.vectors[42]
+    assert index.search(q, k=5, nprobe=16) == index.exact(q, k=5)
+    assert index.search(q, k=1)[0][1] == "42"
+
+
+def test_prefilters_and_incremental_upsert():
+    index = IVFIndex()
+    index.rebuild(_corpus(), nlist=16)
+    q = index.vectors[7]
+    hits = index.search(q, k=10, year=2001, cluster=1)
+    assert hits and all(int(p) % 5 == 1 and int(p) % 3 == 1 for _, p in hits)
+
+    index.upsert("new", q * 3, year=1999, cluster=9)
+    assert len(index) == 3001
+    assert index.search(q, k=1, cluster=9) == [(index.exact(q, k=1, cluster=9)[0][0], "new")]
+
+
+def test_snapshot_round_trip(tmp_path):
+    index = IVFIndex()
+    index.rebuild(_corpus(500), nlist=4)
+    index.upsert("x", np.ones(32))
+    path = str(tmp_path / "ann.npz")
+    index.save(path)
+
+    loaded = IVFIndex()
+    loaded.load(path)
+    assert loaded.pmids == index.pmids
+    assert loaded.search(np.ones(32), k=3) == index.search(np.ones(32), k=3)
@@ -0,0 +1,71 @@
+"""
+Clustering Model Unit Tests
+---------------------------
+Run with:
+    pytest -v tests/test_clustering.py
+"""
+
+import numpy as np
+
+from utils.clustering import ClusterModel, cluster_keywords, renumber_by_size
+
+
+def _fit(seed=0, per_cluster=60, dim=32):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((3, dim)) * 4
+    matrix = np.concatenate([c + rng.standard_normal((per_cluster, dim)) for c in centers])
+    labels = np.repeat([0, 1, 2], per_cluster)
+    coords = np.concatenate([[x, x] + rng.standard_normal((per_cluster, 2)) * 0.1
+                             for x in (0.0, 10.0, 20.0)])
+    pmids = [str(i) for i in range(len(matrix))]
+    model = ClusterModel()
+    model.set(pmids, matrix, coords, labels)
+    return model, matrix, centers
+
+
+def test_renumber_by_size_keeps_noise():
+    labels = renumber_by_size([5, 5, -1, 2, 2, 2, 9])
+    assert labels.tolist() == [1, 1, -1, 0, 0, 0, 2]
+
+
+def test_assign_joins_nearest_cluster_and_interpolates_position():
+    model, matrix, centers = _fit()
+    vector = centers[1] + 0.1
+    sims = (matrix / np.linalg.norm(matrix, axis=1, keepdims=True)) @ (vector / np.linalg.norm(vector))
+    top = np.argsort(-sims)[:10]
+    placed = model.assign(vector, [(float(sims[i]), str(i)) for i in top])
+    assert placed["cluster"] == 1
+    assert abs(placed["umap_x"] - 10.0) < 0.5 and abs(placed["umap_y"] - 10.0) < 0.5
+
+
+def test_assign_without_neighbours_uses_centroid_position():
+    model, _, centers = _fit()
+    placed = model.assign(centers[2], [])
+    assert placed["cluster"] == 2
+    assert abs(placed["umap_x"] - 20.0) < 0.5
+
+
+def test_far_away_vector_is_noise():
+    model, _, centers = _fit()
+    rng = np.random.default_rng(9)
+    outsider = rng.standard_normal(centers.shape[1])
+    outsider -= sum((outsider @ c) / (c @ c) * c for c in centers)
+    assert model.assign(outsider)["cluster"] is None
+
+
+def test_save_load_round_trip(tmp_path):
+    model, _, centers = _fit()
+    path = str(tmp_path / "model.npz")
+    model.save(path)
+    loaded = ClusterModel()
+    loaded.load(path)
+    assert loaded.pmids == model.pmids and loaded.n_clusters == 3
+    assert loaded.assign(centers[0]) == model.assign(centers[0])
+
+
+def test_cluster_keywords_are_distinctive():
+    titles = ["Mitochondrial ATP production", "Mitochondrial dysfunction in ME/CFS",
+              "Cytokine profiles and immune activation", "Immune cytokine signatures"]
+    keywords = cluster_keywords(titles, [0, 0, 1, -1])
+    assert keywords[0][0] == "mitochondrial"
+    assert "cytokine" in keywords[1] and 1 in keywords and -1 not in keywords
@@ -0,0 +1,96 @@
+"""
+Co-occurrence Engine Unit Tests
+-------------------------------
+Run with:
+    pytest -v tests/test_cooccurrence.py
+"""
+
+import math
+from collections import Counter
+
+import pytest
+
+from utils.cooccurrence import Cooccurrence
+
+SUMMARIES = [
+    (["immune", "mitochondrial"], ["IL-6", "TNF"], 2020),
+    (["immune"], ["IL-6", " IL-6 ", "NK cells"], 2021),
+    (["mitochondrial"], ["lactate"], 2021),
+    (["vascular"], ["ET-1"], None),
+    ([], ["IL-6"], 2022),
+]
+
+
+def _engine():
+    c = Cooccurrence()
+    for mechs, bios, year in SUMMARIES:
+        c.add_summary(mechs, bios, year)
+    return c
+
+
+def test_marginal_ranking_matches_counter():
+    c = _engine()
+    expected = Counter(b.strip() for _, bios, _ in SUMMARIES for b in dict.fromkeys(
+        x.strip() for x in bios)).most_common(3)
+    assert c.most_common("biomarker", 3) == expected
+    c.add_summary([], ["lactate", "TNF"])
+    assert c.most_common("biomarker", 2) == [("IL-6", 3), ("TNF", 2)]
+
+
+def test_pair_counts_pmi_and_lift():
+    c = _engine()
+    s = c.scores("mechanism_biomarker", "immune", "IL-6")
+    assert s["count"] == 2
+    assert s["lift"] == pytest.approx(2 * 5 / (2 * 3), abs=1e-4)
+    assert s["pmi"] == pytest.approx(math.log(10 / 6), abs=1e-4)
+    assert c.scores("mechanism_biomarker", "vascular", "IL-6") == \
+        {"count": 0, "pmi": None, "lift": None}
+
+
+def test_biomarker_pairs_are_symmetric_without_diagonal():
+    c = _engine()
+    bb = c.matrices["biomarker_biomarker"]
+    assert bb.get("IL-6", "TNF") == bb.get("TNF", "IL-6") == 1
+    assert bb.get("IL-6", "IL-6") == 0
+
+
+def test_top_k_by_count_lift_and_transpose():
+    c = _engine()
+    by_count = c.top("mechanism_biomarker", "immune", k=2)
+    assert by_count[0] == {"term": "IL-6", **c.scores("mechanism_biomarker", "immune", "IL-6")}
+    by_lift = c.top("mechanism_biomarker", "immune", k=3, score="pmi")
+    assert [e["term"] for e in by_lift][0] in {"TNF", "NK cells"}
+    assert [e["term"] for e in c.top("mechanism_biomarker", "IL-6", transpose=True)] == ["immune", "mitochondrial"]
+    assert c.top("mechanism_year", "mitochondrial") == [
+        {"term": "2021", **c.scores("mechanism_year", "mitochondrial", "2021")},
+        {"term": "2020", **c.scores("mechanism_year", "mitochondrial", "2020")},
+    ]
+    assert c.top("mechanism_biomarker", "immune", min_count=2)[0]["term"] == "IL-6"
+    assert c.top("mechanism_biomarker", "unknown") == []
+
+
+def test_resummarised_paper_counts_once_with_its_newest_summary():
+    c = Cooccurrence()
+    c.add_summary(["immune"], ["IL-6", "TNF"], 2020, pmid="1", created_at="2024-01-01")
+    c.add_summary(["immune"], ["IL-6"], 2020, pmid="2", created_at="2024-01-01")
+    c.add_summary(["vascular"], ["IL-6"], 2020, pmid="1", created_at="2024-06-01")
+    assert c.total == 2
+    assert c.count("biomarker", "IL-6") == 2 and c.count("biomarker", "TNF") == 0
+    assert c.scores("mechanism_biomarker", "immune", "IL-6")["count"] == 1
+    assert c.matrices["biomarker_biomarker"].get("IL-6", "TNF") == 0
+    assert "TNF" not in c.matrices["mechanism_biomarker"].cols
+    assert c.count("year", 2020) == 2
+
+    # an older row arriving later (e.g. during a rebuild) is ignored
+    c.add_summary(["immune"], ["TNF"], 2020, pmid="1", created_at="2023-01-01")
+    assert c.count("mechanism", "vascular") == 1 and c.count("biomarker", "TNF") == 0
+
+
+def test_rebuild_replaces_every_count():
+    c = _engine()
+    c.rebuild([(["vascular"], ["ET-1"], 2023, "1", "2024-01-01"),
+               (["immune"], ["IL-6"], 2023, "1", "2024-02-01")])
+    assert c.loaded and c.total == 1
+    assert c.count("mechanism", "vascular") == 0
+    assert c.scores("mechanism_biomarker", "immune", "IL-6")["count"] == 1
+    assert c.most_common("biomarker", 5) == [("IL-6", 1)]
@@ -0,0 +1,38 @@
+"""
+Query Embedding Cache Unit Tests
+--------------------------------
+Run with:
+    pytest -v tests/test_embedding_cache.py
+"""
+
+from utils.embedding_cache import EmbeddingCache
+
+
+def test_second_lookup_skips_the_embed_call(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "q.sqlite3"))
+    calls = []
+
+    def embed(text):
+        calls.append(text)
+        return [0.5, -1.0, 0.25]
+
+    assert cache.get_or_embed("Post-exertional  Malaise", "m", embed) == [0.5, -1.0, 0.25]
+    assert cache.get_or_embed("post-exertional malaise", "m", embed) == [0.5, -1.0, 0.25]
+    assert calls == ["post-exertional malaise"]  # the text the key stands for
+    assert cache.stats == {"memory_hits": 1, "disk_hits": 0, "misses": 1}
+
+    # A fresh process (empty LRU) is served from SQLite
+    reopened = EmbeddingCache(str(tmp_path / "q.sqlite3"))
+    assert reopened.get("post-exertional malaise", "m") == [0.5, -1.0, 0.25]
+    assert reopened.get("post-exertional malaise", "other-model") is None
+    assert reopened.stats["disk_hits"] == 1
+
+
+def test_both_tiers_are_bounded(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "q.sqlite3"), memory_size=2, disk_size=10)
+    for i in range(25):
+        cache.put(f"q{i}", "m", [float(i)])
+    status = cache.status()
+    assert status["memory_items"] == 2
+    assert status["disk_items"] <= 10
+    assert cache.get("q24", "m") == [24.0]
@@ -0,0 +1,174 @@
+"""
+Embedding Backfill Unit Tests
+-----------------------------
+Run with:
+    pytest -v tests/test_generate_embeddings.py
+"""
+
+import os
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import RateLimitError
+
+import utils.generate_embeddings as ge
+from utils.generate_embeddings import AdaptiveRateLimiter, token_batches
+
+
+def _paper(pmid, chars=30):
+    return {"pmid": pmid, "title": "t" * chars, "abstract": ""}
+
+
+# ------------------------------------------------------------
+# 📦 Batching
+# ------------------------------------------------------------
+def test_batches_respect_the_token_budget():
+    papers = [_paper(str(i), chars=29) for i in range(10)]  # 10 tokens each
+    batches = token_batches(papers, budget=35, max_inputs=100)
+    assert [len(b) for b in batches] == [3, 3, 3, 1]
+    assert [p["pmid"] for b in batches for p in b] == [str(i) for i in range(10)]
+
+
+def test_batches_respect_max_inputs():
+    batches = token_batches([_paper(str(i)) for i in range(7)], budget=10_000, max_inputs=3)
+    assert [len(b) for b in batches] == [3, 3, 1]
+
+
+def test_an_oversized_paper_gets_its_own_batch():
+    papers = [_paper("a"), _paper("big", chars=3000), _paper("b")]
+    assert [[p["pmid"] for p in b] for b in token_batches(papers, budget=100)] == \
+        [["a"], ["big"], ["b"]]
+
+
+# ------------------------------------------------------------
+# 🚦 Adaptive rate limiter
+# ------------------------------------------------------------
+def test_throttle_halves_the_rate_and_success_recovers_it():
+    limiter = AdaptiveRateLimiter(rate=4.0, min_rate=0.5, step=1.0)
+    limiter.on_throttle()
+    assert limiter.rate == 2.0
+    for _ in range(3):
+        limiter.on_throttle()
+    assert limiter.rate == 0.5  # floored at min_rate
+
+    for _ in range(10):
+        limiter.on_success()
+    assert limiter.rate > 2.0
+
+
+def test_retry_after_delays_the_next_request(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(ge.time, "sleep", sleeps.append)
+    limiter = AdaptiveRateLimiter(rate=100.0)
+    limiter.on_throttle(retry_after=3.0)
+    limiter.acquire()
+    assert sleeps and sleeps[0] == pytest.approx(3.0, abs=0.1)
+
+
+def test_embed_batch_backs_off_on_429_and_honours_retry_after(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(ge.time, "sleep", sleeps.append)
+    request = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+    responses = [
+        RateLimitError("slow down", body=None,
+                       response=httpx.Response(429, headers={"retry-after": "2"}, request=request)),
+        SimpleNamespace(data=[SimpleNamespace(index=1, embedding=[1.0]),
+                              SimpleNamespace(index=0, embedding=[0.0])]),
+    ]
+
+    def create(model, input):
+        r = responses.pop(0)
+        if isinstance(r, Exception):
+            raise r
+        return r
+
+    monkeypatch.setattr(ge, "client", SimpleNamespace(embeddings=SimpleNamespace(create=create)))
+    limiter = AdaptiveRateLimiter(rate=8.0)
+    rows = ge.embed_batch([_paper("1"), _paper("2")], limiter)
+
+    assert [(r["pmid"], r["embedding"]) for r in rows] == [("1", [0.0]), ("2", [1.0])]
+    assert any(s == pytest.approx(2.0, abs=0.1) for s in sleeps)
+    assert 4.0 <= limiter.rate < 8.0  # halved, then nudged back up
+
+
+# ------------------------------------------------------------
+# 💾 Checkpoint + resume
+# ------------------------------------------------------------
+def test_checkpoint_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(ge, "CHECKPOINT_PATH", str(tmp_path / "sub" / "ckpt.json"))
+    assert ge.read_checkpoint() == ""
+    ge.write_checkpoint("12345", embedded=7)
+    assert ge.read_checkpoint() == "12345"
+
+
+def test_a_crashed_run_resumes_after_the_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(ge, "CHECKPOINT_PATH", str(tmp_path / "ckpt.json"))
+    corpus = [_paper("01"), _paper("02"), {"pmid": "03", "title": None, "abstract": " "},
+              _paper("04"), _paper("05"), _paper("06")]
+    fetched_after, embedded, crash = [], [], {"at": "04"}
+
+    def fetch_page(after, page_size):
+        fetched_after.append(after)
+        if after == crash["at"]:
+            raise RuntimeError("connection lost")
+        return [p for p in corpus if p["pmid"] > after][:page_size]
+
+    def embed_batch(batch, limiter):
+        embedded.extend(p["pmid"] for p in batch)
+        return [{**p, "embedding": [1.0]} for p in batch]
+
+    upsert = lambda rows, on_conflict: SimpleNamespace(execute=lambda: None)
+    monkeypatch.setattr(ge, "fetch_page", fetch_page)
+    monkeypatch.setattr(ge, "embed_batch", embed_batch)
+    monkeypatch.setattr(ge, "supabase", SimpleNamespace(
+        table=lambda name: SimpleNamespace(upsert=upsert)))
+    monkeypatch.setattr(ge, "index_embeddings", lambda rows, save=True: None)
+    snapshots = []
+    monkeypatch.setattr(ge, "save_ann_index", lambda: snapshots.append(len(embedded)))
+
+    with pytest.raises(RuntimeError):
+        ge.generate_embeddings(page_size=2, concurrency=1)
+    assert ge.read_checkpoint() == "04"
+    assert snapshots == [3]  # written on the way out, not lost with the crash
+
+    crash["at"] = None
+    ge.generate_embeddings(page_size=2, concurrency=1)
+    assert fetched_after == ["", "02", "04", "04", "06"]  # second run starts at the checkpoint
+    assert embedded == ["01", "02", "04", "05", "06"]  # 03 has no text
+    assert not os.path.exists(ge.CHECKPOINT_PATH)
+
+
+def test_a_resumed_run_retries_failed_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(ge, "CHECKPOINT_PATH", str(tmp_path / "ckpt.json"))
+    corpus = {p["pmid"]: p for p in (_paper(f"0{i}") for i in range(1, 7))}
+    done, state = set(), {"fail": {"04"}, "crash": "06"}
+
+    def fetch_page(after, page_size):
+        if after == state["crash"]:
+            raise RuntimeError("connection lost")
+        return [p for k, p in sorted(corpus.items()) if k > after and k not in done][:page_size]
+
+    def embed_batch(batch, limiter):
+        if state["fail"] & {p["pmid"] for p in batch}:
+            raise RuntimeError("bad request")
+        done.update(p["pmid"] for p in batch)
+        return [{**p, "embedding": [1.0]} for p in batch]
+
+    upsert = lambda rows, on_conflict: SimpleNamespace(execute=lambda: None)
+    monkeypatch.setattr(ge, "fetch_page", fetch_page)
+    monkeypatch.setattr(ge, "embed_batch", embed_batch)
+    monkeypatch.setattr(ge, "token_batches", lambda papers: [[p] for p in papers])
+    monkeypatch.setattr(ge, "supabase", SimpleNamespace(
+        table=lambda name: SimpleNamespace(upsert=upsert)))
+    monkeypatch.setattr(ge, "index_embeddings", lambda rows, save=True: None)
+    monkeypatch.setattr(ge, "save_ann_index", lambda: None)
+
+    with pytest.raises(RuntimeError):
+        ge.generate_embeddings(page_size=2, concurrency=1)
+    assert done == {"01", "02", "03", "05", "06"}
+    assert ge.read_checkpoint() == "03"  # held before 04, not moved on to 06
+
+    state.update(fail=set(), crash=None)
+    ge.generate_embeddings(page_size=2, concurrency=1)
+    assert "04" in done
@@ -0,0 +1,166 @@
+"""
+Knowledge Graph Store Unit Tests
+--------------------------------
+Run with:
+    pytest -v tests/test_graph_store.py
+"""
+
+from utils.graph_store import BIOMARKER, MECH_BIO, MECHANISM, PAPER, PAPER_MECH, GraphStore
+
+
+def _store():
+    g = GraphStore()
+    g.add_summary({"id": 1, "paper_pmid": "111", "mechanisms": ["immune", " mitochondrial "],
+                   "biomarkers": ["IL-6"], "one_sentence": "old", "created_at": "2024-01-01"})
+    g.add_summary({"id": 2, "paper_pmid": "222", "mechanisms": ["immune"],
+                   "biomarkers": [], "one_sentence": "b", "created_at": "2024-03-01"})
+    g.add_summary({"id": 3, "paper_pmid": "111", "mechanisms": ["vascular"],
+                   "biomarkers": ["", "ET-1"], "one_sentence": "new", "created_at": "2024-02-01"})
+    for pmid, mech, bio in [("111", "immune", None), ("111", "immune", "IL-6"),
+                            ("222", "immune", "IL-6"), ("222", "vascular", "IL-6"),
+                            ("222", "vascular", "ET-1")]:
+        g.add_edge({"paper_pmid": pmid, "mechanism": mech, "biomarker": bio})
+    return g
+
+
+def test_names_are_interned_per_kind():
+    g = _store()
+    immune = g.find(MECHANISM, "immune")
+    assert g.find(MECHANISM, " immune ") == immune
+    assert g.find(BIOMARKER, "immune") is None
+    assert g.mentions[immune] == 2
+    assert g.mentions[g.find(PAPER, "111")] == 2
+
+
+def test_recent_and_latest_summaries():
+    g = _store()
+    assert g.recent_summaries(2) == [1, 2]
+    latest = g.latest_summary("111")
+    assert g.summary_meta[latest]["one_sentence"] == "new"
+    assert [g.names[t] for t in g.summary_terms(latest)] == ["vascular", "ET-1"]
+    assert g.latest_summary("999") is None
+
+
+def test_duplicate_summary_ids_are_ignored():
+    g = _store()
+    g.add_summary({"id": 2, "paper_pmid": "222", "mechanisms": ["immune"]})
+    assert len(g.summary_paper) == 3
+
+
+def test_csr_adjacency_counts_edges_both_ways():
+    g = _store()
+    il6 = g.find(BIOMARKER, "IL-6")
+    mechs = {g.names[m]: c for m, c in g.neighbors(il6, MECH_BIO, reverse=True)}
+    assert mechs == {"immune": 2, "vascular": 1}
+
+    vascular = g.find(MECHANISM, "vascular")
+    assert sorted(g.names[b] for b, _ in g.neighbors(vascular, MECH_BIO)) == ["ET-1", "IL-6"]
+    assert g.neighbors(g.find(PAPER, "111"), PAPER_MECH) == [(g.find(MECHANISM, "immune"), 1)]
+
+
+def test_csr_refreshes_after_incremental_edge():
+    g = _store()
+    g.csr(MECH_BIO)
+    g.add_edge({"paper_pmid": "333", "mechanism": "autonomic", "biomarker": "HRV"})
+    hrv = g.find(BIOMARKER, "HRV")
+    assert g.neighbors(hrv, MECH_BIO, reverse=True) == [(g.find(MECHANISM, "autonomic"), 1)]
+
+
+def test_adjacency_merges_summaries_and_edges():
+    g = _store()
+    immune, il6 = g.find(MECHANISM, "immune"), g.find(BIOMARKER, "IL-6")
+    p111 = g.find(PAPER, "111")
+    offsets, targets, w = g.adjacency()
+    row = dict(zip(targets[offsets[p111]:offsets[p111 + 1]].tolist(),
+                   w[offsets[p111]:offsets[p111 + 1]].tolist()))
+    # summary mention + paper_graph paper→mechanism edge
+    assert row[immune] == 2
+    assert w[offsets[p111]] == max(row.values())  # heaviest first
+    il6_row = targets[offsets[il6]:offsets[il6 + 1]].tolist()
+    assert immune in il6_row and p111 in il6_row
+
+
+def test_neighborhood_respects_hops_and_degree_limit():
+    g = _store()
+    vascular = g.find(MECHANISM, "vascular")
+    dist, links, truncated = g.neighborhood(vascular, hops=1)
+    assert {g.names[n] for n, d in dist.items() if d == 1} == {"111", "IL-6", "ET-1"}
+    assert not truncated and all(vascular in pair for pair in links)
+
+    dist, _, truncated = g.neighborhood(vascular, hops=2, max_degree=1)
+    assert truncated and len(dist) == 3
+
+    dist, _, truncated = g.neighborhood(vascular, hops=3, max_nodes=4)
+    assert truncated and len(dist) == 4
+
+
+def test_shortest_path_matches_plain_bfs():
+    import random
+    from collections import deque
+
+    g = GraphStore()
+    rng = random.Random(0)
+    for i in range(300):
+        g.add_summary({"id": i, "paper_pmid": str(rng.randint(0, 120)),
+                       "mechanisms": [f"m{rng.randint(0, 30)}"],
+                       "biomarkers": [f"b{rng.randint(0, 60)}" for _ in range(rng.randint(0, 2))]})
+    offsets, targets, _ = g.adjacency()
+
+    def bfs(a, b):
+        dist, queue = {a: 0}, deque([a])
+        while queue:
+            u = queue.popleft()
+            for v in targets[offsets[u]:offsets[u + 1]].tolist():
+                if v not in dist:
+                    dist[v] = dist[u] + 1
+                    queue.append(v)
+        return dist.get(b)
+
+    for _ in range(50):
+        a, b = rng.randrange(len(g)), rng.randrange(len(g))
+        path = g.shortest_path(a, b)
+        expected = bfs(a, b)
+        if expected is None:
+            assert path is None
+            continue
+        assert len(path) - 1 == expected and path[0] == a and path[-1] == b
+        for u, v in zip(path, path[1:]):
+            assert v in targets[offsets[u]:offsets[u + 1]].tolist()
+
+
+def test_replacing_a_papers_edges_drops_stale_counts():
+    g = _store()
+    il6, immune = g.find(BIOMARKER, "IL-6"), g.find(MECHANISM, "immune")
+    g.replace_paper_edges("111", [{"mechanism": "vascular", "biomarker": "IL-6"}])
+    mechs = dict(g.neighbors(il6, MECH_BIO, reverse=True))
+    assert mechs == {immune: 1, g.find(MECHANISM, "vascular"): 2}
+    assert g.neighbors(g.find(PAPER, "111"), PAPER_MECH) == []
+
+    g.replace_paper_edges("222", [])
+    assert dict(g.neighbors(il6, MECH_BIO, reverse=True)) == {g.find(MECHANISM, "vascular"): 1}
+
+
+def test_a_paper_counts_once_per_edge_across_sources():
+    g = _store()
+    il6, immune = g.find(BIOMARKER, "IL-6"), g.find(MECHANISM, "immune")
+    g.replace_paper_edges("111", [{"mechanism": "immune", "biomarker": "IL-6"}], source="mechanisms")
+    assert dict(g.neighbors(il6, MECH_BIO, reverse=True))[immune] == 2
+
+    # the summary edges go, the mechanisms-pipeline edge still supports it
+    g.replace_paper_edges("111", [])
+    assert dict(g.neighbors(il6, MECH_BIO, reverse=True))[immune] == 2
+    g.replace_paper_edges("111", [], source="mechanisms")
+    assert dict(g.neighbors(il6, MECH_BIO, reverse=True))[immune] == 1
+
+
+def test_rebuild_swaps_in_a_fresh_graph():
+    g = _store()
+    version = g.version
+    g.rebuild([{"id": 9, "paper_pmid": "333", "mechanisms": ["immune"], "biomarkers": ["CRP"]}],
+              [{"paper_pmid": "333", "mechanism": "immune", "biomarker": "CRP"}])
+    assert g.loaded and g.version > version
+    assert g.find(PAPER, "111") is None
+    assert len(g.summary_paper) == 1
+    assert g.neighbors(g.find(MECHANISM, "immune"), MECH_BIO) == [(g.find(BIOMARKER, "CRP"), 1)]
+    g.add_summary({"id": 10, "paper_pmid": "444", "mechanisms": ["immune"]})
+    assert g.mentions[g.find(MECHANISM, "immune")] == 2
@@ -0,0 +1,63 @@
+"""
+Mechanism Classifier Unit Tests
+-------------------------------
+Run with:
+    pytest -v tests/test_mechanisms_ontology.py
+"""
+
+import random
+
+from utils.mechanisms_ontology import (
+    MECH_GROUPS, ONTOLOGY, KeywordAutomaton, MechanismClassifier, mechanism_classifier)
+
+
+def naive_hub(mech: str) -> str:
+    mech_l = mech.lower()
+    for group, keywords in MECH_GROUPS.items():
+        if any(k in mech_l for k in keywords):
+            return group
+    return "other"
+
+
+def _corpus(n=2000, seed=0):
+    rng = random.Random(seed)
+    words = [w for ws in list(MECH_GROUPS.values()) + list(ONTOLOGY.values()) for w in ws]
+    filler = ["dysfunction", "across", "NK", "Post-Viral", "impaired", "hotspots", "x", "-"]
+    return [" ".join(rng.choice(words + filler) for _ in range(rng.randint(0, 4)))
+            + rng.choice(["", "s", "ic"]) for _ in range(n)]
+
+
+def test_automaton_finds_every_occurrence():
+    ac = KeywordAutomaton(["he", "she", "his", "hers"])
+    found = sorted((end, ac.keywords[k]) for end, k in ac.scan("ushers"))
+    assert found == [(3, "he"), (3, "she"), (5, "hers")]
+
+
+def test_hub_groups_match_nested_keyword_loop():
+    corpus = _corpus()
+    got = [c["hub"] or "other" for c in MechanismClassifier(
+        {"hub": (MECH_GROUPS, False)}).classify_many(corpus)]
+    assert got == [naive_hub(m) for m in corpus]
+
+
+def test_batch_equals_one_by_one():
+    corpus = _corpus(300, seed=1)
+    batch = MechanismClassifier({"hub": (MECH_GROUPS, False), "ontology": (ONTOLOGY, True)})
+    single = MechanismClassifier({"hub": (MECH_GROUPS, False), "ontology": (ONTOLOGY, True)})
+    assert batch.classify_many(corpus) == [single.classify(m) for m in corpus]
+
+
+def test_ontology_needs_whole_words():
+    assert mechanism_classifier.group("ROS accumulation", "ontology") == \
+        "Oxidative stress / Redox imbalance"
+    assert mechanism_classifier.group("across tissues", "ontology") is None
+    assert mechanism_classifier.group("Reduced NK cell cytotoxicity", "ontology") == \
+        "Immune dysregulation"
+    # the hub vocabulary keeps substring semantics
+    assert mechanism_classifier.group("mitochondrial", "hub") == "mitochondrial"
+
+
+def test_memo_is_bounded():
+    c = MechanismClassifier({"hub": (MECH_GROUPS, False)}, memo_size=10)
+    c.classify_many(_corpus(100, seed=2))
+    assert len(c._memo) <= 10
@@ -0,0 +1,37 @@
+"""
+Precomputed Neighbour Lists Unit Tests
+--------------------------------------
+Run with:
+    pytest -v tests/test_neighbors.py
+"""
+
+import numpy as np
+
+from utils.neighbors import NeighborLists, digest, topk_neighbors
+
+
+def test_blocked_topk_matches_full_matmul():
+    rng = np.random.default_rng(0)
+    m = rng.standard_normal((300, 16)).astype(np.float32)
+    idx, scores = topk_neighbors(m, k=5, block=64)
+
+    full = m @ m.T
+    np.fill_diagonal(full, -np.inf)
+    expected = np.argsort(-full, axis=1)[:, :5]
+    assert (idx == expected).all()
+    assert np.allclose(scores, np.take_along_axis(full, expected, axis=1))
+
+
+def test_lists_ignore_a_changed_vector(tmp_path):
+    rng = np.random.default_rng(1)
+    m = rng.standard_normal((50, 8)).astype(np.float32)
+    lists = NeighborLists()
+    lists.build([f"p{i}" for i in range(50)], m, k=4)
+    lists.save(str(tmp_path / "nb.npz"))
+
+    loaded = NeighborLists()
+    loaded.load(str(tmp_path / "nb.npz"))
+    hits = loaded.get("p3", digest(m[3]), limit=4)
+    assert len(hits) == 4 and all(p != "p3" for _, p in hits)
+    assert loaded.get("p3", digest(m[3] * 2), limit=4) is None
+    assert loaded.get("p3", digest(m[3]), limit=5) is None
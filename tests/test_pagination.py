@@ -0,0 +1,31 @@
+"""
+Keyset Pagination Unit Tests
+----------------------------
+Run with:
+    pytest -v tests/test_pagination.py
+"""
+
+import pytest
+
+from utils.pagination import encode_cursor, decode_cursor, postgrest_keyset
+
+
+def test_cursor_round_trip():
+    token = encode_cursor("year", "desc", {"pmid": "123", "year": 2021})
+    assert decode_cursor(token, "year", "desc") == (2021, "123")
+    with pytest.raises(ValueError):
+        decode_cursor(token, "title", "desc")
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor", "year", "desc")
+
+
+def test_postgrest_keyset_branches():
+    assert postgrest_keyset("year", True, 2021, "123") == (
+        'year.lt."2021",and(year.eq."2021",pmid.lt."123"),year.is.null'
+    )
+    assert postgrest_keyset("year", False, None, "5") == (
+        'and(year.is.null,pmid.gt."5"),year.not.is.null'
+    )
+    assert postgrest_keyset("pmid", True, "9", "9", within="x.eq.1") == (
+        'and(x.eq.1,pmid.lt."9")'
+    )
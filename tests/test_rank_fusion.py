@@ -0,0 +1,29 @@
+"""
+Reciprocal Rank Fusion Unit Tests
+---------------------------------
+Run with:
+    pytest -v tests/test_rank_fusion.py
+"""
+
+from utils.rank_fusion import reciprocal_rank_fusion
+
+
+def test_docs_in_both_lists_win():
+    fused = reciprocal_rank_fusion(
+        {"lexical": ["a", "b", "c"], "vector": ["c", "d"]}, k=60)
+    assert fused[0][0] == "c"
+    assert fused[0][2] == {"lexical": 3, "vector": 1}
+
+
+def test_weights_shift_the_order():
+    rankings = {"lexical": ["a"], "vector": ["b"]}
+    assert reciprocal_rank_fusion(
+        rankings, {"lexical": 2.0})[0][0] == "a"
+    assert reciprocal_rank_fusion(
+        rankings, {"vector": 2.0})[0][0] == "b"
+
+
+def test_duplicate_ids_count_once():
+    fused = reciprocal_rank_fusion({"lexical": ["a", "a", "b"]}, k=1)
+    assert [d for d, _, _ in fused] == ["a", "b"]
+    assert fused[1][2] == {"lexical": 2}
@@ -0,0 +1,107 @@
+"""
+Packed Scatter Encoding Unit Tests
+----------------------------------
+Run with:
+    pytest -v tests/test_scatter.py
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from utils.scatter import MAGIC, TilePyramid, decode_scatter, encode_scatter
+
+
+def _points(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "pmid": str(30000000 + i),
+            "cluster": None if i % 7 == 0 else int(rng.integers(0, 40)),
+            "umap_x": float(np.float32(rng.normal())),
+            "umap_y": float(np.float32(rng.normal())),
+        }
+        for i in range(n)
+    ]
+
+
+@pytest.mark.parametrize("n", [0, 1, 3, 1000])
+def test_round_trip(n):
+    points = _points(n)
+    decoded = decode_scatter(encode_scatter(points))
+    assert decoded == [
+        {"id": p["pmid"], "cluster_label": p["cluster"], "x": p["umap_x"], "y": p["umap_y"]}
+        for p in points
+    ]
+
+
+def test_arrays_are_aligned_for_typed_array_views():
+    data = encode_scatter(_points(3))  # odd n → int16 labels need padding
+    assert data[:4] == MAGIC
+    offsets_at = 12 + 8 * 3 + 8
+    offsets = np.frombuffer(data, "<u4", 4, offsets_at)
+    assert offsets_at % 4 == 0
+    assert offsets[-1] == len(data) - offsets_at - 16
+
+
+def test_smaller_than_json():
+    points = _points(5000)
+    as_json = json.dumps([
+        {"id": p["pmid"], "cluster_label": p["cluster"], "x": p["umap_x"], "y": p["umap_y"]}
+        for p in points
+    ], separators=(",", ":")).encode()
+    assert len(encode_scatter(points)) < len(as_json) / 3
+
+
+def test_rejects_foreign_payload():
+    with pytest.raises(ValueError):
+        decode_scatter(b"{}")
+
+
+def _all_points(pyramid, z, x, y):
+    tile = pyramid.tile(z, x, y, max_points=10**9)
+    return {p["id"] for p in tile["points"]}
+
+
+def test_children_partition_parent_tile():
+    pyramid = TilePyramid(_points(3000, seed=1))
+    parent = _all_points(pyramid, 2, 1, 2)
+    children = [_all_points(pyramid, 3, 2 + dx, 4 + dy) for dx in (0, 1) for dy in (0, 1)]
+    assert set().union(*children) == parent
+    assert sum(len(c) for c in children) == len(parent)
+    assert len(_all_points(pyramid, 0, 0, 0)) == 3000
+
+
+def test_tile_points_fall_inside_tile_bounds():
+    pyramid = TilePyramid(_points(2000, seed=2))
+    tile = pyramid.tile(3, 3, 5, max_points=10**9)
+    left, bottom, right, top = tile["bounds"]
+    assert tile["count"] == len(tile["points"]) > 0
+    for p in tile["points"]:
+        assert left <= p["x"] < right and bottom < p["y"] <= top
+
+
+def test_dense_tiles_are_aggregated_per_cell():
+    points = _points(5000, seed=3)
+    pyramid = TilePyramid(points)
+    tile = pyramid.tile(0, 0, 0, max_points=100)
+    assert tile["mode"] == "cells"
+    assert sum(c["count"] for c in tile["cells"]) == 5000
+    assert all(sum(c["clusters"].values()) == c["count"] for c in tile["cells"])
+    assert all(0 <= c["cx"] < tile["cells_per_side"] for c in tile["cells"])
+
+    none_count = sum(p["cluster"] is None for p in points)
+    assert sum(c["clusters"].get("-1", 0) for c in tile["cells"]) == none_count
+
+
+def test_version_tracks_coordinates():
+    points = _points(100)
+    assert TilePyramid(points).version == TilePyramid(points).version
+    points[5]["umap_x"] += 1.0
+    assert TilePyramid(points).version != TilePyramid(_points(100)).version
+
+
+def test_out_of_range_tile_rejected():
+    with pytest.raises(ValueError):
+        TilePyramid(_points(10)).tile(1, 2, 0)
@@ -0,0 +1,124 @@
+"""
+Search Index Unit Tests
+-----------------------
+Pure in-memory tests for utils.search_index (no Supabase required).
+
+Run with:
+    pytest -v tests/test_search_index.py
+"""
+
+import pytest
+from utils.search_index import InvertedIndex, tokenize
+
+PAPERS = [
+    {
+        "pmid": "1",
+        "title": "Chronic fatigue and immune exhaustion",
+        "authors": ["Smith J", "Doe A"],
+        "abstract": "NK cell cytotoxicity is reduced.",
+        "year": 2024,
+    },
+    {
+        "pmid": "2",
+        "title": "Mitochondrial energy metabolism in ME/CFS",
+        "authors": ["Brown K"],
+        "abstract": "Chronic fatigue syndrome patients show low ATP.",
+        "year": 2023,
+    },
+    {
+        "pmid": "3",
+        "title": "Post-COVID fatigue",
+        "authors": ["Smithson R"],
+        "abstract": "Long COVID overlaps with ME/CFS.",
+        "year": 2024,
+    },
+]
+
+
+@pytest.fixture
+def index():
+    idx = InvertedIndex()
+    idx.rebuild(PAPERS)
+    return idx
+
+
+def pmids(results):
+    return [p["pmid"] for p in results]
+
+
+# ------------------------------------------------------------
+# 1️⃣ Tokenizer
+# ------------------------------------------------------------
+def test_tokenize_lists_and_punctuation():
+    assert tokenize(["Smith J", "Doe A"]) == ["smith", "j", "doe", "a"]
+    assert tokenize("Post-COVID ME/CFS") == ["post", "covid", "me", "cfs"]
+    assert tokenize(None) == []
+
+
+# ------------------------------------------------------------
+# 2️⃣ Matching
+# ------------------------------------------------------------
+def test_single_term_prefix(index):
+    assert pmids(index.search("fatig")) == ["1", "2", "3"]
+
+
+def test_phrase_requires_adjacency(index):
+    assert pmids(index.search("chronic fatigue")) == ["1", "2"]
+    assert pmids(index.search("fatigue chronic")) == []
+
+
+def test_filters_are_intersections(index):
+    assert pmids(index.search("fatigue", author="Smith")) == ["1", "3"]
+    assert pmids(index.search("fatigue", year=2024)) == ["1", "3"]
+    assert pmids(index.search("fatigue", author="smithson", year=2024)) == ["3"]
+    assert pmids(index.search(None, year=2023)) == ["2"]
+
+
+def test_empty_query_returns_pmid_order(index):
+    assert pmids(index.search("", limit=2)) == ["1", "2"]
+
+
+# ------------------------------------------------------------
+# 3️⃣ Incremental updates
+# ------------------------------------------------------------
+def test_upsert_replaces_old_postings(index):
+    index.upsert({"pmid": "2", "title": "Orthostatic intolerance", "year": 2025})
+    assert pmids(index.search("mitochondrial")) == []
+    assert pmids(index.search("orthostatic")) == ["2"]
+    assert pmids(index.search(None, year=2023)) == []
+    assert "mitochondrial" not in index.expand_prefix("mito")
+
+
+def test_remove(index):
+    index.remove("1")
+    assert pmids(index.search("immune")) == []
+    assert len(index) == 2
+
+
+# ------------------------------------------------------------
+# 4️⃣ BM25F ranking
+# ------------------------------------------------------------
+def test_ranked_prefers_title_over_abstract(index):
+    ranked = index.ranked("chronic fatigue", k=3)
+    assert [p["pmid"] for _, p in ranked][:2] == ["1", "2"]
+    scores = [s for s, _ in ranked]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_ranked_top_k_and_filters(index):
+    assert len(index.ranked("fatigue", k=1)) == 1
+    assert [p["pmid"] for _, p in index.ranked("fatigue", year=2023)] == ["2"]
+    assert index.ranked("nonexistentterm") == []
+
+
+def test_ranked_expands_unknown_prefix(index):
+    assert [p["pmid"] for _, p in index.ranked("mitochond")] == ["2"]
+
+
+def test_length_stats_follow_updates(index):
+    index.ranked("fatigue")
+    index.upsert({"pmid": "4", "title": "Fatigue", "year": 2022})
+    top_score, top = index.ranked("fatigue", k=1)[0]
+    assert top["pmid"] == "4"
+    index.remove("4")
+    assert "4" not in index.doc_lengths
@@ -0,0 +1,54 @@
+"""
+Stats Accumulator Unit Tests
+----------------------------
+Run with:
+    pytest -v tests/test_stats_accumulator.py
+"""
+
+from utils.stats_accumulator import StatsAccumulator
+
+
+def _stats():
+    s = StatsAccumulator()
+    s.rebuild([
+        {"pmid": "1", "year": 2020, "authors": ["Smith A", "Nacul L"]},
+        {"pmid": "2", "year": 2021, "authors": ["Smith A", "Smith A"]},
+        {"pmid": "3", "year": None, "authors": None},
+    ], summarized=["1", "2", "2"])
+    return s
+
+
+def test_rebuild_counts_papers_years_and_authors():
+    data = _stats().snapshot()
+    assert data["total_papers"] == 3
+    assert data["summarized_papers"] == 2
+    assert data["year_distribution"] == {2020: 1, 2021: 1}
+    assert data["top_authors"] == [{"name": "Smith A", "count": 2},
+                                   {"name": "Nacul L", "count": 1}]
+
+
+def test_resynced_paper_moves_its_counts():
+    s = _stats()
+    s.upsert_paper({"pmid": "1", "year": 2021, "authors": ["Nacul L"]})
+    s.upsert_paper({"pmid": "4", "year": 2021, "authors": ["Klimas N"]})
+    data = s.snapshot()
+    assert data["total_papers"] == 4
+    assert data["year_distribution"] == {2021: 3}
+    assert {a["name"]: a["count"] for a in data["top_authors"]} == \
+        {"Smith A": 1, "Nacul L": 1, "Klimas N": 1}
+
+
+def test_snapshot_is_memoised_per_version():
+    s = _stats()
+    first = s.snapshot()
+    assert s.snapshot() is first
+    s.upsert_paper({"pmid": "2", "year": 2021, "authors": ["Smith A"]})  # unchanged
+    assert s.snapshot() is first
+
+    s.add_summary("2")  # re-summarised: still one paper
+    assert s.snapshot() is first
+
+    s.add_summary("3")
+    data = s.snapshot()
+    assert data is not first
+    assert data["summarized_papers"] == 3 and data["version"] > first["version"]
@@ -0,0 +1,162 @@
+"""
+Store Change Watcher Unit Tests
+-------------------------------
+Run with:
+    pytest -v tests/test_store_versions.py
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+import utils.store_versions as sv
+from utils.graph_store import MECH_BIO, MECHANISM, BIOMARKER, GraphStore
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db, self.table, self.filter, self.bounds = db, table, None, None
+
+    def select(self, columns):
+        return self
+
+    def in_(self, key, values):
+        self.db.requests.append((self.table, list(values)))
+        self.filter = (key, set(values))
+        return self
+
+    def order(self, key):
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end + 1)
+        return self
+
+    def execute(self):
+        key, values = self.filter
+        rows = [r for r in self.db.tables.get(self.table, []) if str(r[key]) in values]
+        return SimpleNamespace(data=rows[slice(*self.bounds)])
+
+
+class FakeDB:
+    def __init__(self):
+        self.tables, self.requests, self.calls = {}, [], []
+        self.changes, self.xmin = {}, "100"
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        data = {"xmin": self.xmin, "changes": self.changes if params["p_after"] else {}}
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=data))
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDB()
+    state = {"rebuilt": [], "papers": [], "summaries": []}
+
+    def store(name):
+        return SimpleNamespace(loaded=True), lambda force=False: state["rebuilt"].append(name)
+
+    graph = GraphStore()
+    graph.loaded = True
+    monkeypatch.setattr(sv, "supabase", fake)
+    monkeypatch.setattr(sv, "graph_store", graph)
+    monkeypatch.setattr(sv, "STORES", {n: store(n) for n in ("search", "suggest", "stats", "graph")})
+    monkeypatch.setattr(sv, "index_paper", lambda p, refresh_views: state["papers"].append(
+        (p["pmid"], refresh_views)))
+    monkeypatch.setattr(sv, "index_summary", lambda s, refresh_views: state["summaries"].append(
+        (s["id"], refresh_views)))
+    monkeypatch.setattr(sv, "_cursor", None)
+    fake.state, fake.graph = state, graph
+    return fake
+
+
+def test_first_check_only_takes_the_cursor(db):
+    db.changes = {"papers": ["1"]}
+    assert sv.check_store_versions() == []
+    assert db.calls[0][1]["p_after"] is None and db.calls[0][1]["p_writer"] == sv.STORE_WRITER
+    assert sv._cursor == "100" and db.requests == []
+
+
+def test_changed_rows_are_applied_without_a_rebuild(db):
+    sv.check_store_versions()
+    db.tables = {"papers": [{"pmid": "1"}, {"pmid": "2"}],
+                 "paper_summaries": [{"id": "s1", "paper_pmid": "1"}, {"id": "s2", "paper_pmid": "2"}]}
+    db.graph.add_summary({"id": "s2", "paper_pmid": "2"})
+    db.changes = {"papers": ["1"], "paper_summaries": ["s1", "s2"]}
+    db.xmin = "120"
+
+    assert sv.check_store_versions() == ["paper_summaries", "papers"]
+    assert db.state["papers"] == [("1", False)]
+    assert db.state["summaries"] == [("s1", False)]  # s2 was already applied
+    assert db.state["rebuilt"] == []
+    assert db.calls[-1][1]["p_after"] == "100" and sv._cursor == "120"
+
+
+def test_deleted_rows_and_bulk_changes_rebuild(db):
+    sv.check_store_versions()
+    db.changes = {"papers": ["gone"]}
+    sv.check_store_versions()
+    assert db.state["rebuilt"] == ["search", "suggest", "stats"]
+
+    db.state["rebuilt"].clear()
+    db.changes = {"mechanism_edges": None}
+    sv.check_store_versions()
+    assert db.state["rebuilt"] == ["graph"]
+
+
+def test_edges_replace_each_source_of_a_paper(db):
+    db.graph.add_edge({"paper_pmid": "1", "source": "old", "mechanism": "immune", "biomarker": "CRP"})
+    sv.check_store_versions()
+    db.tables = {"mechanism_edges": [
+        {"id": 1, "paper_pmid": "1", "source": "summary",
+         "mechanism": {"name": "immune"}, "biomarker": {"name": "IL-6"}},
+    ]}
+    db.changes = {"mechanism_edges": ["1"]}
+    sv.check_store_versions()
+
+    immune = db.graph.find(MECHANISM, "immune")
+    assert db.graph.paper_sources("1") == ["summary"]  # "old" has no rows left
+    assert db.graph.neighbors(immune, MECH_BIO) == [(db.graph.find(BIOMARKER, "IL-6"), 1)]
+
+
+def test_a_failed_check_keeps_the_cursor(db, monkeypatch):
+    sv.check_store_versions()
+    db.changes, db.xmin = {"papers": ["1"]}, "130"
+    db.tables = {"papers": [{"pmid": "1"}]}
+
+    def boom(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(sv, "index_paper", boom)
+    with pytest.raises(RuntimeError):
+        sv.check_store_versions()
+    assert sv._cursor == "100"
+
+
+def test_fetch_keeps_requests_bounded(db):
+    db.tables = {"papers": [{"pmid": str(i)} for i in range(450)]}
+    rows = sv._fetch("papers", "pmid", "pmid", [str(i) for i in range(450)], "pmid")
+    assert len(rows) == 450
+    assert [len(v) for _, v in db.requests] == [200, 200, 50]
+
+
+def test_background_rebuild_keeps_stores_loaded(db, monkeypatch):
+    release = sv.threading.Event()
+    stores = {n: sv.STORES[n] for n in ("search", "graph")}
+    stores["graph"][0].loaded = False  # never read: stays lazy
+    monkeypatch.setattr(sv, "STORES", {**stores, "stats": (SimpleNamespace(loaded=True), lambda force: (
+        release.wait(5), db.state["rebuilt"].append("stats")))})
+
+    assert sv.rebuild_stores_in_background()
+    assert not sv.rebuild_stores_in_background()  # one at a time
+    release.set()
+    for _ in range(100):
+        if not sv._rebuilding.is_set():
+            break
+        sv.time.sleep(0.01)
+    assert db.state["rebuilt"] == ["search", "stats"]
+    assert stores["search"][0].loaded
@@ -0,0 +1,58 @@
+"""
+Autocomplete Trie Unit Tests
+----------------------------
+Run with:
+    pytest -v tests/test_suggest.py
+"""
+
+import pytest
+from utils.suggest import SuggestIndex
+
+PAPERS = [
+    {"pmid": "1", "title": "Myalgic encephalomyelitis and energy metabolism",
+     "year": 2024, "keywords": ["energy metabolism"]},
+    {"pmid": "2", "title": "Energy envelope pacing", "year": 2010},
+    {"pmid": "3", "title": "Chronic fatigue syndrome cohort", "year": 2020},
+]
+TERMS = [("mechanism", "mitochondrial dysfunction"), ("biomarker", "IL-6"),
+         ("biomarker", "IL-6"), ("biomarker", "IL-8")]
+
+
+@pytest.fixture
+def trie():
+    t = SuggestIndex(k=5)
+    t.rebuild(PAPERS, TERMS)
+    return t
+
+
+def titles(results):
+    return [r["title"] for r in results]
+
+
+def test_completes_from_any_word_start(trie):
+    assert titles(trie.suggest("encephalo")) == [
+        "Myalgic encephalomyelitis and energy metabolism"]
+    assert "Chronic fatigue syndrome cohort" in titles(trie.suggest("fatig"))
+
+
+def test_popularity_orders_results(trie):
+    assert titles(trie.suggest("il")) == ["IL-6", "IL-8"]
+    # keyword (weight 1) vs newer title (1.34) vs older title (1.2)
+    assert titles(trie.suggest("energy"))[0] == \
+        "Myalgic encephalomyelitis and energy metabolism"
+
+
+def test_prefix_inside_compressed_edge(trie):
+    assert titles(trie.suggest("mitochondrial dys")) == [
+        "mitochondrial dysfunction"]
+    assert trie.suggest("mitochondrial x") == []
+
+
+def test_incremental_updates(trie):
+    trie.add_term("biomarker", "IL-8", count=5)
+    assert titles(trie.suggest("il"))[0] == "IL-8"
+    trie.add_paper({"pmid": "3", "title": "Orthostatic intolerance"})
+    assert trie.suggest("chronic fatigue") == []
+    assert titles(trie.suggest("ortho")) == ["Orthostatic intolerance"]
+    trie.add_term("biomarker", "IL-6", count=-2)
+    assert titles(trie.suggest("il-6")) == []
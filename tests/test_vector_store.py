@@ -0,0 +1,42 @@
+"""
+Memory-mapped Vector Store Unit Tests
+-------------------------------------
+Run with:
+    pytest -v tests/test_vector_store.py
+"""
+
+import numpy as np
+import pytest
+
+from utils.vector_store import VectorStore, export_store
+
+
+@pytest.mark.parametrize("quantization", ["int8", "float16"])
+def test_quantized_search_matches_float32(tmp_path, quantization):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((500, 64)).astype(np.float32)
+    path = str(tmp_path / "store")
+    assert export_store(((str(i), v) for i, v in enumerate(vectors)),
+                        path, quantization, chunk=128) == 500
+
+    store = VectorStore()
+    store.load(path)
+    assert len(store) == 500 and store.dim == 64
+    assert store._codes.itemsize == (1 if quantization == "int8" else 2)
+
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    q = rng.standard_normal(64).astype(np.float32)
+    exact = np.argsort(-(unit @ (q / np.linalg.norm(q))))[:10]
+    hits = store.search(q, k=10)
+    assert [p for _, p in hits] == [str(i) for i in exact]
+    assert np.allclose(store.vector("7"), unit[7], atol=1e-6)
+
+
+def test_matrix_keeps_the_requested_row_order(tmp_path):
+    vectors = np.eye(4, dtype=np.float32)
+    path = str(tmp_path / "store")
+    export_store(((str(i), v) for i, v in enumerate(vectors)), path, "int8")
+    store = VectorStore()
+    store.load(path)
+    assert np.array_equal(store.matrix([3, 0, 2]), vectors[[3, 0, 2]])
+    assert store.matrix([]).shape == (0, 4)
@@ -0,0 +1,320 @@
+# utils/ann_index.py
+"""
+Open ME/CFS — In-process ANN Index
+----------------------------------
+IVF-flat approximate nearest-neighbour search over `papers.embedding`,
+as a local alternative to the `match_papers` Supabase RPC.
+
+  - vectors are L2-normalised float32, so inner product = cosine similarity
+  - k-means splits them into `nlist` inverted lists; a query scans only
+    the `nprobe` lists whose centroids are closest
+  - year / cluster pre-filters are boolean masks applied before scoring;
+    nprobe grows with the filter's selectivity, and very selective
+    filters fall back to an exact scan of the allowed rows
+
+Built from Supabase once (see utils.vector_db.load_ann_index) and persisted as an
+.npz snapshot. New vectors are assigned to their nearest centroid without
+retraining; `rebuild()` re-clusters from scratch.
+
+Memory: every vector is held as float32 in RAM (n × dim × 4 bytes, about
+600 MB for 100k 1536-d embeddings) and `rebuild()` peaks at twice that.
+Beyond that size use the quantized mmap store instead (utils.vector_store,
+/semantic?backend=store), which keeps only int8 codes resident.
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+
+# Lists probed per query (recall/latency knob)
+DEFAULT_NPROBE = 8
+
+# k-means settings
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLES_PER_LIST = 64
+
+# A filter leaving fewer rows than this is answered by an exact scan
+EXACT_SCAN_THRESHOLD = 2000
+
+NO_VALUE = -1  # missing year / cluster
+
+
+def parse_embedding(value):
+    """papers.embedding as returned by PostgREST (JSON array or "[…]" string)."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = json.loads(value)
+    return np.asarray(value, dtype=np.float32)
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+def default_nlist(n: int) -> int:
+    return max(1, min(int(4 * np.sqrt(n)), n // 39 or 1, 4096))
+
+
+def kmeans(vectors: np.ndarray, nlist: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on a sample of the (normalised) vectors → centroids."""
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    nlist = min(nlist, n)
+    sample = vectors
+    if n > nlist * KMEANS_SAMPLES_PER_LIST:
+        sample = vectors[rng.choice(
+            n, nlist * KMEANS_SAMPLES_PER_LIST, replace=False)]
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        empty = np.bincount(assign, minlength=nlist) == 0
+        # Re-seed empty lists with random points so every list stays in use
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        centroids = _normalize(sums)
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    """Thread-safe IVF-flat index keyed by pmid, with year/cluster metadata."""
+
+    def __init__(self):
+        self.dim = 0
+        self.pmids: list[str] = []
+        self.rows: dict[str, int] = {}
+        self.loaded = False
+        self.snapshot_mtime = None
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._years = np.zeros(0, dtype=np.int32)
+        self._clusters = np.zeros(0, dtype=np.int32)
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._centroids = np.zeros((0, 0), dtype=np.float32)
+        self._lists: list[np.ndarray] | None = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.pmids)
+
+    @property
+    def nlist(self) -> int:
+        return len(self._centroids)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[:len(self.pmids)]
+
+    # --------------------------------------------------------
+    # ✏️ Writes
+    # --------------------------------------------------------
+    def rebuild(self, rows, nlist: int | None = None):
+        """
+        Replace the index and retrain the centroids.
+        rows: iterable of (pmid, vector, year, cluster). All vectors are
+        stacked into one float32 matrix (see the memory note above).
+        """
+        pmids, vectors, years, clusters = [], [], [], []
+        for pmid, vector, year, cluster in rows:
+            if vector is None or not len(vector):
+                continue
+            pmids.append(str(pmid))
+            vectors.append(vector)
+            years.append(NO_VALUE if year is None else int(year))
+            clusters.append(NO_VALUE if cluster is None else int(cluster))
+
+        matrix = np.asarray(vectors, dtype=np.float32) if vectors \
+            else np.zeros((0, 0), dtype=np.float32)
+        del vectors
+        if len(matrix):
+            # In place: no second n × dim copy on top of the stacked rows
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix /= norms
+        centroids = kmeans(matrix, nlist or default_nlist(len(matrix))) if len(matrix) \
+            else np.zeros((0, 0), dtype=np.float32)
+        assign = np.argmax(matrix @ centroids.T, axis=1).astype(np.int32) if len(matrix) \
+            else np.zeros(0, dtype=np.int32)
+
+        with self._lock:
+            self.dim = matrix.shape[1] if len(matrix) else 0
+            self.pmids = pmids
+            self.rows = {p: i for i, p in enumerate(pmids)}
+            self._vectors = matrix
+            self._years = np.asarray(years, dtype=np.int32)
+            self._clusters = np.asarray(clusters, dtype=np.int32)
+            self._assign = assign
+            self._centroids = centroids
+            self._lists = None
+            self.loaded = True
+
+    def _grow(self, n: int):
+        """Amortised append: double the backing arrays when full."""
+        if n <= len(self._vectors):
+            return
+        cap = max(n, 2 * len(self._vectors), 1024)
+        for name in ("_years", "_clusters", "_assign"):
+            old = getattr(self, name)
+            grown = np.full(cap, NO_VALUE, dtype=np.int32)
+            grown[:len(old)] = old
+            setattr(self, name, grown)
+        vectors = np.zeros((cap, self.dim), dtype=np.float32)
+        vectors[:len(self._vectors)] = self._vectors
+        self._vectors = vectors
+
+    def upsert(self, pmid, vector, year=None, cluster=None):
+        """Add or replace one vector, assigned to its nearest existing centroid."""
+        pmid = str(pmid)
+        vector = _normalize(np.asarray(vector, dtype=np.float32))
+        with self._lock:
+            if not self.nlist:
+                self.rebuild([(pmid, vector, year, cluster)])
+                return
+            if vector.shape[0] != self.dim:
+                raise ValueError(
+                    f"Embedding has {vector.shape[0]} dims, index has {self.dim}.")
+            row = self.rows.get(pmid)
+            if row is None:
+                row = len(self.pmids)
+                self._grow(row + 1)
+                self.pmids.append(pmid)
+                self.rows[pmid] = row
+            self._vectors[row] = vector
+            self._years[row] = NO_VALUE if year is None else int(year)
+            self._clusters[row] = NO_VALUE if cluster is None else int(cluster)
+            self._assign[row] = int(np.argmax(self._centroids @ vector))
+            self._lists = None
+
+    # --------------------------------------------------------
+    # 💾 Snapshot
+    # --------------------------------------------------------
+    def save(self, path: str):
+        """Atomically write an .npz snapshot (readers never see a partial file)."""
+        with self._lock:
+            n = len(self.pmids)
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp = f"{path}.tmp.npz"
+            np.savez(
+                tmp,
+                pmids=np.asarray(self.pmids, dtype=str),
+                vectors=self._vectors[:n],
+                years=self._years[:n],
+                clusters=self._clusters[:n],
+                assign=self._assign[:n],
+                centroids=self._centroids,
+            )
+            os.replace(tmp, path)
+            self.snapshot_mtime = os.path.getmtime(path)
+
+    def load(self, path: str):
+        mtime = os.path.getmtime(path)
+        with np.load(path) as snap:
+            pmids = [str(p) for p in snap["pmids"]]
+            vectors = snap["vectors"].astype(np.float32, copy=False)
+            years, clusters = snap["years"], snap["clusters"]
+            assign, centroids = snap["assign"], snap["centroids"]
+        with self._lock:
+            self.dim = vectors.shape[1] if len(vectors) else 0
+            self.pmids = pmids
+            self.rows = {p: i for i, p in enumerate(pmids)}
+            self._vectors = vectors
+            self._years = years.astype(np.int32)
+            self._clusters = clusters.astype(np.int32)
+            self._assign = assign.astype(np.int32)
+            self._centroids = centroids.astype(np.float32)
+            self._lists = None
+            self.loaded = True
+            self.snapshot_mtime = mtime
+
+    # --------------------------------------------------------
+    # 🔍 Reads
+    # --------------------------------------------------------
+    def _inverted_lists(self) -> list[np.ndarray]:
+        if self._lists is None:
+            assign = self._assign[:len(self.pmids)]
+            order = np.argsort(assign, kind="stable")
+            bounds = np.searchsorted(
+                assign[order], np.arange(self.nlist + 1))
+            self._lists = [order[bounds[i]:bounds[i + 1]]
+                           for i in range(self.nlist)]
+        return self._lists
+
+    def vector(self, pmid) -> np.ndarray | None:
+        """Stored (normalised) vector for one paper."""
+        row = self.rows.get(str(pmid))
+        return None if row is None else self._vectors[row].copy()
+
+    def _mask(self, year=None, cluster=None):
+        n = len(self.pmids)
+        mask = None
+        if year is not None:
+            mask = self._years[:n] == int(year)
+        if cluster is not None:
+            c = self._clusters[:n] == int(cluster)
+            mask = c if mask is None else mask & c
+        return mask
+
+    def _top_k(self, rows: np.ndarray | None, query: np.ndarray, k: int):
+        """Best k of `rows` (None = every row, scored without a gather copy)."""
+        if rows is None:
+            scores = self.vectors @ query
+        elif not len(rows):
+            return []
+        else:
+            scores = self._vectors[rows] @ query
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        if rows is not None:
+            return [(float(scores[i]), self.pmids[rows[i]]) for i in top]
+        return [(float(scores[i]), self.pmids[i]) for i in top]
+
+    def _prepare(self, query):
+        query = _normalize(np.asarray(query, dtype=np.float32))
+        if query.shape[0] != self.dim:
+            raise ValueError(
+                f"Query has {query.shape[0]} dims, index has {self.dim}.")
+        return query
+
+    def exact(self, query, k=10, year=None, cluster=None) -> list[tuple[float, str]]:
+        """Brute-force top-k (score, pmid); the recall baseline."""
+        with self._lock:
+            if not self.pmids:
+                return []
+            query = self._prepare(query)
+            mask = self._mask(year, cluster)
+            return self._top_k(None if mask is None else np.flatnonzero(mask), query, k)
+
+    def search(self, query, k=10, nprobe=DEFAULT_NPROBE, year=None, cluster=None) -> list[tuple[float, str]]:
+        """Approximate top-k (cosine similarity, pmid), best first."""
+        with self._lock:
+            if not self.pmids:
+                return []
+            query = self._prepare(query)
+            mask = self._mask(year, cluster)
+            nprobe = max(1, nprobe)
+            if mask is not None:
+                allowed = int(mask.sum())
+                if allowed <= max(EXACT_SCAN_THRESHOLD, k):
+                    return self._top_k(np.flatnonzero(mask), query, k)
+                # Probe 1/selectivity more lists: same number of scored rows
+                # as an unfiltered query, and enough survivors to fill top-k
+                nprobe = int(np.ceil(nprobe * len(self.pmids) / allowed))
+
+            lists = self._inverted_lists()
+            nprobe = min(nprobe, self.nlist)
+            probe = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+            rows = np.concatenate([lists[i] for i in probe])
+            if mask is not None:
+                rows = rows[mask[rows]]
+            return self._top_k(rows, query, k)
+
+
+# Process-wide ANN index
+ann_index = IVFIndex()
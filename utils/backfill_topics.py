@@ -0,0 +1,51 @@
+# utils/backfill_topics.py
+"""
+Tag the existing corpus with topics from `topic_definitions`.
+
+Run after adding or editing a topic row (no code change needed):
+    python -m utils.backfill_topics [--batch-size 1000] [--after-pmid PMID]
+
+Batches run in pmid order; an interrupted run prints the last finished
+pmid, and --after-pmid resumes from there.
+"""
+from utils.db import supabase
+import argparse
+import time
+
+BATCH_SIZE = 1000
+
+
+def backfill_topics(batch_size: int = BATCH_SIZE, after_pmid: str = ""):
+    started = time.perf_counter()
+    after, batches, updated = after_pmid or "", 0, 0
+    if after:
+        print(f"⏩ Resuming after pmid {after}")
+
+    try:
+        while True:
+            res = supabase.rpc(
+                "backfill_paper_topics", {"batch_size": batch_size, "after_pmid": after}
+            ).execute()
+            row = (res.data or [{}])[0]
+            if not row.get("last_pmid"):
+                break
+            after = row["last_pmid"]
+            batches += 1
+            updated += row.get("updated") or 0
+            print(f"🏷️  Batch {batches}: {row.get('updated', 0)} re-tagged (through {after})")
+    except (Exception, KeyboardInterrupt):
+        if after:
+            print(f"❌ Stopped; resume with --after-pmid {after}")
+        raise
+
+    print(f"✅ Topic backfill complete: {updated} papers updated in "
+          f"{time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-tag papers with topics from topic_definitions")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--after-pmid", default="",
+                        help="resume: only papers with a pmid after this one")
+    args = parser.parse_args()
+    backfill_topics(args.batch_size, args.after_pmid)
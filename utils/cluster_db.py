@@ -0,0 +1,127 @@
+# utils/cluster_db.py
+"""
+Open ME/CFS — Subtype Cluster Jobs
+----------------------------------
+Batch refit (recluster) and incremental placement (place_paper) of the
+UMAP + HDBSCAN model in utils.clustering, written back to
+papers.cluster / umap_x / umap_y and subtype_clusters.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from utils.db import supabase, iter_rows
+from utils.ann_index import ann_index, parse_embedding
+from utils.vector_store import vector_store
+from utils.vector_db import load_ann_index, load_vector_store, index_embeddings
+from utils.search_db import load_search_index
+from utils.indexing import index_paper
+from utils.clustering import (cluster_model, fit_clusters, cluster_keywords,
+                              DEFAULT_PATH as CLUSTER_MODEL_PATH, PLACE_NEIGHBORS)
+from utils.generate_embeddings import MODEL, paper_text
+from utils.openai import client
+
+# Rows per bulk write of cluster assignments
+CLUSTER_WRITE_CHUNK = 500
+
+
+def load_cluster_model():
+    """Load (or reload after a new batch fit) the fitted clustering model, if any."""
+    if os.path.exists(CLUSTER_MODEL_PATH):
+        mtime = os.path.getmtime(CLUSTER_MODEL_PATH)
+        if not cluster_model.loaded or mtime > (cluster_model.mtime or 0):
+            cluster_model.load(CLUSTER_MODEL_PATH)
+    return cluster_model
+
+
+def recluster(min_cluster_size: int, n_neighbors: int, jobs: int = -1,
+              seed: int | None = None, concurrency: int = 4):
+    """
+    Batch job: fit UMAP + HDBSCAN on every stored embedding, save the model,
+    then bulk-write papers.cluster / umap_x / umap_y and subtype_clusters.
+    """
+    started = time.perf_counter()
+    index = load_ann_index()
+    pmids, matrix = list(index.pmids), index.vectors
+    print(f"🧬 Fitting UMAP + HDBSCAN on {len(pmids)} embeddings…")
+    coords, labels = fit_clusters(matrix, min_cluster_size, n_neighbors, jobs=jobs, seed=seed)
+    cluster_model.set(pmids, matrix, coords, labels)
+    cluster_model.save(CLUSTER_MODEL_PATH)
+    print(f"🧬 {cluster_model.n_clusters} clusters, {int((labels < 0).sum())} noise papers "
+          f"({time.perf_counter() - started:.1f}s)")
+
+    titles = {str(p["pmid"]): p.get("title") for p in iter_rows("papers", "pmid, title")}
+    rows = [
+        {"pmid": pmid, "cluster": int(label) if label >= 0 else None,
+         "umap_x": float(xy[0]), "umap_y": float(xy[1])}
+        for pmid, xy, label in zip(pmids, coords, labels)
+        if pmid in titles
+    ]
+    # Papers without an embedding keep no stale position from an earlier fit
+    fitted = set(pmids)
+    rows += [{"pmid": pmid, "cluster": None, "umap_x": None, "umap_y": None}
+             for pmid in titles if pmid not in fitted]
+    chunks = [rows[i:i + CLUSTER_WRITE_CHUNK] for i in range(0, len(rows), CLUSTER_WRITE_CHUNK)]
+
+    def write(chunk):
+        # Only the cluster columns; an upsert would also rewrite title
+        return supabase.rpc("set_paper_clusters", {"p_rows": chunk}).execute().data or 0
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        changed = sum(pool.map(write, chunks))
+
+    keywords = cluster_keywords([titles[r["pmid"]] or "" for r in rows],
+                                [-1 if r["cluster"] is None else r["cluster"] for r in rows])
+    clusters = [
+        {"cluster_num": c, "cluster_label": " / ".join(keywords.get(c, [])[:3]) or f"Cluster {c}",
+         "keywords": keywords.get(c, []), "cluster_summary": None}
+        for c in range(cluster_model.n_clusters)
+    ]
+    if clusters:
+        # Numbering changes on every fit, so earlier labels/summaries no longer apply
+        supabase.table("subtype_clusters").upsert(clusters, on_conflict="cluster_num").execute()
+    supabase.table("subtype_clusters").delete().gte(
+        "cluster_num", cluster_model.n_clusters).execute()
+
+    load_search_index(force=True)
+    print(f"✅ Wrote {len(rows)} paper positions ({changed} changed) and {len(clusters)} clusters "
+          f"in {time.perf_counter() - started:.1f}s.")
+
+
+def place_paper(paper: dict):
+    """
+    Incremental path for a newly synced paper: embed it (if needed), then
+    take its map position and cluster from the fitted model — no refit.
+    Returns the written {cluster, umap_x, umap_y}, or None without a model
+    or when the paper is already placed.
+    """
+    model = load_cluster_model()
+    if not model.loaded or paper.get("umap_x") is not None:
+        return None
+
+    vector = parse_embedding(paper.get("embedding"))
+    if vector is None:
+        text = paper_text(paper)
+        if not text:
+            return None
+        vector = np.asarray(
+            client.embeddings.create(model=MODEL, input=text).data[0].embedding,
+            dtype=np.float32)
+
+    load_ann_index(build=False)
+    if ann_index.loaded:
+        neighbours = ann_index.search(vector, k=PLACE_NEIGHBORS)
+    elif load_vector_store().loaded:
+        neighbours = vector_store.search(vector, k=PLACE_NEIGHBORS)
+    else:
+        neighbours = []
+    placed = model.assign(vector, neighbours)
+
+    supabase.table("papers").update(
+        {**placed, "embedding": vector.tolist()}).eq("pmid", paper["pmid"]).execute()
+    index_embeddings([{**paper, **placed, "embedding": vector}])
+    index_paper({**paper, **placed})
+    return placed
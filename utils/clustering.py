@@ -0,0 +1,249 @@
+# utils/clustering.py
+"""
+Open ME/CFS — Subtype Clustering
+--------------------------------
+Batch: UMAP + HDBSCAN over `papers.embedding`.
+
+  - one UMAP projects to a low-dimensional space for HDBSCAN, a second to
+    the 2-D map (`umap_x` / `umap_y`); both run on every core (numba)
+  - clusters are renumbered by size (0 = largest); HDBSCAN noise → no cluster
+  - the fitted model (pmids, map positions, labels, cluster centroids in
+    embedding space) is saved to data/cluster_model.npz
+
+Incremental: a new paper is placed without refitting. Its map position is
+the similarity-weighted mean of its nearest fitted papers (how UMAP's own
+`transform` initialises new points), and it joins the cluster with the
+nearest centroid unless it is further out than that cluster's members.
+
+umap-learn and hdbscan are only needed by the batch job, not the API:
+    pip install umap-learn hdbscan
+    python -m utils.clustering [--min-cluster-size 15] [--jobs -1]
+"""
+
+import os
+import threading
+from collections import Counter
+
+import numpy as np
+
+from utils.search_index import tokenize
+
+# UMAP / HDBSCAN defaults
+N_NEIGHBORS = 15
+CLUSTER_DIMS = 10
+MIN_CLUSTER_SIZE = 15
+
+# Fitted neighbours averaged when placing a new paper
+PLACE_NEIGHBORS = 15
+
+# A new paper less similar to a centroid than this share of its members is noise
+RADIUS_PERCENTILE = 5
+
+KEYWORDS_PER_CLUSTER = 8
+
+DEFAULT_PATH = os.getenv(
+    "CLUSTER_MODEL_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                 "data", "cluster_model.npz"),
+)
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "by", "for", "from", "in", "into", "is",
+    "of", "on", "or", "the", "to", "with", "without", "after", "among", "between",
+    "during", "its", "their", "this", "that", "was", "were", "be", "vs", "versus",
+    "study", "patients", "patient", "chronic", "fatigue", "syndrome", "me", "cfs",
+    "myalgic", "encephalomyelitis", "encephalopathy", "1", "2", "19",
+}
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+# ------------------------------------------------------------
+# 🧪 Batch fit (optional dependencies)
+# ------------------------------------------------------------
+def fit_clusters(matrix: np.ndarray, min_cluster_size: int = MIN_CLUSTER_SIZE,
+                 n_neighbors: int = N_NEIGHBORS, cluster_dims: int = CLUSTER_DIMS,
+                 jobs: int = -1, seed: int | None = None):
+    """
+    UMAP + HDBSCAN → (coords float32 n×2, labels int32 n; -1 = noise).
+    A fixed `seed` makes UMAP reproducible but single-threaded.
+    """
+    try:
+        import hdbscan
+        import umap
+    except ImportError as e:
+        raise RuntimeError(
+            "Clustering needs umap-learn and hdbscan: pip install umap-learn hdbscan"
+        ) from e
+
+    reduced = umap.UMAP(
+        n_components=cluster_dims, n_neighbors=n_neighbors, min_dist=0.0,
+        metric="cosine", n_jobs=jobs, random_state=seed,
+    ).fit_transform(matrix)
+    coords = umap.UMAP(
+        n_components=2, n_neighbors=n_neighbors, min_dist=0.1,
+        metric="cosine", n_jobs=jobs, random_state=seed,
+    ).fit_transform(matrix)
+    labels = hdbscan.HDBSCAN(
+        min_cluster_size=min_cluster_size, metric="euclidean",
+        core_dist_n_jobs=jobs,
+    ).fit_predict(reduced)
+    return coords.astype(np.float32), renumber_by_size(labels)
+
+
+def renumber_by_size(labels) -> np.ndarray:
+    """Relabel clusters 0..k-1 from largest to smallest; noise stays -1."""
+    labels = np.asarray(labels)
+    counts = Counter(int(l) for l in labels if l >= 0)
+    order = {old: new for new, (old, _) in enumerate(
+        sorted(counts.items(), key=lambda kv: (-kv[1], kv[0])))}
+    return np.asarray([order.get(int(l), -1) for l in labels], dtype=np.int32)
+
+
+def cluster_keywords(titles: list[str], labels, k: int = KEYWORDS_PER_CLUSTER) -> dict[int, list[str]]:
+    """Top terms per cluster by class-based TF-IDF over paper titles."""
+    per_cluster: dict[int, Counter] = {}
+    for title, label in zip(titles, labels):
+        if label < 0:
+            continue
+        terms = [t for t in tokenize(title) if t not in _STOPWORDS and len(t) > 2]
+        per_cluster.setdefault(int(label), Counter()).update(terms)
+    if not per_cluster:
+        return {}
+
+    df = Counter()
+    for counts in per_cluster.values():
+        df.update(counts.keys())
+    n = len(per_cluster)
+    out = {}
+    for label, counts in per_cluster.items():
+        total = sum(counts.values()) or 1
+        scored = sorted(
+            counts.items(),
+            key=lambda kv: (-(kv[1] / total) * np.log(1 + n / df[kv[0]]), kv[0]))
+        out[label] = [term for term, _ in scored[:k]]
+    return out
+
+
+# ------------------------------------------------------------
+# 🧭 Fitted model (numpy only)
+# ------------------------------------------------------------
+class ClusterModel:
+    """Map positions, labels and cluster centroids from the last batch fit."""
+
+    def __init__(self):
+        self.pmids: list[str] = []
+        self.rows: dict[str, int] = {}
+        self.coords = np.zeros((0, 2), dtype=np.float32)
+        self.labels = np.zeros(0, dtype=np.int32)
+        self.centroids = np.zeros((0, 0), dtype=np.float32)
+        self.centroid_coords = np.zeros((0, 2), dtype=np.float32)
+        self.radius = np.zeros(0, dtype=np.float32)
+        self.loaded = False
+        self.mtime = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.pmids)
+
+    @property
+    def n_clusters(self) -> int:
+        return len(self.centroids)
+
+    def set(self, pmids: list[str], matrix: np.ndarray, coords: np.ndarray, labels: np.ndarray):
+        """Adopt a fit: centroids and radii are computed from the member embeddings."""
+        matrix = _normalize(np.asarray(matrix, dtype=np.float32))
+        labels = np.asarray(labels, dtype=np.int32)
+        coords = np.asarray(coords, dtype=np.float32)
+        k = int(labels.max()) + 1 if len(labels) and labels.max() >= 0 else 0
+
+        dim = matrix.shape[1] if matrix.ndim == 2 else 0
+        centroids = np.zeros((k, dim), dtype=np.float32)
+        centroid_coords = np.zeros((k, 2), dtype=np.float32)
+        radius = np.zeros(k, dtype=np.float32)
+        for c in range(k):
+            members = labels == c
+            centroids[c] = _normalize(matrix[members].mean(axis=0))
+            centroid_coords[c] = coords[members].mean(axis=0)
+            radius[c] = np.percentile(matrix[members] @ centroids[c], RADIUS_PERCENTILE)
+
+        with self._lock:
+            self.pmids = [str(p) for p in pmids]
+            self.rows = {p: i for i, p in enumerate(self.pmids)}
+            self.coords, self.labels = coords, labels
+            self.centroids, self.centroid_coords, self.radius = centroids, centroid_coords, radius
+            self.loaded = True
+
+    def save(self, path: str = DEFAULT_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, pmids=np.asarray(self.pmids, dtype=str), coords=self.coords,
+                 labels=self.labels, centroids=self.centroids,
+                 centroid_coords=self.centroid_coords, radius=self.radius)
+        os.replace(tmp, path)
+        self.mtime = os.path.getmtime(path)
+
+    def load(self, path: str = DEFAULT_PATH):
+        mtime = os.path.getmtime(path)
+        with np.load(path) as f:
+            pmids = [str(p) for p in f["pmids"]]
+            arrays = {k: f[k] for k in ("coords", "labels", "centroids",
+                                         "centroid_coords", "radius")}
+        with self._lock:
+            self.pmids = pmids
+            self.rows = {p: i for i, p in enumerate(pmids)}
+            for name, value in arrays.items():
+                setattr(self, name, value)
+            self.loaded = True
+            self.mtime = mtime
+
+    def assign(self, vector, neighbours: list[tuple[float, str]] = ()) -> dict:
+        """
+        Place one new (unfitted) vector → {"cluster", "umap_x", "umap_y"}.
+        `neighbours` are (similarity, pmid) hits from a vector index; fitted
+        ones among them set the map position.
+        """
+        vector = _normalize(np.asarray(vector, dtype=np.float32))
+        cluster = None
+        if self.n_clusters:
+            sims = self.centroids @ vector
+            best = int(np.argmax(sims))
+            if sims[best] >= self.radius[best]:
+                cluster = best
+
+        fitted = [(max(s, 0.0), self.rows[str(p)]) for s, p in neighbours
+                  if str(p) in self.rows][:PLACE_NEIGHBORS]
+        weights = np.asarray([w for w, _ in fitted], dtype=np.float32)
+        if fitted and weights.sum() > 0:
+            xy = (self.coords[[r for _, r in fitted]] * weights[:, None]).sum(axis=0) / weights.sum()
+        elif self.n_clusters:
+            xy = self.centroid_coords[cluster if cluster is not None else best]
+        else:
+            return {"cluster": None, "umap_x": None, "umap_y": None}
+        return {"cluster": cluster, "umap_x": float(xy[0]), "umap_y": float(xy[1])}
+
+    def status(self) -> dict:
+        return {"papers": len(self), "clusters": self.n_clusters,
+                "noise": int((self.labels < 0).sum()) if self.loaded else 0}
+
+
+# Process-wide fitted clustering model
+cluster_model = ClusterModel()
+
+
+if __name__ == "__main__":
+    import argparse
+    from utils.cluster_db import recluster
+
+    parser = argparse.ArgumentParser(description="Fit UMAP + HDBSCAN and write clusters")
+    parser.add_argument("--min-cluster-size", type=int, default=MIN_CLUSTER_SIZE)
+    parser.add_argument("--neighbors", type=int, default=N_NEIGHBORS)
+    parser.add_argument("--jobs", type=int, default=-1, help="CPU cores (-1 = all)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="reproducible but single-threaded UMAP")
+    args = parser.parse_args()
+    recluster(args.min_cluster_size, args.neighbors, args.jobs, args.seed)
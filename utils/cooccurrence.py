@@ -0,0 +1,214 @@
+# utils/cooccurrence.py
+"""
+Open ME/CFS — Co-occurrence Engine
+----------------------------------
+Sparse counts over paper summaries, kept up to date as summaries are
+written. Each paper counts once, with its newest summary: a re-summarised
+paper has its previous terms subtracted before the new ones are added.
+(The graph store keeps every summary row; only these counts are per paper.)
+
+    mechanism × biomarker     terms named in the same summary
+    biomarker × biomarker     (symmetric, diagonal left out)
+    mechanism × year          publication year of the summarised paper
+
+Each matrix is stored as row dicts in both directions (dictionary-of-keys
+by row), so an update is a handful of dict increments and a row lookup is
+O(row length). Marginals and the summary total give PMI and lift:
+
+    pmi(a, b)  = log( n_ab · N / (n_a · n_b) )
+    lift(a, b) = n_ab · N / (n_a · n_b)
+
+Ranked marginals (e.g. the most frequent biomarkers) are sorted once per
+change and then served by slicing.
+"""
+
+import heapq
+import math
+import threading
+from collections import Counter, defaultdict
+
+MATRICES = {
+    "mechanism_biomarker": ("mechanism", "biomarker"),
+    "biomarker_biomarker": ("biomarker", "biomarker"),
+    "mechanism_year": ("mechanism", "year"),
+}
+SCORES = ("count", "pmi", "lift")
+
+
+def _terms(values) -> list[str]:
+    out = []
+    for v in values or []:
+        v = v.strip() if isinstance(v, str) else ""
+        if v and v not in out:
+            out.append(v)
+    return out
+
+
+class SparseCounts:
+    """Count matrix as row dicts, with its transpose for column lookups."""
+
+    def __init__(self):
+        self.rows: dict[str, Counter] = defaultdict(Counter)
+        self.cols: dict[str, Counter] = defaultdict(Counter)
+
+    def add(self, a, b, n: int = 1):
+        self.rows[a][b] += n
+        self.cols[b][a] += n
+        if n < 0:
+            # Drop emptied cells so nnz and top-k never see zero counts
+            for outer, x, y in ((self.rows, a, b), (self.cols, b, a)):
+                if outer[x][y] <= 0:
+                    del outer[x][y]
+                    if not outer[x]:
+                        del outer[x]
+
+    def get(self, a, b) -> int:
+        row = self.rows.get(a)
+        return row.get(b, 0) if row else 0
+
+    def row(self, a, transpose: bool = False) -> Counter:
+        return (self.cols if transpose else self.rows).get(a) or Counter()
+
+    @property
+    def nnz(self) -> int:
+        return sum(len(r) for r in self.rows.values())
+
+
+class Cooccurrence:
+    """Thread-safe co-occurrence counts with PMI / lift / top-k queries."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.total = 0  # summaries counted (one per paper when keyed)
+        self.marginals = {"mechanism": Counter(), "biomarker": Counter(), "year": Counter()}
+        self.matrices = {name: SparseCounts() for name in MATRICES}
+        self._papers: dict[str, tuple] = {}  # pmid → (created_at, mechs, bios, year)
+        self._ranked: dict[str, list] = {}
+        self.loaded = False
+
+    def rebuild(self, summaries):
+        """
+        Replace every count from (mechanisms, biomarkers, year, pmid,
+        created_at) tuples; built aside and swapped in.
+        """
+        fresh = Cooccurrence()
+        for summary in summaries:
+            fresh.add_summary(*summary)
+        with self._lock:
+            self.total = fresh.total
+            self.marginals = fresh.marginals
+            self.matrices = fresh.matrices
+            self._papers = fresh._papers
+            self._ranked = {}
+            self.loaded = True
+
+    def _apply(self, mechs, bios, year, n: int):
+        """Add (n=1) or remove (n=-1) one summary's contribution."""
+        self.total += n
+        for axis, terms in (("mechanism", mechs), ("biomarker", bios), ("year", [year] if year else [])):
+            marginal = self.marginals[axis]
+            for t in terms:
+                marginal[t] += n
+                if marginal[t] <= 0:
+                    del marginal[t]
+        mb, bb, my = (self.matrices[name] for name in MATRICES)
+        for m in mechs:
+            for b in bios:
+                mb.add(m, b, n)
+            if year:
+                my.add(m, year, n)
+        for i, a in enumerate(bios):
+            for b in bios[i + 1:]:
+                bb.add(a, b, n)
+                bb.add(b, a, n)
+
+    def add_summary(self, mechanisms, biomarkers, year=None, pmid=None, created_at=None):
+        """
+        Count one summary. With `pmid`, it replaces that paper's earlier
+        summary; an older one (by `created_at`) than the counted one is ignored.
+        """
+        mechs, bios = _terms(mechanisms), _terms(biomarkers)
+        year = str(year) if year else None
+        created = str(created_at or "")
+        with self._lock:
+            if pmid:
+                pmid = str(pmid)
+                old = self._papers.get(pmid)
+                if old is not None:
+                    if created and old[0] and created < old[0]:
+                        return
+                    self._apply(*old[1:], -1)
+                self._papers[pmid] = (created, mechs, bios, year)
+            self._apply(mechs, bios, year, 1)
+            self._ranked.clear()
+
+    # --------------------------------------------------------
+    # 🔍 Queries
+    # --------------------------------------------------------
+    def count(self, axis: str, term) -> int:
+        return self.marginals[axis].get(str(term), 0)
+
+    def most_common(self, axis: str, limit: int) -> list[tuple[str, int]]:
+        """Top marginal counts (ties keep first-seen order, like Counter)."""
+        ranked = self._ranked.get(axis)
+        if ranked is None:
+            with self._lock:
+                ranked = self._ranked[axis] = self.marginals[axis].most_common()
+        return ranked[:limit]
+
+    def scores(self, matrix: str, a, b) -> dict:
+        """Joint count, PMI and lift for one cell (PMI/lift None when n_ab = 0)."""
+        row_axis, col_axis = MATRICES[matrix]
+        n_ab = self.matrices[matrix].get(str(a), str(b))
+        n_a, n_b = self.count(row_axis, a), self.count(col_axis, b)
+        if not n_ab or not n_a or not n_b:
+            return {"count": n_ab, "pmi": None, "lift": None}
+        lift = n_ab * self.total / (n_a * n_b)
+        return {"count": n_ab, "pmi": round(math.log(lift), 4), "lift": round(lift, 4)}
+
+    def top(self, matrix: str, term, k: int = 10, score: str = "count",
+            min_count: int = 1, transpose: bool = False) -> list[dict]:
+        """
+        Top-k partners of `term` in a matrix row (or column with `transpose`),
+        ranked by raw count, PMI or lift. `min_count` keeps PMI from being
+        dominated by one-off pairs.
+        """
+        if score not in SCORES:
+            raise ValueError(f"score must be one of {SCORES}")
+        row_axis, col_axis = MATRICES[matrix]
+        if transpose:
+            row_axis, col_axis = col_axis, row_axis
+        term = str(term)
+        n_a = self.count(row_axis, term)
+        with self._lock:
+            row = list(self.matrices[matrix].row(term, transpose).items())
+        if not row or not n_a:
+            return []
+
+        def entry(other, n_ab):
+            n_b = self.count(col_axis, other)
+            lift = n_ab * self.total / (n_a * n_b) if n_b else 0.0
+            return {"term": other, "count": n_ab,
+                    "pmi": round(math.log(lift), 4) if lift else None,
+                    "lift": round(lift, 4)}
+
+        candidates = [(other, n) for other, n in row if n >= min_count]
+        if score == "count":
+            best = heapq.nlargest(k, candidates, key=lambda x: (x[1], x[0]))
+            return [entry(o, n) for o, n in best]
+        scored = [entry(o, n) for o, n in candidates]
+        return heapq.nlargest(k, scored, key=lambda e: (e["lift"], e["count"]))
+
+    def status(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "summaries": self.total,
+            "nnz": {name: m.nnz for name, m in self.matrices.items()},
+        }
+
+
+# Process-wide co-occurrence counts
+cooccurrence = Cooccurrence()
@@ -1,8 +1,9 @@
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
+from supabase.lib.client_options import DEFAULT_HEADERS
 from dotenv import load_dotenv
-from functools import lru_cache
 from datetime import datetime
 from cachetools import TTLCache, cached
+import uuid
 import os
 
 # ------------------------------------------------------------
@@ -16,7 +17,14 @@ SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
     raise ValueError("Missing Supabase credentials.")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+# Tags this process's writes in public.store_changes, so utils.store_versions
+# can skip what this process has already applied in memory
+STORE_WRITER = uuid.uuid4().hex
+
+supabase: Client = create_client(
+    SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY,
+    options=ClientOptions(headers={**DEFAULT_HEADERS, "X-Store-Writer": STORE_WRITER}),
+)
 
 # ------------------------------------------------------------
 # ⚡ Cache Configuration
@@ -28,6 +36,29 @@ _search_cache = TTLCache(maxsize=200, ttl=30)
 # ------------------------------------------------------------
 # 📚 Paper Retrieval
 # ------------------------------------------------------------
+def infer_year(paper):
+    """Best-effort publication year from the various date keys we have seen."""
+    # Try direct keys first
+    for key in ("year", "publication_year", "date", "published", "pub_date"):
+        if paper.get(key):
+            try:
+                # Handle full dates like "2024-03-12"
+                return int(str(paper[key])[:4])
+            except Exception:
+                pass
+
+    # Fallback: check inside metadata (if nested)
+    metadata = paper.get("metadata") or {}
+    for key in ("year", "publication_year", "date"):
+        if metadata.get(key):
+            try:
+                return int(str(metadata[key])[:4])
+            except Exception:
+                pass
+
+    return None
+
+
 def get_papers(limit: int = 10, offset: int = 0, sort: str = "pmid", order: str = "asc"):
     """Fetch a paginated list of papers from Supabase"""
     query = supabase.table("papers").select(
@@ -35,27 +66,6 @@ def get_papers(limit: int = 10, offset: int = 0, sort: str = "pmid", order: str
     query = query.order(sort, desc=(order == "desc"))
     data = query.execute().data or []
 
-    def infer_year(paper):
-        # Try direct keys first
-        for key in ("year", "publication_year", "date", "published", "pub_date"):
-            if paper.get(key):
-                try:
-                    # Handle full dates like "2024-03-12"
-                    return int(str(paper[key])[:4])
-                except Exception:
-                    pass
-
-        # Fallback: check inside metadata (if nested)
-        metadata = paper.get("metadata") or {}
-        for key in ("year", "publication_year", "date"):
-            if metadata.get(key):
-                try:
-                    return int(str(metadata[key])[:4])
-                except Exception:
-                    pass
-
-        return None
-
     return [
         {
             **p,
@@ -65,6 +75,20 @@ def get_papers(limit: int = 10, offset: int = 0, sort: str = "pmid", order: str
     ]
 
 
+def iter_rows(table: str, columns: str = "*", key: str = "pmid", page_size: int = 1000):
+    """Stream every row of a table using keyset pagination on `key`."""
+    last = None
+    while True:
+        query = supabase.table(table).select(columns).order(key)
+        if last is not None:
+            query = query.gt(key, last)
+        rows = query.limit(page_size).execute().data or []
+        yield from rows
+        if len(rows) < page_size:
+            break
+        last = rows[-1][key]
+
+
 def get_paper_by_pmid(pmid: str):
     """Fetch a single paper and its summaries"""
     paper = supabase.table("papers").select(
@@ -78,116 +102,25 @@ def get_paper_by_pmid(pmid: str):
 
 
 # ------------------------------------------------------------
-# 🔍 Search (cached)
+# 🏷️ Topics (dictionary in topic_definitions, tags in papers.topics)
 # ------------------------------------------------------------
-@cached(_search_cache)
-def search_papers(q=None, limit=10, author=None, year=None):
-    """Simple full-text search over title, authors, and abstract"""
-    papers = get_papers(limit=1000)
-
-    if not q:
-        return papers[:limit]
-
-    q_lower = q.lower()
-    results = []
-
-    for p in papers:
-        title = p.get("title", "").lower()
-        authors = p.get("authors", [])
-        abstract = p.get("abstract", "").lower()
-
-        # normalize author list to string
-        if isinstance(authors, list):
-            authors_str = " ".join(authors).lower()
-        else:
-            authors_str = str(authors).lower()
-
-        if q_lower in title or q_lower in authors_str or q_lower in abstract:
-            results.append(p)
+_topic_cache = TTLCache(maxsize=1, ttl=300)
 
-    # Apply optional filters
-    if author:
-        results = [
-            p for p in results
-            if author.lower() in " ".join(p.get("authors", [])).lower()
-        ]
 
-    if year:
-        results = [p for p in results if str(p.get("year")) == str(year)]
+@cached(_topic_cache)
+def _load_topic_names() -> frozenset:
+    rows = supabase.table("topic_definitions").select(
+        "topic").execute().data or []
+    return frozenset(r["topic"] for r in rows)
 
-    return results[:limit]
 
-
-# ------------------------------------------------------------
-# 📊 Stats + Analytics
-# ------------------------------------------------------------
-@lru_cache(maxsize=1)
-def get_stats():
-    """Aggregate counts and trends for /stats"""
-    try:
-        papers = supabase.table("papers").select(
-            "year, authors").execute().data
-    except Exception:
-        papers = []
-
-    if not papers:
-        return {
-            "message": "No papers found",
-            "total_papers": 0,
-            "year_distribution": {},
-            "top_authors": [],
-            "updated": datetime.utcnow().isoformat(),
-        }
-
-    total_papers = len(papers)
-    year_counts, author_counts = {}, {}
-
-    for p in papers:
-        # Year distribution
-        year = p.get("year")
-        if year:
-            year_counts[year] = year_counts.get(year, 0) + 1
-
-        # Author frequency
-        authors = p.get("authors") or []
-        if isinstance(authors, list):
-            for a in authors:
-                author_counts[a] = author_counts.get(a, 0) + 1
-
-    top_authors = sorted(author_counts.items(),
-                         key=lambda x: x[1], reverse=True)[:10]
-
-    return {
-        "total_papers": total_papers,
-        "year_distribution": year_counts,
-        "top_authors": [{"name": a, "count": c} for a, c in top_authors],
-        "updated": datetime.utcnow().isoformat(),
-    }
-
-
-# ------------------------------------------------------------
-# 🧾 Metadata Endpoint Helper
-# ------------------------------------------------------------
-def get_metadata():
-    """Return basic dataset metadata summary (safe for CI)"""
+def get_topic_names() -> frozenset:
+    """Known topic keys (empty if the table can't be read; failures are not cached)"""
     try:
-        stats = get_stats()
-        if not stats or "message" in stats:
-            return {
-                "message": "No dataset metadata found. Try re-importing.",
-                "file_name": None,
-                "record_count": 0,
-            }
-
-        return {
-            "file_name": "mecfs_papers_summarized.json",
-            "source": "Supabase",
-            "record_count": stats.get("total_papers", 0),
-            "last_updated": stats.get("updated"),
-            "top_authors": stats.get("top_authors", []),
-        }
+        return _load_topic_names()
     except Exception as e:
-        return {"message": f"Metadata retrieval failed: {str(e)}"}
+        print(f"⚠️ Could not load topic_definitions: {e}")
+        return frozenset()
 
 
 # ------------------------------------------------------------
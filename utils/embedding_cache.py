@@ -0,0 +1,201 @@
+# utils/embedding_cache.py
+"""
+Open ME/CFS — Query Embedding Cache
+-----------------------------------
+Two-tier cache in front of the OpenAI embeddings call used by /semantic.
+
+  1. in-process LRU (hot queries, no I/O)
+  2. on-disk SQLite store (survives restarts, shared by workers)
+
+Keys are (model, normalized query text); vectors are stored as packed
+float32 (1536 dims → 6 KB). Both tiers are size-bounded: the LRU by
+entry count, the SQLite table by evicting least-recently-used rows.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+# In-process LRU size (entries)
+MEMORY_SIZE = 2048
+
+# On-disk row cap; trimmed back by 10% when exceeded
+DISK_SIZE = 100_000
+
+DEFAULT_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                 "data", "query_embeddings.sqlite3"),
+)
+
+
+def normalize_query(text: str) -> str:
+    """Case- and whitespace-insensitive cache key."""
+    return " ".join((text or "").lower().split())
+
+
+def pack(vector) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def unpack(blob: bytes) -> list[float]:
+    vec = array("f")
+    vec.frombytes(blob)
+    return vec.tolist()
+
+
+class EmbeddingCache:
+    """Thread-safe memory LRU + SQLite cache of query embeddings."""
+
+    def __init__(self, path: str | None = DEFAULT_PATH,
+                 memory_size: int = MEMORY_SIZE, disk_size: int = DISK_SIZE):
+        self.path = path
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._memory: OrderedDict[tuple, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._disk_rows = 0  # upper bound (replaces count too); recounted on trim
+
+    # --------------------------------------------------------
+    # 💾 SQLite tier
+    # --------------------------------------------------------
+    def _db(self):
+        """Open the store on first use; disk errors degrade to memory-only."""
+        if self._conn is None and self.path:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                conn = sqlite3.connect(self.path, check_same_thread=False)
+                conn.execute("pragma journal_mode=wal")
+                conn.execute(
+                    "create table if not exists query_embeddings ("
+                    " model text not null, query text not null,"
+                    " dims integer not null, vector blob not null,"
+                    " last_used real not null,"
+                    " primary key (model, query))"
+                )
+                conn.execute(
+                    "create index if not exists idx_query_embeddings_last_used"
+                    " on query_embeddings (last_used)")
+                self._disk_rows = conn.execute(
+                    "select count(*) from query_embeddings").fetchone()[0]
+                self._conn = conn
+            except sqlite3.Error as e:
+                print(f"⚠️ Embedding cache disk tier disabled: {e}")
+                self.path = None
+        return self._conn
+
+    def _disk_get(self, key: tuple):
+        conn = self._db()
+        if conn is None:
+            return None
+        row = conn.execute(
+            "select vector from query_embeddings where model = ? and query = ?",
+            key).fetchone()
+        if row is None:
+            return None
+        conn.execute(
+            "update query_embeddings set last_used = ? where model = ? and query = ?",
+            (time.time(), *key))
+        conn.commit()
+        return unpack(row[0])
+
+    def _disk_put(self, key: tuple, vector):
+        conn = self._db()
+        if conn is None:
+            return
+        cur = conn.execute(
+            "insert or replace into query_embeddings values (?, ?, ?, ?, ?)",
+            (*key, len(vector), pack(vector), time.time()))
+        self._disk_rows += cur.rowcount
+        if self._disk_rows > self.disk_size:
+            conn.execute(
+                "delete from query_embeddings where rowid in ("
+                " select rowid from query_embeddings order by last_used limit ?)",
+                (self._disk_rows - int(self.disk_size * 0.9),))
+            self._disk_rows = conn.execute(
+                "select count(*) from query_embeddings").fetchone()[0]
+        conn.commit()
+
+    # --------------------------------------------------------
+    # 🧠 Memory tier
+    # --------------------------------------------------------
+    def _remember(self, key: tuple, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    # --------------------------------------------------------
+    # 🔍 Public API
+    # --------------------------------------------------------
+    def get(self, text: str, model: str):
+        key = (model, normalize_query(text))
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return vector
+            try:
+                vector = self._disk_get(key)
+            except sqlite3.Error as e:
+                print(f"⚠️ Embedding cache read failed: {e}")
+                vector = None
+            if vector is not None:
+                self._remember(key, vector)
+                self.stats["disk_hits"] += 1
+                return vector
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, text: str, model: str, vector):
+        key = (model, normalize_query(text))
+        vector = list(vector)
+        with self._lock:
+            self._remember(key, vector)
+            try:
+                self._disk_put(key, vector)
+            except sqlite3.Error as e:
+                print(f"⚠️ Embedding cache write failed: {e}")
+
+    def get_or_embed(self, text: str, model: str, embed):
+        """
+        Cached vector for `text`, calling `embed` only on a miss — with the
+        normalised text, so every spelling sharing the key shares the vector.
+        """
+        vector = self.get(text, model)
+        if vector is None:
+            vector = embed(normalize_query(text))
+            self.put(text, model, vector)
+        return vector
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            conn = self._db()
+            if conn is not None:
+                conn.execute("delete from query_embeddings")
+                conn.commit()
+                self._disk_rows = 0
+
+    def status(self) -> dict:
+        lookups = sum(self.stats.values())
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        return {
+            **self.stats,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "memory_items": len(self._memory),
+            "memory_size": self.memory_size,
+            "disk_items": self._disk_rows if self._conn else None,
+            "disk_size": self.disk_size,
+            "path": self.path,
+        }
+
+
+# Process-wide query embedding cache
+query_embedding_cache = EmbeddingCache()
@@ -1,9 +1,30 @@
 # utils/generate_embeddings.py
-from openai import OpenAI
+"""
+Embed every paper that has no `embedding` yet.
+
+  - pages through un-embedded papers by pmid (keyset, no OFFSET)
+  - packs title + abstract texts into multi-input requests up to a token budget
+  - runs several requests concurrently under an adaptive (AIMD) rate limiter
+  - skips papers with neither title nor abstract (nothing to embed)
+  - writes each page back with one bulk upsert; the ANN snapshot is
+    rewritten every SNAPSHOT_EVERY_PAGES pages and once at the end
+  - checkpoints the last finished pmid, so a rerun resumes after a crash;
+    after a failed batch the checkpoint stays just before its first paper,
+    so a resumed run retries it (cleared once a pass completes)
+
+Run with:
+    python -m utils.generate_embeddings [--concurrency 4] [--reset]
+"""
+from openai import OpenAI, RateLimitError, APIConnectionError, APITimeoutError, InternalServerError
 from supabase import create_client
 from dotenv import load_dotenv
-import os
+from concurrent.futures import ThreadPoolExecutor
+from utils.vector_db import index_embeddings, save_ann_index
 from tqdm import tqdm
+import argparse
+import json
+import os
+import threading
 import time
 
 load_dotenv()
@@ -13,44 +34,233 @@ SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
-client = OpenAI(api_key=OPENAI_API_KEY)
+client = OpenAI(api_key=OPENAI_API_KEY, max_retries=0)  # retries handled below
 MODEL = "text-embedding-3-small"
 
+# Papers fetched (and upserted) per page
+PAGE_SIZE = 500
+
+# Pages between ANN snapshot writes (each write is the whole index)
+SNAPSHOT_EVERY_PAGES = 20
+
+# Per-request limits (API: 2048 inputs, 300k tokens; 8191 tokens per input)
+MAX_BATCH_INPUTS = 256
+BATCH_TOKEN_BUDGET = 100_000
+MAX_INPUT_TOKENS = 8000
+CHARS_PER_TOKEN = 3  # conservative estimate for English biomedical text
+
+CONCURRENCY = 4
+MAX_RETRIES = 6
+
+CHECKPOINT_PATH = os.getenv(
+    "EMBEDDINGS_CHECKPOINT_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                 "data", "embeddings_checkpoint.json"),
+)
+
+
+# ------------------------------------------------------------
+# 🚦 Adaptive rate limiter
+# ------------------------------------------------------------
+class AdaptiveRateLimiter:
+    """
+    Additive-increase / multiplicative-decrease request pacing.
+    Each success nudges the rate up; a 429 halves it.
+    """
+
+    def __init__(self, rate: float = 2.0, min_rate: float = 0.1, max_rate: float = 50.0,
+                 step: float = 0.25):
+        self.rate = rate  # requests per second
+        self.min_rate, self.max_rate, self.step = min_rate, max_rate, step
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + 1.0 / self.rate
+        if wait > 0:
+            time.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.step / self.rate)
+
+    def on_throttle(self, retry_after: float | None = None):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            pause = retry_after if retry_after else 1.0 / self.rate
+            self._next = max(self._next, time.monotonic() + pause)
+
+
+# ------------------------------------------------------------
+# 📦 Batching
+# ------------------------------------------------------------
+def paper_text(p: dict) -> str:
+    text = f"{p.get('title') or ''} {p.get('abstract') or ''}".strip()
+    return text[:MAX_INPUT_TOKENS * CHARS_PER_TOKEN]
+
 
-def generate_embeddings():
-    # Fetch papers without embeddings
-    papers = (
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def token_batches(papers: list[dict], budget: int = BATCH_TOKEN_BUDGET,
+                  max_inputs: int = MAX_BATCH_INPUTS) -> list[list[dict]]:
+    """Greedy split into request-sized batches by estimated token count."""
+    batches, current, tokens = [], [], 0
+    for p in papers:
+        n = estimate_tokens(paper_text(p))
+        if current and (tokens + n > budget or len(current) >= max_inputs):
+            batches.append(current)
+            current, tokens = [], 0
+        current.append(p)
+        tokens += n
+    if current:
+        batches.append(current)
+    return batches
+
+
+def embed_batch(batch: list[dict], limiter: AdaptiveRateLimiter) -> list[dict]:
+    """One multi-input embeddings request, retried with backoff on throttling."""
+    texts = [paper_text(p) for p in batch]
+    for attempt in range(MAX_RETRIES):
+        limiter.acquire()
+        try:
+            res = client.embeddings.create(model=MODEL, input=texts)
+            limiter.on_success()
+            vectors = sorted(res.data, key=lambda d: d.index)
+            return [{**p, "embedding": d.embedding} for p, d in zip(batch, vectors)]
+        except RateLimitError as e:
+            retry_after = e.response.headers.get("retry-after") if e.response else None
+            limiter.on_throttle(float(retry_after) if retry_after else None)
+        except (APIConnectionError, APITimeoutError, InternalServerError):
+            time.sleep(min(2 ** attempt, 30))
+    raise RuntimeError(f"Gave up after {MAX_RETRIES} attempts "
+                       f"({batch[0]['pmid']}…{batch[-1]['pmid']})")
+
+
+# ------------------------------------------------------------
+# 💾 Checkpoint
+# ------------------------------------------------------------
+def read_checkpoint() -> str:
+    try:
+        with open(CHECKPOINT_PATH) as f:
+            return json.load(f).get("last_pmid") or ""
+    except (OSError, ValueError):
+        return ""
+
+
+def write_checkpoint(last_pmid: str, embedded: int):
+    os.makedirs(os.path.dirname(CHECKPOINT_PATH), exist_ok=True)
+    tmp = CHECKPOINT_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"last_pmid": last_pmid, "embedded": embedded,
+                   "updated": time.strftime("%Y-%m-%dT%H:%M:%S")}, f)
+    os.replace(tmp, CHECKPOINT_PATH)
+
+
+# ------------------------------------------------------------
+# 🧠 Pipeline
+# ------------------------------------------------------------
+def fetch_page(after: str, page_size: int) -> list[dict]:
+    query = (
         supabase.table("papers")
-        .select("pmid, title, abstract")
+        .select("pmid, title, abstract, year, cluster")
         .is_("embedding", None)
-        .limit(50)  # run in batches
-        .execute()
-        .data
+        .order("pmid")
+        .limit(page_size)
     )
+    if after:
+        query = query.gt("pmid", after)
+    return query.execute().data or []
 
-    if not papers:
-        print("✅ All papers already have embeddings.")
-        return
 
-    print(f"🧠 Found {len(papers)} papers needing embeddings...")
+def generate_embeddings(page_size: int = PAGE_SIZE, concurrency: int = CONCURRENCY,
+                        reset: bool = False):
+    after = "" if reset else read_checkpoint()
+    if after:
+        print(f"↩️  Resuming after pmid {after} (use --reset to start over)")
 
-    for p in tqdm(papers, desc="Embedding papers"):
-        try:
-            text = f"{p['title']} {p['abstract'] or ''}"
-            embedding = client.embeddings.create(
-                model=MODEL, input=text
-            ).data[0].embedding
+    limiter = AdaptiveRateLimiter(rate=concurrency)
+    started = time.perf_counter()
+    embedded, failed, skipped, pages = 0, 0, 0, 0
+    resume = None  # checkpoint held back before the first failed paper
+    progress = tqdm(desc="Embedding papers", unit="paper")
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            while True:
+                papers = fetch_page(after, page_size)
+                if not papers:
+                    break
+
+                # No title or abstract: an embedding would only encode noise
+                embeddable = [p for p in papers if paper_text(p)]
+                skipped += len(papers) - len(embeddable)
+
+                written, failed_pmids = [], set()
+                batches = token_batches(embeddable)
+                futures = [pool.submit(embed_batch, b, limiter) for b in batches]
+                for batch, f in zip(batches, futures):
+                    try:
+                        rows = f.result()
+                    except Exception as e:
+                        print(f"❌ {e}")
+                        failed_pmids.update(p["pmid"] for p in batch)
+                        continue
+                    written.extend(rows)
+                    progress.update(len(rows))
+
+                if written:
+                    # One bulk upsert per page (title included: it is NOT NULL on insert)
+                    supabase.table("papers").upsert(
+                        [{"pmid": r["pmid"], "title": r["title"], "embedding": r["embedding"]}
+                         for r in written],
+                        on_conflict="pmid",
+                    ).execute()
+                    index_embeddings(written, save=False)
 
-            supabase.table("papers").update(
-                {"embedding": embedding}
-            ).eq("pmid", p["pmid"]).execute()
+                embedded += len(written)
+                failed += len(embeddable) - len(written)
+                if failed_pmids and resume is None:
+                    # Papers embedded since drop out of the un-embedded scan,
+                    # so resuming here only re-reads the failures
+                    i = next(i for i, p in enumerate(papers) if p["pmid"] in failed_pmids)
+                    resume = papers[i - 1]["pmid"] if i else after
+                after = papers[-1]["pmid"]
+                write_checkpoint(after if resume is None else resume, embedded)
+                pages += 1
+                if pages % SNAPSHOT_EVERY_PAGES == 0:
+                    save_ann_index()
 
-            time.sleep(0.2)  # avoid rate limits
-        except Exception as e:
-            print(f"❌ Error embedding {p['pmid']}: {e}")
+                elapsed = time.perf_counter() - started
+                progress.set_postfix(papers_per_s=f"{embedded / elapsed:.1f}",
+                                     rate=f"{limiter.rate:.1f}/s")
+    finally:
+        # Also on a crash: pages already written must not be missing from the snapshot
+        if embedded:
+            save_ann_index()
+        progress.close()
 
-    print("✅ Embedding batch complete.")
+    # Finished cleanly: the next run rescans from the start (new papers, past failures)
+    if os.path.exists(CHECKPOINT_PATH):
+        os.remove(CHECKPOINT_PATH)
+    elapsed = time.perf_counter() - started
+    if not embedded and not failed:
+        print(f"✅ All papers already have embeddings ({skipped} without text skipped).")
+    else:
+        print(f"✅ Embedded {embedded} papers in {elapsed:.1f}s "
+              f"({embedded / max(elapsed, 1e-9):.1f} papers/s), {failed} failed, "
+              f"{skipped} without text skipped.")
 
 
 if __name__ == "__main__":
-    generate_embeddings()
+    parser = argparse.ArgumentParser(description="Backfill papers.embedding")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--reset", action="store_true",
+                        help="ignore an interrupted run's checkpoint")
+    args = parser.parse_args()
+    generate_embeddings(args.page_size, args.concurrency, args.reset)
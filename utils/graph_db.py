@@ -0,0 +1,146 @@
+# utils/graph_db.py
+"""
+Open ME/CFS — Knowledge Graph Loaders
+-------------------------------------
+Fills the graph store (utils.graph_store) and co-occurrence counts
+(utils.cooccurrence) from paper_summaries + mechanism_edges, and writes
+paper_graph / mechanism_edges through their replace RPCs, applying the
+same edges in process.
+"""
+
+import threading
+
+from utils.db import supabase, iter_rows
+from utils.search_db import load_search_index, paper_year
+from utils.stats_db import schedule_stats_refresh
+from utils.graph_store import graph_store, DEFAULT_SOURCE
+from utils.cooccurrence import cooccurrence
+
+SUMMARY_GRAPH_COLUMNS = "id, paper_pmid, mechanisms, biomarkers, one_sentence, confidence, created_at"
+
+NODE_TABLES = ("mechanism_nodes", "biomarker_nodes")
+
+_graph_store_lock = threading.Lock()
+
+
+# ------------------------------------------------------------
+# 🕸️ Knowledge graph + co-occurrence (utils.graph_store, utils.cooccurrence)
+# ------------------------------------------------------------
+def load_node_ids(table: str) -> dict[str, str]:
+    """name → id for a whole node table."""
+    return {row["name"]: row["id"] for row in iter_rows(table, "id, name", key="id")}
+
+
+def load_graph_store(force: bool = False):
+    """
+    Read paper_summaries + mechanism_edges into the graph store and the
+    co-occurrence counts once (or again when forced). Both are built aside
+    and swapped in, so readers and writers keep using the old copy meanwhile.
+    """
+    if graph_store.loaded and not force:
+        return graph_store
+    load_search_index()  # paper years for mechanism × year
+    with _graph_store_lock:
+        if graph_store.loaded and not force:
+            return graph_store
+        summaries = list(iter_rows("paper_summaries", SUMMARY_GRAPH_COLUMNS, key="id"))
+        names = {table: {v: k for k, v in load_node_ids(table).items()} for table in NODE_TABLES}
+        edges = (
+            {
+                "paper_pmid": row.get("paper_pmid"),
+                "source": row.get("source"),
+                "mechanism": names["mechanism_nodes"].get(row.get("mechanism_id")),
+                "biomarker": names["biomarker_nodes"].get(row.get("biomarker_id")),
+            }
+            for row in iter_rows("mechanism_edges", "id, paper_pmid, source, mechanism_id, biomarker_id",
+                                 key="id")
+        )
+        graph_store.rebuild(summaries, edges)
+        cooccurrence.rebuild(
+            (row.get("mechanisms"), row.get("biomarkers"), paper_year(row.get("paper_pmid")),
+             row.get("paper_pmid"), row.get("created_at"))
+            for row in summaries
+        )
+    status = graph_store.status()
+    print(f"🕸️ Graph store built: {sum(status['nodes'].values())} nodes, "
+          f"{status['summaries']} summaries, {status['edges']} edges.")
+    return graph_store
+
+
+def load_cooccurrence():
+    """Co-occurrence counts (filled alongside the graph store)."""
+    load_graph_store()
+    return cooccurrence
+
+
+def index_graph_summary(summary: dict):
+    """Apply a newly written paper_summaries row to the graph store + co-occurrence."""
+    if graph_store.loaded:
+        graph_store.add_summary(summary)
+    if cooccurrence.loaded:
+        pmid = summary.get("paper_pmid")
+        cooccurrence.add_summary(summary.get("mechanisms"), summary.get("biomarkers"),
+                                 paper_year(pmid), pmid, summary.get("created_at"))
+
+
+def index_paper_graph(pmid: str, rows: list[dict], source: str = DEFAULT_SOURCE):
+    """Apply a paper's replaced `source` edges to the in-process graph."""
+    if graph_store.loaded:
+        graph_store.replace_paper_edges(pmid, rows, source)
+    schedule_stats_refresh()
+
+
+# ------------------------------------------------------------
+# 🧠 Edge writes (paper_graph + interned mechanism_edges)
+# ------------------------------------------------------------
+def paper_graph_edges(pmid: str, mechanisms: list, biomarkers: list) -> list[dict]:
+    """paper → mechanism and mechanism → biomarker edges for one summary, deduplicated."""
+    mechs = list(dict.fromkeys(m.strip() for m in mechanisms or [] if m and m.strip()))
+    bios = list(dict.fromkeys(b.strip() for b in biomarkers or [] if b and b.strip()))
+    edges = []
+    for m in mechs:
+        edges.append({"paper_pmid": pmid, "mechanism": m, "biomarker": None,
+                      "edge_type": "paper→mechanism"})
+        edges.extend({"paper_pmid": pmid, "mechanism": m, "biomarker": b,
+                      "edge_type": "mechanism→biomarker"} for b in bios)
+    return edges
+
+
+def replace_paper_graph(edges_by_pmid: dict[str, list[dict]]):
+    """
+    Make paper_graph hold exactly these edges for these papers, and
+    mechanism_edges the same edges (id-keyed, source 'summary'): one RPC,
+    so stale edges are deleted, new ones inserted and missing nodes
+    created in a single transaction.
+    Returns the number of newly inserted paper_graph edges.
+    """
+    if not edges_by_pmid:
+        return 0
+    res = supabase.rpc("replace_paper_graph", {
+        "p_pmids": list(edges_by_pmid),
+        "p_edges": [e for edges in edges_by_pmid.values() for e in edges],
+    }).execute()
+    for pmid, pmid_edges in edges_by_pmid.items():
+        index_paper_graph(pmid, pmid_edges)
+    return res.data or 0
+
+
+def replace_mechanism_edges(edges_by_pmid: dict[str, list[dict]], source: str = DEFAULT_SOURCE):
+    """
+    Make mechanism_edges hold exactly these (name-keyed, as built by
+    paper_graph_edges) edges for these papers from `source`. The RPC
+    creates missing nodes and swaps the edge sets in one transaction.
+    Returns the number of newly inserted edges.
+    """
+    if not edges_by_pmid:
+        return 0
+    res = supabase.rpc("replace_mechanism_edges", {
+        "p_source": source,
+        "p_pmids": list(edges_by_pmid),
+        "p_edges": [{"paper_pmid": e["paper_pmid"], "mechanism": e.get("mechanism"),
+                     "biomarker": e.get("biomarker")}
+                    for rows in edges_by_pmid.values() for e in rows],
+    }).execute()
+    for pmid, pmid_edges in edges_by_pmid.items():
+        index_paper_graph(pmid, pmid_edges, source)
+    return res.data or 0
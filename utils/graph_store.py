@@ -0,0 +1,390 @@
+# utils/graph_store.py
+"""
+Open ME/CFS — In-memory Knowledge Graph
+---------------------------------------
+One process-wide view of `paper_summaries` and `mechanism_edges` for the
+/graph, /graph/global and /biomarkers endpoints.
+
+  - node names are interned once: (kind, name) → int id
+  - every summary keeps its mechanism/biomarker ids in a CSR slice
+    (offsets + flat targets), appended in place as summaries arrive
+  - mechanism_edges are counted per (source, target, type) as the number
+    of papers asserting the edge (by any extraction source); CSR
+    adjacency (both directions) is derived from those counts on first
+    read after a change
+  - per-node mention counts are maintained incrementally
+  - one undirected CSR over every edge kind, each row sorted by weight,
+    backs k-hop neighbourhoods (degree-limited) and bidirectional-BFS
+    shortest paths
+
+Loaded from Supabase once (utils.graph_db.load_graph_store); writers update it
+through utils.indexing.index_summary / utils.graph_db.replace_mechanism_edges.
+"""
+
+import threading
+from array import array
+
+import numpy as np
+
+# Node kinds
+PAPER, MECHANISM, BIOMARKER = 0, 1, 2
+KIND_NAMES = ("paper", "mechanism", "biomarker")
+
+# Edge types (biomarker_id null / set on a mechanism_edges row)
+PAPER_MECH, MECH_BIO = 0, 1
+EDGE_NAMES = ("paper→mechanism", "mechanism→biomarker")
+
+# mechanism_edges.source written by /papers/summarize
+DEFAULT_SOURCE = "summary"
+
+# Nodes a shortest-path search may visit before giving up
+MAX_PATH_VISITED = 200_000
+
+
+def _clean(name) -> str:
+    return (name or "").strip() if isinstance(name, str) else ""
+
+
+class GraphStore:
+    """Interned, CSR-backed paper ↔ mechanism ↔ biomarker graph."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.names: list[str] = []
+            self.kinds = array("b")
+            self.mentions = array("q")  # summaries mentioning each node
+            self._ids: dict[tuple[int, str], int] = {}
+
+            # Summaries: one row each + CSR slice of term node ids
+            self.summary_paper = array("q")
+            self.summary_meta: list[dict] = []
+            self.summary_created: list[str] = []
+            self._summary_rows: dict[str, int] = {}
+            self._term_offsets = array("q", [0])
+            self._terms = array("q")
+            self._latest_by_paper: dict[int, int] = {}
+            self._recent: np.ndarray | None = None  # summary rows, newest first
+
+            # Edges: (src, dst, type) → supporting papers
+            self.edge_counts: dict[tuple[int, int, int], int] = {}
+            # pmid → extraction source → edge keys
+            self._paper_edges: dict[str, dict[str, set[tuple[int, int, int]]]] = {}
+            self._csr: dict[tuple[int, bool], tuple] = {}
+            self._adjacency: tuple | None = None
+            # Bumped on every write (and reload), for derived-view caches
+            self.version = getattr(self, "version", 0) + 1
+            self.loaded = False
+
+    def rebuild(self, summaries, edges):
+        """
+        Replace the whole graph from paper_summaries rows and (name-keyed)
+        mechanism_edges rows. Built aside and swapped in, so readers keep
+        the old graph until then.
+        """
+        fresh = GraphStore()
+        for row in summaries:
+            fresh.add_summary(row)
+        for row in edges:
+            fresh.add_edge(row)
+        with self._lock:
+            version = self.version
+            for name, value in vars(fresh).items():
+                if name != "_lock":
+                    setattr(self, name, value)
+            self.version = version + 1
+            self.loaded = True
+
+    def __len__(self):
+        return len(self.names)
+
+    # --------------------------------------------------------
+    # 🏷️ Nodes
+    # --------------------------------------------------------
+    def node_id(self, kind: int, name: str, create: bool = True) -> int | None:
+        key = (kind, name)
+        nid = self._ids.get(key)
+        if nid is None and create:
+            nid = self._ids[key] = len(self.names)
+            self.names.append(name)
+            self.kinds.append(kind)
+            self.mentions.append(0)
+        return nid
+
+    def find(self, kind: int, name: str) -> int | None:
+        return self._ids.get((kind, _clean(name)))
+
+    def nodes_of_kind(self, kind: int) -> np.ndarray:
+        return np.flatnonzero(np.frombuffer(self.kinds, dtype=np.int8) == kind) \
+            if len(self.kinds) else np.zeros(0, dtype=np.int64)
+
+    # --------------------------------------------------------
+    # ✍️ Writes
+    # --------------------------------------------------------
+    def add_summary(self, row: dict):
+        """Append one paper_summaries row (re-adding the same id is a no-op)."""
+        pmid = _clean(str(row.get("paper_pmid") or ""))
+        if not pmid:
+            return
+        key = str(row["id"]) if row.get("id") is not None else None
+        with self._lock:
+            if key is not None and key in self._summary_rows:
+                return
+            paper = self.node_id(PAPER, pmid)
+            terms = []
+            for kind, field in ((MECHANISM, "mechanisms"), (BIOMARKER, "biomarkers")):
+                for name in row.get(field) or []:
+                    name = _clean(name)
+                    if name:
+                        terms.append(self.node_id(kind, name))
+
+            idx = len(self.summary_paper)
+            if key is not None:
+                self._summary_rows[key] = idx
+            self.summary_paper.append(paper)
+            self.summary_meta.append({
+                "one_sentence": row.get("one_sentence") or "",
+                "confidence": row.get("confidence"),
+            })
+            created = str(row.get("created_at") or "")
+            self.summary_created.append(created)
+            self._terms.extend(terms)
+            self._term_offsets.append(len(self._terms))
+
+            self.mentions[paper] += 1
+            for t in terms:
+                self.mentions[t] += 1
+            latest = self._latest_by_paper.get(paper)
+            if latest is None or created >= self.summary_created[latest]:
+                self._latest_by_paper[paper] = idx
+            self._recent = None
+            self._adjacency = None
+            self.version += 1
+
+    def add_edge(self, row: dict):
+        """Count one mechanism_edges row (a paper counts once per edge, whatever the source)."""
+        pmid = _clean(str(row.get("paper_pmid") or ""))
+        mech, bio = _clean(row.get("mechanism")), _clean(row.get("biomarker"))
+        if not mech:
+            return
+        with self._lock:
+            m = self.node_id(MECHANISM, mech)
+            if bio:
+                key = (m, self.node_id(BIOMARKER, bio), MECH_BIO)
+            elif pmid:
+                key = (self.node_id(PAPER, pmid), m, PAPER_MECH)
+            else:
+                return
+            if pmid:
+                sources = self._paper_edges.setdefault(pmid, {})
+                keys = sources.setdefault(row.get("source") or DEFAULT_SOURCE, set())
+                if key in keys:
+                    return
+                keys.add(key)
+                if sum(key in k for k in sources.values()) > 1:
+                    return
+            self.edge_counts[key] = self.edge_counts.get(key, 0) + 1
+            self._csr.clear()
+            self._adjacency = None
+            self.version += 1
+
+    def replace_paper_edges(self, pmid: str, rows: list[dict], source: str = DEFAULT_SOURCE):
+        """Swap one paper's edges from `source` for `rows` (mirrors replace_mechanism_edges)."""
+        pmid = _clean(str(pmid))
+        with self._lock:
+            sources = self._paper_edges.get(pmid, {})
+            for key in sources.pop(source, ()):
+                if any(key in k for k in sources.values()):
+                    continue
+                left = self.edge_counts.get(key, 0) - 1
+                if left > 0:
+                    self.edge_counts[key] = left
+                else:
+                    self.edge_counts.pop(key, None)
+            self._csr.clear()
+            self._adjacency = None
+            self.version += 1
+            for row in rows:
+                self.add_edge({**row, "paper_pmid": pmid, "source": source})
+
+    # --------------------------------------------------------
+    # 🔍 Reads
+    # --------------------------------------------------------
+    def has_summary(self, summary_id) -> bool:
+        return str(summary_id) in self._summary_rows
+
+    def paper_sources(self, pmid: str) -> list[str]:
+        """Extraction sources with edges counted for a paper."""
+        with self._lock:
+            return list(self._paper_edges.get(_clean(str(pmid)), {}))
+
+    def summary_terms(self, idx: int) -> list[int]:
+        return self._terms[self._term_offsets[idx]:self._term_offsets[idx + 1]].tolist()
+
+    def recent_summaries(self, limit: int) -> list[int]:
+        """Summary rows, newest first (created_at desc)."""
+        with self._lock:
+            if self._recent is None:
+                created = np.asarray(self.summary_created, dtype=str)
+                self._recent = np.argsort(created, kind="stable")[::-1] \
+                    if len(created) else np.zeros(0, dtype=np.int64)
+            return self._recent[:limit].tolist()
+
+    def latest_summary(self, pmid: str) -> int | None:
+        paper = self.find(PAPER, pmid)
+        return None if paper is None else self._latest_by_paper.get(paper)
+
+    def csr(self, edge_type: int, reverse: bool = False):
+        """(offsets, targets, weights) over all node ids for one edge type."""
+        with self._lock:
+            cached = self._csr.get((edge_type, reverse))
+            if cached is not None and len(cached[0]) == len(self.names) + 1:
+                return cached
+            pairs = [(d, s, c) if reverse else (s, d, c)
+                     for (s, d, t), c in self.edge_counts.items() if t == edge_type]
+            src = np.fromiter((p[0] for p in pairs), dtype=np.int64, count=len(pairs))
+            dst = np.fromiter((p[1] for p in pairs), dtype=np.int64, count=len(pairs))
+            weight = np.fromiter((p[2] for p in pairs), dtype=np.int64, count=len(pairs))
+            order = np.lexsort((dst, src))
+            offsets = np.zeros(len(self.names) + 1, dtype=np.int64)
+            np.add.at(offsets, src + 1, 1)
+            cached = (np.cumsum(offsets), dst[order], weight[order])
+            self._csr[(edge_type, reverse)] = cached
+            return cached
+
+    def neighbors(self, node: int, edge_type: int, reverse: bool = False):
+        """[(neighbour id, edge count)] for one node."""
+        offsets, targets, weights = self.csr(edge_type, reverse)
+        if node >= len(offsets) - 1:
+            return []
+        lo, hi = offsets[node], offsets[node + 1]
+        return list(zip(targets[lo:hi].tolist(), weights[lo:hi].tolist()))
+
+    # --------------------------------------------------------
+    # 🧭 Traversal
+    # --------------------------------------------------------
+    def adjacency(self):
+        """
+        Undirected (offsets, targets, weights) over all edges: summary
+        mentions plus edge counts. Rows are sorted heaviest first,
+        so a degree-limited expansion is a prefix slice.
+        """
+        with self._lock:
+            if self._adjacency is not None:
+                return self._adjacency
+            n = len(self.names)
+            counts = np.diff(np.frombuffer(self._term_offsets, dtype=np.int64))
+            papers = np.repeat(np.frombuffer(self.summary_paper, dtype=np.int64)
+                               if len(self.summary_paper) else np.zeros(0, dtype=np.int64), counts)
+            terms = np.frombuffer(self._terms, dtype=np.int64) \
+                if len(self._terms) else np.zeros(0, dtype=np.int64)
+            edges = np.asarray([(s, d, c) for (s, d, _), c in self.edge_counts.items()],
+                               dtype=np.int64).reshape(-1, 3)
+
+            src = np.concatenate([papers, terms, edges[:, 0], edges[:, 1]])
+            dst = np.concatenate([terms, papers, edges[:, 1], edges[:, 0]])
+            weight = np.concatenate([np.ones(2 * len(papers), dtype=np.int64),
+                                     edges[:, 2], edges[:, 2]])
+            keep = src != dst
+            src, dst, weight = src[keep], dst[keep], weight[keep]
+
+            pairs, inverse = np.unique(src * max(n, 1) + dst, return_inverse=True)
+            weight = np.bincount(inverse, weights=weight).astype(np.int64)
+            src, dst = pairs // max(n, 1), pairs % max(n, 1)
+            order = np.lexsort((dst, -weight, src))
+            offsets = np.zeros(n + 1, dtype=np.int64)
+            np.add.at(offsets, src + 1, 1)
+            self._adjacency = (np.cumsum(offsets), dst[order], weight[order])
+            return self._adjacency
+
+    def degree(self, node: int) -> int:
+        offsets = self.adjacency()[0]
+        return int(offsets[node + 1] - offsets[node])
+
+    def neighborhood(self, node: int, hops: int = 1, max_degree: int | None = None,
+                     max_nodes: int | None = None):
+        """
+        BFS out to `hops`, following at most `max_degree` (heaviest) edges
+        per node and stopping at `max_nodes`.
+        Returns ({node: distance}, {(a, b): weight}, truncated).
+        """
+        offsets, targets, weights = self.adjacency()
+        dist, links, truncated = {node: 0}, {}, False
+        frontier = [node]
+        for d in range(1, hops + 1):
+            nxt = []
+            for u in frontier:
+                lo, hi = int(offsets[u]), int(offsets[u + 1])
+                if max_degree is not None and hi - lo > max_degree:
+                    hi, truncated = lo + max_degree, True
+                for v, w in zip(targets[lo:hi].tolist(), weights[lo:hi].tolist()):
+                    if v not in dist:
+                        if max_nodes is not None and len(dist) >= max_nodes:
+                            truncated = True
+                            continue
+                        dist[v] = d
+                        nxt.append(v)
+                    links.setdefault((min(u, v), max(u, v)), w)
+            frontier = nxt
+            if not frontier:
+                break
+        return dist, links, truncated
+
+    def shortest_path(self, source: int, target: int,
+                      max_visited: int = MAX_PATH_VISITED) -> list[int] | None:
+        """
+        Fewest-hop path via bidirectional BFS (the side with the smaller
+        frontier expands next). None if unreachable or `max_visited` is hit.
+        """
+        if source == target:
+            return [source]
+        offsets, targets, _ = self.adjacency()
+        parents = ({source: None}, {target: None})
+        depth = ({source: 0}, {target: 0})
+        frontiers = ([source], [target])
+
+        while frontiers[0] and frontiers[1]:
+            if len(depth[0]) + len(depth[1]) > max_visited:
+                return None
+            work = [sum(int(offsets[u + 1] - offsets[u]) for u in f) for f in frontiers]
+            side = 0 if work[0] <= work[1] else 1
+            seen, other = depth[side], depth[1 - side]
+            best, nxt = None, []
+            for u in frontiers[side]:
+                for v in targets[offsets[u]:offsets[u + 1]].tolist():
+                    if v in seen:
+                        continue
+                    seen[v] = seen[u] + 1
+                    parents[side][v] = u
+                    nxt.append(v)
+                    if v in other and (best is None or other[v] < other[best]):
+                        best = v
+            if best is not None:
+                path, v = [], best
+                while v is not None:
+                    path.append(v)
+                    v = parents[0][v]
+                path.reverse()
+                v = parents[1][best]
+                while v is not None:
+                    path.append(v)
+                    v = parents[1][v]
+                return path
+            frontiers = (nxt, frontiers[1]) if side == 0 else (frontiers[0], nxt)
+        return None
+
+    def status(self) -> dict:
+        kinds = np.frombuffer(self.kinds, dtype=np.int8) if len(self.kinds) else np.zeros(0)
+        return {
+            "loaded": self.loaded,
+            "nodes": {name: int((kinds == k).sum()) for k, name in enumerate(KIND_NAMES)},
+            "summaries": len(self.summary_paper),
+            "edges": len(self.edge_counts),
+        }
+
+
+# Process-wide knowledge graph
+graph_store = GraphStore()
@@ -0,0 +1,34 @@
+# utils/indexing.py
+"""
+Open ME/CFS — Write Hooks
+-------------------------
+One call per write that fans out to every in-process index the row
+touches; each index's own helper lives next to its loader.
+
+    index_paper(paper)      search + suggest, /stats
+    index_summary(summary)  suggest, graph store + co-occurrence, /stats
+
+Embeddings go through utils.vector_db.index_embeddings and graph edges
+through utils.graph_db.replace_paper_graph / replace_mechanism_edges.
+Rows written by other processes arrive through utils.store_versions with
+refresh_views=False (their writer refreshes the stats views).
+"""
+
+from utils.db import infer_year
+from utils.search_db import index_search, index_suggest_terms
+from utils.graph_db import index_graph_summary
+from utils.stats_db import index_stats_paper, index_stats_summary
+
+
+def index_paper(paper: dict, refresh_views: bool = True):
+    """Apply a synced/imported paper to the in-process indexes and drop stale results."""
+    paper = {**paper, "year": infer_year(paper)}
+    index_search(paper)
+    index_stats_paper(paper, refresh_views)
+
+
+def index_summary(summary: dict, refresh_views: bool = True):
+    """Apply a newly written paper_summaries row to the in-process indexes."""
+    index_suggest_terms(summary)
+    index_graph_summary(summary)
+    index_stats_summary(summary, refresh_views)
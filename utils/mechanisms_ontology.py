@@ -1,4 +1,33 @@
 # utils/mechanisms_ontology.py
+"""
+Open ME/CFS — Mechanism Vocabularies + Classifier
+-------------------------------------------------
+Two keyword tables map free-text mechanism names to groups:
+
+    MECH_GROUPS   hub families for /graph/global (substring match)
+    ONTOLOGY      curated categories (whole-word match)
+
+Both are compiled into one Aho-Corasick automaton, so classifying a
+string is a single left-to-right scan whatever the number of keywords.
+Within a vocabulary the first group (in table order) with any match wins,
+as the original nested keyword loops did. Results are memoised in a
+bounded LRU, and `classify_many` scans a whole batch in one pass.
+"""
+
+import threading
+from collections import deque
+
+from cachetools import LRUCache
+
+# Core ME/CFS mechanism families (hubs of /graph/global)
+MECH_GROUPS = {
+    "immune": ["immune", "inflammation", "cytokine", "t-cell", "autoimmune"],
+    "mitochondrial": ["mito", "oxidative", "redox", "energy", "metabolic"],
+    "vascular": ["endothelial", "vascular", "microclot", "blood flow"],
+    "autonomic": ["dysautonomia", "pots", "autonomic", "orthostatic"],
+    "neuroinflammation": ["neuro", "brain", "microglia", "neuroinflammation"],
+    "viral": ["viral", "persistent", "post-viral", "ebv", "hhv6"],
+}
 
 ONTOLOGY = {
     "Immune dysregulation": [
@@ -27,3 +56,134 @@ ONTOLOGY = {
         "metabolism", "glucose", "lipid", "pyruvate", "lactate"
     ]
 }
+
+# Separator between strings of a batch scan (never part of a keyword)
+_SEP = "\x00"
+
+MEMO_SIZE = 16384
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over lowercase keywords."""
+
+    def __init__(self, keywords: list[str]):
+        self.keywords = keywords
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.out: list[tuple[int, ...]] = [()]
+        for kid, word in enumerate(keywords):
+            state = 0
+            for ch in word:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                state = nxt
+            self.out[state] += (kid,)
+
+        # Breadth-first failure links; outputs inherit along them
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] += self.out[self.fail[nxt]]
+
+    def scan(self, text: str):
+        """Yield (end index, keyword id) for every occurrence in `text`."""
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for kid in out[state]:
+                yield i, kid
+
+
+class MechanismClassifier:
+    """Classify mechanism strings against several vocabularies in one scan."""
+
+    def __init__(self, vocabularies: dict[str, tuple[dict[str, list[str]], bool]],
+                 memo_size: int = MEMO_SIZE):
+        # vocabulary → (groups in priority order, whole-word matching)
+        self.vocabularies = list(vocabularies)
+        self.groups = {v: list(table) for v, (table, _) in vocabularies.items()}
+        keywords, self._meta = [], []
+        for vi, (vocab, (table, whole_words)) in enumerate(vocabularies.items()):
+            for gi, words in enumerate(table.values()):
+                for w in words:
+                    keywords.append(w.lower())
+                    self._meta.append((vi, gi, whole_words))
+        self.automaton = KeywordAutomaton(keywords)
+        self._memo = LRUCache(maxsize=memo_size)
+        self._lock = threading.Lock()
+
+    def _resolve(self, text: str, matches) -> tuple:
+        """Best (lowest) group index per vocabulary from (start, end, keyword id) hits."""
+        best = [None] * len(self.vocabularies)
+        for start, end, kid in matches:
+            vi, gi, whole_words = self._meta[kid]
+            if whole_words and (
+                    (start > 0 and text[start - 1].isalnum())
+                    or (end + 1 < len(text) and text[end + 1].isalnum())):
+                continue
+            if best[vi] is None or gi < best[vi]:
+                best[vi] = gi
+        return tuple(None if g is None else self.groups[v][g]
+                     for v, g in zip(self.vocabularies, best))
+
+    def classify(self, text: str) -> dict[str, str | None]:
+        """{vocabulary: group or None} for one string."""
+        return self.classify_many([text])[0]
+
+    def classify_many(self, texts) -> list[dict[str, str | None]]:
+        """
+        Classify a batch: memo hits are returned directly, the rest are
+        joined and scanned by the automaton in a single pass.
+        """
+        texts = [t or "" for t in texts]
+        results: dict[str, tuple] = {}
+        with self._lock:
+            for t in texts:
+                if t not in results and t in self._memo:
+                    results[t] = self._memo[t]
+        misses = [t for t in dict.fromkeys(texts) if t not in results]
+
+        if misses:
+            lowered = [t.lower().replace(_SEP, " ") for t in misses]
+            joined = _SEP.join(lowered)
+            starts, pos = [], 0
+            for t in lowered:
+                starts.append(pos)
+                pos += len(t) + 1
+            hits = [[] for _ in misses]
+            doc = 0
+            for end, kid in self.automaton.scan(joined):
+                while doc + 1 < len(starts) and end >= starts[doc + 1]:
+                    doc += 1
+                start = end - len(self.automaton.keywords[kid]) + 1
+                hits[doc].append((start - starts[doc], end - starts[doc], kid))
+            with self._lock:
+                for t, low, h in zip(misses, lowered, hits):
+                    results[t] = self._memo[t] = self._resolve(low, h)
+
+        return [dict(zip(self.vocabularies, results[t])) for t in texts]
+
+    def group(self, text: str, vocabulary: str, default: str | None = None) -> str | None:
+        return self.classify(text)[vocabulary] or default
+
+
+# Shared classifier: hub families (substring, as /graph/global always did)
+# and ontology categories (whole words, so "ros" does not match "across")
+mechanism_classifier = MechanismClassifier({
+    "hub": (MECH_GROUPS, False),
+    "ontology": (ONTOLOGY, True),
+})
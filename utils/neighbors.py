@@ -0,0 +1,147 @@
+# utils/neighbors.py
+"""
+Open ME/CFS — Precomputed "More like this" Lists
+------------------------------------------------
+Exact top-k neighbour lists for every paper, computed with a blocked
+matrix multiply (one `block × n` similarity slab in memory at a time).
+
+Each list is stored with a digest of the vector it was computed from, so
+/papers/{pmid}/similar can tell when a paper's embedding has changed and
+the precomputed list no longer applies.
+
+Precompute with:
+    python -m utils.neighbors [--k 20]
+"""
+
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+
+# Neighbours kept per paper
+K = 20
+
+# Query rows per matmul block (block × n float32 scores)
+BLOCK = 1024
+
+DEFAULT_PATH = os.getenv(
+    "NEIGHBORS_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                 "data", "neighbors.npz"),
+)
+
+
+def digest(vector) -> int:
+    """64-bit fingerprint of a vector's float32 bytes."""
+    raw = np.ascontiguousarray(vector, dtype=np.float32).tobytes()
+    return int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), "little")
+
+
+def topk_neighbors(matrix: np.ndarray, k: int = K, block: int = BLOCK, progress=None):
+    """
+    Exact k nearest rows (by inner product) for every row, self excluded.
+    Returns (indices int32 n×k, scores float32 n×k), best first.
+    """
+    n = len(matrix)
+    k = min(k, max(n - 1, 0))
+    idx = np.zeros((n, k), dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float32)
+    if not k:
+        return idx, scores
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        sims = matrix[start:stop] @ matrix.T
+        sims[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        idx[start:stop] = np.take_along_axis(top, order, axis=1)
+        scores[start:stop] = np.take_along_axis(top_scores, order, axis=1)
+        if progress:
+            progress(stop, n)
+    return idx, scores
+
+
+class NeighborLists:
+    """Precomputed neighbour lists keyed by pmid (loaded from an .npz)."""
+
+    def __init__(self):
+        self.pmids: list[str] = []
+        self.rows: dict[str, int] = {}
+        self.loaded = False
+        self.mtime = None
+        self._idx = np.zeros((0, 0), dtype=np.int32)
+        self._scores = np.zeros((0, 0), dtype=np.float32)
+        self._digests = np.zeros(0, dtype=np.uint64)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.pmids)
+
+    @property
+    def k(self) -> int:
+        return self._idx.shape[1] if self._idx.ndim == 2 else 0
+
+    def build(self, pmids: list[str], matrix: np.ndarray, k: int = K, progress=None):
+        idx, scores = topk_neighbors(matrix, k, progress=progress)
+        digests = np.asarray([digest(v) for v in matrix], dtype=np.uint64)
+        with self._lock:
+            self.pmids = [str(p) for p in pmids]
+            self.rows = {p: i for i, p in enumerate(self.pmids)}
+            self._idx, self._scores, self._digests = idx, scores, digests
+            self.loaded = True
+
+    def save(self, path: str = DEFAULT_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, pmids=np.asarray(self.pmids, dtype=str), idx=self._idx,
+                 scores=self._scores, digests=self._digests)
+        os.replace(tmp, path)
+        self.mtime = os.path.getmtime(path)
+
+    def load(self, path: str = DEFAULT_PATH):
+        mtime = os.path.getmtime(path)
+        with np.load(path) as f:
+            pmids = [str(p) for p in f["pmids"]]
+            idx, scores, digests = f["idx"], f["scores"], f["digests"]
+        with self._lock:
+            self.pmids = pmids
+            self.rows = {p: i for i, p in enumerate(pmids)}
+            self._idx, self._scores, self._digests = idx, scores, digests
+            self.loaded = True
+            self.mtime = mtime
+
+    def get(self, pmid, vector_digest: int, limit: int) -> list[tuple[float, str]] | None:
+        """Stored neighbours, or None if missing, too short, or computed from another vector."""
+        row = self.rows.get(str(pmid))
+        if row is None or limit > self.k or int(self._digests[row]) != vector_digest:
+            return None
+        return [(float(s), self.pmids[i])
+                for i, s in zip(self._idx[row, :limit], self._scores[row, :limit])]
+
+
+# Process-wide precomputed neighbour lists
+neighbor_lists = NeighborLists()
+
+
+if __name__ == "__main__":
+    import argparse
+    from utils.vector_db import load_ann_index
+
+    parser = argparse.ArgumentParser(description="Precompute top-k similar papers")
+    parser.add_argument("--k", type=int, default=K)
+    args = parser.parse_args()
+
+    index = load_ann_index()
+    started = time.perf_counter()
+
+    def report(done, total):
+        print(f"\r🧮 {done}/{total} papers "
+              f"({done / (time.perf_counter() - started):.0f}/s)", end="", flush=True)
+
+    neighbor_lists.build(index.pmids, index.vectors, args.k, progress=report)
+    neighbor_lists.save(DEFAULT_PATH)
+    print(f"\n✅ Saved top-{args.k} neighbours for {len(neighbor_lists)} papers "
+          f"in {time.perf_counter() - started:.1f}s → {DEFAULT_PATH}")
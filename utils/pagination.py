@@ -0,0 +1,72 @@
+# utils/pagination.py
+"""
+Keyset (cursor) pagination helpers shared by /papers and /papers-sb.
+
+A cursor is an opaque base64url token holding the last row's sort value
+plus its pmid as a tiebreaker. The next page is then "rows after
+(value, pmid)" in `sort, pmid` order. That is an index range scan
+(see 08_papers_keyset_indexes.sql) instead of OFFSET's scan-and-discard,
+and concurrent inserts cannot shift rows between pages.
+
+NULLs sort last when descending and first when ascending, so a single
+`(col desc nulls last, pmid desc)` index serves both directions.
+"""
+
+import base64
+import json
+
+# Columns that can drive keyset pagination (pmid is always the tiebreaker)
+SORTABLE = ("year", "pmid", "title")
+
+
+def encode_cursor(sort: str, order: str, row: dict) -> str:
+    payload = {"s": sort, "o": order, "v": row.get(sort), "p": row.get("pmid")}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, sort: str, order: str):
+    """Return (value, pmid) for `token`; ValueError if malformed or for another sort."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        value, pmid = payload["v"], payload["p"]
+    except Exception:
+        raise ValueError("Malformed cursor.")
+    if payload.get("s") != sort or payload.get("o") != order or not pmid:
+        raise ValueError("Cursor does not match the requested sort/order.")
+    return value, pmid
+
+
+def _quote(value) -> str:
+    """PostgREST filter value, quoted so commas/parens in titles are safe."""
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def postgrest_keyset(sort: str, desc: bool, value, pmid: str,
+                     within: str | None = None) -> str:
+    """
+    `or=(…)` body selecting rows strictly after (value, pmid).
+    `within` ANDs another condition into every branch, so a route that
+    already uses `or=` (e.g. the `q` filter) can still send a single one.
+    """
+    op = "lt" if desc else "gt"
+    after_pmid = f"pmid.{op}.{_quote(pmid)}"
+    if sort == "pmid":
+        branches = [after_pmid]
+    elif value is None:
+        branches = [f"and({sort}.is.null,{after_pmid})"]
+        if not desc:
+            # ascending: NULLs came first, every non-NULL row is still ahead
+            branches.append(f"{sort}.not.is.null")
+    else:
+        branches = [
+            f"{sort}.{op}.{_quote(value)}",
+            f"and({sort}.eq.{_quote(value)},{after_pmid})",
+        ]
+        if desc:
+            branches.append(f"{sort}.is.null")
+    if within:
+        branches = [f"and({within},{b})" for b in branches]
+    return ",".join(branches)
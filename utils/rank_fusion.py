@@ -0,0 +1,31 @@
+# utils/rank_fusion.py
+"""
+Reciprocal Rank Fusion (RRF)
+----------------------------
+Merge ranked lists from different retrievers without calibrating their
+scores:  score(d) = Σ_r  w_r / (k + rank_r(d))   (rank is 1-based)
+
+k dampens the head of each list (60 is the usual default).
+"""
+
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(rankings: dict[str, list[str]],
+                           weights: dict[str, float] | None = None,
+                           k: int = RRF_K) -> list[tuple[str, float, dict[str, int]]]:
+    """
+    rankings: retriever name → ids ordered best-first
+    weights:  retriever name → weight (default 1.0)
+    Returns [(id, fused_score, {retriever: rank})] ordered best-first.
+    """
+    weights = weights or {}
+    scores: dict[str, float] = {}
+    ranks: dict[str, dict[str, int]] = {}
+    for name, ids in rankings.items():
+        w = weights.get(name, 1.0)
+        for rank, doc_id in enumerate(dict.fromkeys(ids), start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + w / (k + rank)
+            ranks.setdefault(doc_id, {})[name] = rank
+    fused = sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+    return [(doc_id, score, ranks[doc_id]) for doc_id, score in fused]
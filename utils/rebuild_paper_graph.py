@@ -0,0 +1,52 @@
+# utils/rebuild_paper_graph.py
+"""
+Rebuild `paper_graph` (and its id-keyed mirror in `mechanism_edges`)
+from each paper's latest summary.
+
+Uses the same edge builder and replace_paper_graph RPC as /summarize, in
+batches of papers per call, so edges are deduplicated and stale ones removed.
+Safe to re-run: unchanged edges are left in place.
+
+Run with:
+    python -m utils.rebuild_paper_graph [--batch-size 200]
+"""
+from utils.db import iter_rows
+from utils.graph_db import paper_graph_edges, replace_paper_graph
+import argparse
+import time
+
+BATCH_SIZE = 200
+
+
+def rebuild_paper_graph(batch_size: int = BATCH_SIZE):
+    started = time.perf_counter()
+
+    latest = {}
+    for row in iter_rows("paper_summaries", "id, paper_pmid, mechanisms, biomarkers, created_at",
+                         key="id"):
+        pmid = row.get("paper_pmid")
+        if pmid and (pmid not in latest
+                     or (row.get("created_at") or "") >= (latest[pmid].get("created_at") or "")):
+            latest[pmid] = row
+    print(f"🕸️ {len(latest)} summarized papers")
+
+    pmids = sorted(latest)
+    inserted = 0
+    for i in range(0, len(pmids), batch_size):
+        batch = {
+            pmid: paper_graph_edges(pmid, latest[pmid].get("mechanisms"), latest[pmid].get("biomarkers"))
+            for pmid in pmids[i:i + batch_size]
+        }
+        inserted += replace_paper_graph(batch)
+        print(f"🔗 {min(i + batch_size, len(pmids))}/{len(pmids)} papers "
+              f"({inserted} new edges)")
+
+    print(f"✅ paper_graph rebuilt for {len(pmids)} papers in "
+          f"{time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild paper_graph from paper summaries")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    rebuild_paper_graph(args.batch_size)
@@ -0,0 +1,220 @@
+# utils/scatter.py
+"""
+Open ME/CFS — Packed UMAP Scatter Encoding
+------------------------------------------
+Binary form of the /embeddings payload.
+
+Layout "OMCS" v1 (little-endian; every array starts 4-byte aligned, so a
+browser can wrap it in Float32Array / Int16Array / Uint32Array views
+without copying):
+
+    offset      type            field
+    0           char[4]         magic "OMCS"
+    4           uint16          version (1)
+    6           uint16          flags (0)
+    8           uint32          n (points)
+    12          float32[n]      x
+    12+4n       float32[n]      y
+    12+8n       int16[n]        cluster label (-1 = none), padded to 4 bytes
+    …           uint32[n+1]     pmid offsets into the string table
+    …           utf-8 bytes     pmid string table
+
+Points are dicts with pmid, cluster, umap_x, umap_y (the papers columns).
+
+`TilePyramid` is the level-of-detail index behind /embeddings/tiles: points
+are quantized onto a 2^16 × 2^16 grid over a square extent and sorted by
+Morton (Z-order) code, so every XYZ tile at any zoom is one contiguous
+slice of the sorted arrays (an implicit quadtree).
+"""
+
+import hashlib
+import struct
+
+import numpy as np
+
+BINARY_MEDIA_TYPE = "application/vnd.openmecfs.scatter"
+MAGIC = b"OMCS"
+VERSION = 1
+
+
+def encode_scatter(points: list[dict]) -> bytes:
+    """Pack points into the OMCS v1 layout documented above."""
+    n = len(points)
+    x = np.fromiter((p["umap_x"] for p in points), dtype="<f4", count=n)
+    y = np.fromiter((p["umap_y"] for p in points), dtype="<f4", count=n)
+    labels = np.fromiter(
+        (-1 if p.get("cluster") is None else p["cluster"] for p in points),
+        dtype="<i2", count=n)
+
+    pmids = [str(p["pmid"]).encode() for p in points]
+    offsets = np.zeros(n + 1, dtype="<u4")
+    offsets[1:] = np.cumsum([len(b) for b in pmids])
+
+    labels_bytes = labels.tobytes()
+    labels_bytes += b"\0" * (-len(labels_bytes) % 4)
+    return b"".join([
+        MAGIC, struct.pack("<HHI", VERSION, 0, n),
+        x.tobytes(), y.tobytes(), labels_bytes, offsets.tobytes(), b"".join(pmids),
+    ])
+
+
+def decode_scatter(data: bytes) -> list[dict]:
+    """Inverse of encode_scatter (reference for clients and tests)."""
+    if data[:4] != MAGIC:
+        raise ValueError("Not an OMCS payload.")
+    version, _, n = struct.unpack_from("<HHI", data, 4)
+    if version != VERSION:
+        raise ValueError(f"Unsupported OMCS version {version}.")
+    pos = 12
+    x = np.frombuffer(data, "<f4", n, pos)
+    y = np.frombuffer(data, "<f4", n, pos + 4 * n)
+    labels = np.frombuffer(data, "<i2", n, pos + 8 * n)
+    pos += 8 * n + 2 * n + (-2 * n % 4)
+    offsets = np.frombuffer(data, "<u4", n + 1, pos)
+    table = data[pos + 4 * (n + 1):]
+    return [
+        {
+            "id": table[offsets[i]:offsets[i + 1]].decode(),
+            "cluster_label": None if labels[i] == -1 else int(labels[i]),
+            "x": float(x[i]),
+            "y": float(y[i]),
+        }
+        for i in range(n)
+    ]
+
+
+# ------------------------------------------------------------
+# 🗺️ Level-of-detail tiles
+# ------------------------------------------------------------
+GRID_BITS = 16  # quantization per axis → deepest zoom
+MAX_ZOOM = GRID_BITS
+
+# Aggregate cells per tile side = 2^CELL_BITS (32 × 32)
+CELL_BITS = 5
+
+# Tiles holding at most this many points are sent point by point
+MAX_TILE_POINTS = 2000
+
+
+def _spread(v: np.ndarray) -> np.ndarray:
+    """Insert a zero bit between each of the low 16 bits (Morton helper)."""
+    v = v.astype(np.uint32) & 0xFFFF
+    v = (v | (v << 8)) & 0x00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F
+    v = (v | (v << 2)) & 0x33333333
+    v = (v | (v << 1)) & 0x55555555
+    return v
+
+
+def morton(qx: np.ndarray, qy: np.ndarray) -> np.ndarray:
+    return _spread(qx) | (_spread(qy) << 1)
+
+
+class TilePyramid:
+    """
+    XYZ tiles over the UMAP plane (tile y = 0 at the top, i.e. max umap_y).
+    Dense tiles come back as per-cell cluster counts, sparse ones as points.
+    """
+
+    def __init__(self, points: list[dict]):
+        n = len(points)
+        x = np.fromiter((p["umap_x"] for p in points), dtype=np.float64, count=n)
+        y = np.fromiter((p["umap_y"] for p in points), dtype=np.float64, count=n)
+        labels = np.fromiter(
+            (-1 if p.get("cluster") is None else p["cluster"] for p in points),
+            dtype=np.int32, count=n)
+
+        if n:
+            # Square extent, padded so the max point still falls inside the grid
+            span = max(x.max() - x.min(), y.max() - y.min()) or 1.0
+            span *= 1.0001
+            cx, cy = (x.max() + x.min()) / 2, (y.max() + y.min()) / 2
+        else:
+            span, cx, cy = 1.0, 0.0, 0.0
+        self.bounds = (cx - span / 2, cy - span / 2, cx + span / 2, cy + span / 2)
+        self.span = span
+
+        size = 1 << GRID_BITS
+        qx = np.clip(((x - self.bounds[0]) / span * size).astype(np.int64), 0, size - 1)
+        qy = np.clip(((self.bounds[3] - y) / span * size).astype(np.int64), 0, size - 1)
+        codes = morton(qx, qy)
+        order = np.argsort(codes, kind="stable")
+
+        self.codes = codes[order]
+        self.x, self.y, self.labels = x[order], y[order], labels[order]
+        self.pmids = [str(points[i]["pmid"]) for i in order]
+        self.version = self._digest()
+
+    def __len__(self):
+        return len(self.pmids)
+
+    def _digest(self) -> str:
+        h = hashlib.blake2b(digest_size=8)
+        for arr in (self.x, self.y, self.labels):
+            h.update(arr.tobytes())
+        h.update("\0".join(self.pmids).encode())
+        return h.hexdigest()
+
+    def tile_bounds(self, z: int, x: int, y: int) -> list[float]:
+        size = self.span / (1 << z)
+        left, top = self.bounds[0] + x * size, self.bounds[3] - y * size
+        return [left, top - size, left + size, top]
+
+    def _slice(self, z: int, x: int, y: int) -> slice:
+        shift = 2 * (GRID_BITS - z)
+        first = int(morton(np.array([x]), np.array([y]))[0]) << shift
+        last = first + (1 << shift)
+        lo, hi = np.searchsorted(self.codes, [first, last])
+        return slice(int(lo), int(hi))
+
+    def tile(self, z: int, x: int, y: int, max_points: int = MAX_TILE_POINTS) -> dict:
+        """One tile: {"mode": "points", points} or {"mode": "cells", cells}."""
+        if not 0 <= z <= MAX_ZOOM or not (0 <= x < 1 << z and 0 <= y < 1 << z):
+            raise ValueError(f"Tile {z}/{x}/{y} is outside the pyramid.")
+        rows = self._slice(z, x, y)
+        count = rows.stop - rows.start
+        out = {"z": z, "x": x, "y": y, "bounds": self.tile_bounds(z, x, y), "count": count}
+
+        if count <= max_points or z == MAX_ZOOM:
+            out["mode"] = "points"
+            out["points"] = [
+                {
+                    "id": self.pmids[i],
+                    "cluster_label": None if self.labels[i] == -1 else int(self.labels[i]),
+                    "x": float(self.x[i]),
+                    "y": float(self.y[i]),
+                }
+                for i in range(rows.start, rows.stop)
+            ]
+            return out
+
+        # Cell (cx, cy) inside the tile = the next 2·CELL_BITS Morton bits
+        bits = min(CELL_BITS, GRID_BITS - z)
+        shift = 2 * (GRID_BITS - z - bits)
+        cell = (self.codes[rows] >> shift) & ((1 << 2 * bits) - 1)
+        keys, counts = np.unique(
+            cell.astype(np.int64) << 32 | (self.labels[rows].astype(np.int64) & 0xFFFFFFFF),
+            return_counts=True)
+
+        cells: dict[int, dict] = {}
+        for key, c in zip(keys.tolist(), counts.tolist()):
+            code, label = key >> 32, np.int32(np.uint32(key & 0xFFFFFFFF))
+            entry = cells.get(code)
+            if entry is None:
+                cx = cy = 0
+                for b in range(bits):
+                    cx |= ((code >> (2 * b)) & 1) << b
+                    cy |= ((code >> (2 * b + 1)) & 1) << b
+                entry = cells[code] = {"cx": cx, "cy": cy, "count": 0, "clusters": {}}
+            entry["count"] += c
+            entry["clusters"][str(int(label))] = c
+
+        out["mode"] = "cells"
+        out["cells_per_side"] = 1 << bits
+        out["cells"] = list(cells.values())
+        return out
+
+    def status(self) -> dict:
+        return {"count": len(self), "bounds": list(self.bounds), "max_zoom": MAX_ZOOM,
+                "cells_per_side": 1 << CELL_BITS, "max_tile_points": MAX_TILE_POINTS,
+                "version": self.version}
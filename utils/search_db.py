@@ -0,0 +1,113 @@
+# utils/search_db.py
+"""
+Open ME/CFS — Search + Autocomplete Loaders
+-------------------------------------------
+Fills the in-process search index (utils.search_index) and autocomplete
+trie (utils.suggest) from Supabase and keeps them current as papers and
+summaries are written (see utils.indexing).
+"""
+
+import threading
+
+from cachetools import cached
+
+from utils.db import _search_cache, infer_year, iter_rows
+from utils.search_index import search_index, tokenize
+from utils.suggest import suggest_index
+
+# Columns kept in the index (embeddings are deliberately left out)
+SEARCH_COLUMNS = "pmid, title, abstract, authors, authors_text, journal, keywords, year, cluster"
+
+_search_index_lock = threading.Lock()
+_suggest_index_lock = threading.Lock()
+
+
+# ------------------------------------------------------------
+# 🔍 Search (in-process inverted index, cached)
+# ------------------------------------------------------------
+def load_search_index(force: bool = False):
+    """Build the search index from Supabase once (or again when forced)."""
+    if search_index.loaded and not force:
+        return search_index
+    with _search_index_lock:
+        if search_index.loaded and not force:
+            return search_index
+        papers = ({**p, "year": infer_year(p)}
+                  for p in iter_rows("papers", SEARCH_COLUMNS))
+        search_index.rebuild(papers)
+        _search_cache.clear()
+    print(f"🔎 Search index built: {len(search_index)} papers.")
+    return search_index
+
+
+def index_search(paper: dict):
+    """Apply a synced/imported paper to the search index + keyword suggestions."""
+    previous = search_index.docs.get(str(paper.get("pmid")), {})
+    search_index.upsert(paper)
+    _search_cache.clear()
+
+    suggest_index.add_paper(paper)
+    old_kw, new_kw = set(previous.get("keywords") or []), set(paper.get("keywords") or [])
+    for kw in new_kw - old_kw:
+        suggest_index.add_term("keyword", kw)
+    for kw in old_kw - new_kw:
+        suggest_index.add_term("keyword", kw, count=-1)
+
+
+def paper_year(pmid):
+    """Publication year of an indexed paper (None if unknown)."""
+    return search_index.docs.get(str(pmid), {}).get("year")
+
+
+@cached(_search_cache)
+def search_papers(q=None, limit=10, author=None, year=None):
+    """BM25-ranked keyword search (see utils.search_index); adds a `score` key"""
+    load_search_index()
+    if not tokenize(q):
+        return search_index.search(q=None, limit=limit, author=author, year=year)
+    return [
+        {**paper, "score": score}
+        for score, paper in search_index.ranked(q, k=limit, author=author, year=year)
+    ]
+
+
+def hydrate_hits(hits):
+    """(score, pmid) pairs → paper dicts from the search index + `similarity`."""
+    load_search_index()
+    return [
+        {**search_index.docs.get(pmid, {"pmid": pmid}),
+         "similarity": round(score, 4)}
+        for score, pmid in hits
+    ]
+
+
+# ------------------------------------------------------------
+# 🔤 Autocomplete (radix trie, see utils.suggest)
+# ------------------------------------------------------------
+def load_suggest_index(force: bool = False):
+    """Build the autocomplete trie from the search index + paper_summaries."""
+    if suggest_index.loaded and not force:
+        return suggest_index
+    load_search_index()
+    with _suggest_index_lock:
+        if suggest_index.loaded and not force:
+            return suggest_index
+
+        def summary_terms():
+            for row in iter_rows("paper_summaries", "id, mechanisms, biomarkers", key="id"):
+                for m in row.get("mechanisms") or []:
+                    yield "mechanism", m
+                for b in row.get("biomarkers") or []:
+                    yield "biomarker", b
+
+        suggest_index.rebuild(list(search_index.docs.values()), summary_terms())
+    print(f"🔤 Suggest index built: {len(suggest_index)} suggestions.")
+    return suggest_index
+
+
+def index_suggest_terms(summary: dict):
+    """Add a new summary's mechanisms and biomarkers to the suggestions."""
+    for m in summary.get("mechanisms") or []:
+        suggest_index.add_term("mechanism", m)
+    for b in summary.get("biomarkers") or []:
+        suggest_index.add_term("biomarker", b)
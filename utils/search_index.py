@@ -0,0 +1,303 @@
+# utils/search_index.py
+"""
+Open ME/CFS — In-process Paper Search Index
+-------------------------------------------
+Tokenized inverted index over the `papers` corpus.
+
+    term → { pmid → { field → [positions] } }
+
+Built once from Supabase (see utils.search_db.load_search_index) and updated
+incrementally whenever a paper is synced or imported, so keyword search
+never has to re-download and re-scan the table.
+
+Two read paths:
+  - `search()`  phrase match, mirrors the old substring search
+      · query terms must appear consecutively in one field
+      · the last query term is prefix-expanded ("fatig" → fatigue)
+  - `ranked()`  BM25F relevance with per-field weights, top-k via a heap
+
+`author` / `year` filters are posting-list intersections in both.
+"""
+
+import heapq
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+
+# Per-field BM25F weights (title > keywords > abstract > authors > journal)
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "keywords": 2.0,
+    "abstract": 1.0,
+    "authors": 0.75,
+    "journal": 0.5,
+}
+FIELDS = tuple(FIELD_WEIGHTS)
+
+# BM25 saturation / length-normalisation constants
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Cap on how many vocabulary terms an unknown query term may expand to
+MAX_PREFIX_EXPANSION = 20
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text) -> list[str]:
+    """Lowercase alphanumeric tokens; lists are joined first."""
+    if not text:
+        return []
+    if isinstance(text, (list, tuple)):
+        text = " ".join(str(t) for t in text if t)
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+class InvertedIndex:
+    """Thread-safe inverted index with positional postings per field."""
+
+    def __init__(self, weights=FIELD_WEIGHTS):
+        self.weights = dict(weights)
+        self.fields = tuple(self.weights)
+        self.postings: dict[str, dict[str, dict[str, list[int]]]] = {}
+        self.docs: dict[str, dict] = {}
+        self.doc_lengths: dict[str, dict[str, int]] = {}
+        self.year_docs: dict[int, set[str]] = {}
+        self.loaded = False
+        self._length_totals = {f: 0 for f in self.fields}
+        self._norms: dict[str, dict[str, float]] | None = None
+        self._vocab: list[str] = []
+        self._sorted_pmids: list[str] | None = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.docs)
+
+    # --------------------------------------------------------
+    # ✏️ Writes
+    # --------------------------------------------------------
+    def _field_tokens(self, paper: dict) -> dict[str, list[str]]:
+        return {f: tokenize(paper.get(f)) for f in self.fields}
+
+    def _remove(self, pmid: str):
+        old = self.docs.pop(pmid, None)
+        if old is None:
+            return
+        for tokens in self._field_tokens(old).values():
+            for t in set(tokens):
+                docs = self.postings.get(t)
+                if docs is None:
+                    continue
+                docs.pop(pmid, None)
+                if not docs:
+                    del self.postings[t]
+                    i = bisect_left(self._vocab, t)
+                    if i < len(self._vocab) and self._vocab[i] == t:
+                        self._vocab.pop(i)
+        for field, n in self.doc_lengths.pop(pmid, {}).items():
+            self._length_totals[field] -= n
+        year_set = self.year_docs.get(old.get("year"))
+        if year_set is not None:
+            year_set.discard(pmid)
+
+    def upsert(self, paper: dict, _bulk: bool = False):
+        """Add or replace one paper (keyed by pmid)."""
+        pmid = paper.get("pmid")
+        if not pmid:
+            return
+        pmid = str(pmid)
+        with self._lock:
+            self._remove(pmid)
+            self.docs[pmid] = paper
+            entries: dict[str, dict[str, list[int]]] = {}
+            lengths = {}
+            for field, tokens in self._field_tokens(paper).items():
+                lengths[field] = len(tokens)
+                self._length_totals[field] += len(tokens)
+                for pos, t in enumerate(tokens):
+                    entries.setdefault(t, {}).setdefault(field, []).append(pos)
+            for t, fields in entries.items():
+                docs = self.postings.get(t)
+                if docs is None:
+                    docs = self.postings[t] = {}
+                    if not _bulk:
+                        insort(self._vocab, t)
+                docs[pmid] = fields
+            self.doc_lengths[pmid] = lengths
+            if paper.get("year") is not None:
+                self.year_docs.setdefault(paper["year"], set()).add(pmid)
+            self._sorted_pmids = None
+            self._norms = None
+
+    def remove(self, pmid: str):
+        with self._lock:
+            self._remove(str(pmid))
+            self._sorted_pmids = None
+            self._norms = None
+
+    def rebuild(self, papers):
+        """Replace the whole index from an iterable of paper dicts."""
+        fresh = InvertedIndex(self.weights)
+        for p in papers:
+            fresh.upsert(p, _bulk=True)
+        fresh._vocab = sorted(fresh.postings)
+        fresh._field_norms()
+        with self._lock:
+            self.postings = fresh.postings
+            self.docs = fresh.docs
+            self.doc_lengths = fresh.doc_lengths
+            self.year_docs = fresh.year_docs
+            self._length_totals = fresh._length_totals
+            self._norms = fresh._norms
+            self._vocab = fresh._vocab
+            self._sorted_pmids = None
+            self.loaded = True
+
+    # --------------------------------------------------------
+    # 🔍 Reads
+    # --------------------------------------------------------
+    def expand_prefix(self, prefix: str) -> list[str]:
+        """All indexed terms starting with `prefix` (sorted vocab + bisect)."""
+        i = bisect_left(self._vocab, prefix)
+        out = []
+        while i < len(self._vocab) and self._vocab[i].startswith(prefix):
+            out.append(self._vocab[i])
+            i += 1
+        return out
+
+    def _term_groups(self, terms: list[str]) -> list[list[str]]:
+        groups = [[t] if t in self.postings else [] for t in terms[:-1]]
+        groups.append(self.expand_prefix(terms[-1]))
+        return groups
+
+    def _group_docs(self, group: list[str], field: str | None = None) -> set[str]:
+        out = set()
+        for t in group:
+            docs = self.postings.get(t, {})
+            if field is None:
+                out.update(docs)
+            else:
+                out.update(pmid for pmid, f in docs.items() if field in f)
+        return out
+
+    def _phrase_in(self, pmid: str, groups: list[list[str]], fields) -> bool:
+        for field in fields:
+            starts = None
+            for i, group in enumerate(groups):
+                pos = set()
+                for t in group:
+                    for p in self.postings[t].get(pmid, {}).get(field, ()):
+                        pos.add(p - i)
+                starts = pos if starts is None else starts & pos
+                if not starts:
+                    break
+            if starts:
+                return True
+        return False
+
+    def match(self, terms: list[str], field: str | None = None) -> set[str]:
+        """Pmids containing `terms` as a phrase (last term prefix-expanded)."""
+        if not terms:
+            return set()
+        groups = self._term_groups(terms)
+        if not all(groups):
+            return set()
+        candidates = [self._group_docs(g, field) for g in groups]
+        candidates.sort(key=len)
+        result = set.intersection(*candidates)
+        if len(groups) == 1:
+            return result
+        fields = (field,) if field else self.fields
+        return {p for p in result if self._phrase_in(p, groups, fields)}
+
+    def filter_pmids(self, author=None, year=None) -> set[str] | None:
+        """Intersection of the author/year posting lists (None = no filter)."""
+        sets = []
+        if year is not None and str(year).strip():
+            try:
+                sets.append(self.year_docs.get(int(year), set()))
+            except (TypeError, ValueError):
+                return set()
+        if author:
+            sets.append(self.match(tokenize(author), field="authors"))
+        if not sets:
+            return None
+        sets.sort(key=len)
+        return set.intersection(*sets)
+
+    def sorted_pmids(self) -> list[str]:
+        if self._sorted_pmids is None:
+            self._sorted_pmids = sorted(self.docs)
+        return self._sorted_pmids
+
+    def search(self, q=None, limit=10, author=None, year=None) -> list[dict]:
+        """Matching papers in pmid order (same ordering as get_papers)."""
+        with self._lock:
+            allowed = self.filter_pmids(author=author, year=year)
+            terms = tokenize(q)
+            if terms:
+                hits = self.match(terms)
+                if allowed is not None:
+                    hits &= allowed
+            elif allowed is not None:
+                hits = allowed
+            else:
+                return [self.docs[p] for p in self.sorted_pmids()[:limit]]
+            return [self.docs[p] for p in sorted(hits)[:limit]]
+
+    # --------------------------------------------------------
+    # 🏅 BM25F ranking
+    # --------------------------------------------------------
+    def _field_norms(self) -> dict[str, dict[str, float]]:
+        """Per-doc, per-field length normalisation, recomputed only after writes."""
+        if self._norms is None:
+            n = len(self.doc_lengths) or 1
+            avg = {f: (self._length_totals[f] / n) or 1.0 for f in self.fields}
+            self._norms = {
+                pmid: {
+                    f: 1.0 - BM25_B + BM25_B * lengths.get(f, 0) / avg[f]
+                    for f in self.fields
+                }
+                for pmid, lengths in self.doc_lengths.items()
+            }
+        return self._norms
+
+    def _query_terms(self, q) -> list[str]:
+        """Distinct query terms; unknown terms fall back to their prefix expansion."""
+        out = []
+        for t in dict.fromkeys(tokenize(q)):
+            if t in self.postings:
+                out.append(t)
+            else:
+                expanded = self.expand_prefix(t)
+                expanded.sort(key=lambda x: len(self.postings[x]), reverse=True)
+                out.extend(expanded[:MAX_PREFIX_EXPANSION])
+        return out
+
+    def ranked(self, q, k=10, author=None, year=None) -> list[tuple[float, dict]]:
+        """Top-k (score, paper) pairs by BM25F; work is proportional to postings."""
+        with self._lock:
+            allowed = self.filter_pmids(author=author, year=year)
+            norms = self._field_norms()
+            n_docs = len(self.docs)
+            scores: dict[str, float] = {}
+            for t in self._query_terms(q):
+                docs = self.postings[t]
+                idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                for pmid, fields in docs.items():
+                    if allowed is not None and pmid not in allowed:
+                        continue
+                    doc_norm = norms[pmid]
+                    tf = sum(
+                        self.weights[f] * len(pos) / doc_norm[f]
+                        for f, pos in fields.items()
+                    )
+                    scores[pmid] = scores.get(pmid, 0.0) + \
+                        idf * tf / (BM25_K1 + tf)
+            top = heapq.nlargest(k, scores.items(), key=lambda x: (x[1], x[0]))
+            return [(round(score, 4), self.docs[pmid]) for pmid, score in top]
+
+
+# Process-wide index shared by all routes
+search_index = InvertedIndex()
@@ -0,0 +1,153 @@
+# utils/stats_accumulator.py
+"""
+Open ME/CFS — /stats Accumulator
+--------------------------------
+Dataset totals, papers per year and papers per author, kept current as
+deltas instead of recounted per request:
+
+  - each paper's last seen (year, authors) is remembered, so a re-synced
+    paper moves its counts rather than adding to them
+  - summaries are counted per paper (a set of summarised pmids), so
+    re-summarising a paper does not count it twice
+  - the response is rendered once per change (keyed by `version`) and
+    then served as is
+
+Built from the search index's papers (utils.stats_db.load_stats) and
+reconciled against the paper_stats RPC on a timer (utils.stats_db.reconcile_stats).
+"""
+
+import heapq
+import threading
+from collections import Counter
+from datetime import datetime
+
+TOP_AUTHORS = 10
+
+
+def _authors(value) -> tuple[str, ...]:
+    if not isinstance(value, list):
+        return ()
+    return tuple(dict.fromkeys(a for a in value if isinstance(a, str) and a))
+
+
+class StatsAccumulator:
+    """Thread-safe paper/summary counters with a memoised /stats payload."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = 0
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.years: Counter = Counter()
+            self.authors: Counter = Counter()
+            self._summarized: set[str] = set()
+            self._papers: dict[str, tuple] = {}  # pmid → (year, authors)
+            self._rendered = None
+            self.version += 1
+            self.updated_at: str | None = None
+            self.reconciled_at: str | None = None
+            self.loaded = False
+
+    def __len__(self):
+        return len(self._papers)
+
+    @property
+    def summarized(self) -> int:
+        return len(self._summarized)
+
+    def _move(self, pmid: str, entry: tuple | None):
+        old = self._papers.pop(pmid, None)
+        if old is not None:
+            year, authors = old
+            if year:
+                self.years[year] -= 1
+                if self.years[year] <= 0:
+                    del self.years[year]
+            self.authors.subtract(authors)
+            for a in authors:
+                if self.authors[a] <= 0:
+                    del self.authors[a]
+        if entry is not None:
+            self._papers[pmid] = entry
+            if entry[0]:
+                self.years[entry[0]] += 1
+            self.authors.update(entry[1])
+
+    def _touch(self):
+        self._rendered = None
+        self.version += 1
+        self.updated_at = datetime.utcnow().isoformat()
+
+    # --------------------------------------------------------
+    # ✍️ Writes
+    # --------------------------------------------------------
+    def rebuild(self, papers, summarized=()):
+        """Replace every count from paper dicts and the pmids that have a summary."""
+        with self._lock:
+            self.years, self.authors, self._papers = Counter(), Counter(), {}
+            for p in papers:
+                if p.get("pmid"):
+                    self._move(str(p["pmid"]), (p.get("year"), _authors(p.get("authors"))))
+            self._summarized = {str(p) for p in summarized if p}
+            self._touch()
+            self.reconciled_at = self.updated_at
+            self.loaded = True
+
+    def upsert_paper(self, paper: dict):
+        """Count a synced/imported paper, or move its counts if already seen."""
+        if not paper.get("pmid"):
+            return
+        pmid, entry = str(paper["pmid"]), (paper.get("year"), _authors(paper.get("authors")))
+        with self._lock:
+            if self._papers.get(pmid) == entry:
+                return
+            self._move(pmid, entry)
+            self._touch()
+
+    def add_summary(self, pmid):
+        """Count a paper as summarised (a re-summarised paper is a no-op)."""
+        if not pmid:
+            return
+        with self._lock:
+            if str(pmid) in self._summarized:
+                return
+            self._summarized.add(str(pmid))
+            self._touch()
+
+    def mark_reconciled(self):
+        with self._lock:
+            self.reconciled_at = datetime.utcnow().isoformat()
+            self._rendered = None
+
+    # --------------------------------------------------------
+    # 🔍 Reads
+    # --------------------------------------------------------
+    def snapshot(self) -> dict:
+        """The /stats numbers; recomputed only after a change."""
+        rendered = self._rendered
+        if rendered is not None and rendered[0] == self.version:
+            return rendered[1]
+        with self._lock:
+            top = heapq.nsmallest(TOP_AUTHORS, self.authors.items(), key=lambda kv: (-kv[1], kv[0]))
+            data = {
+                "total_papers": len(self._papers),
+                "summarized_papers": len(self._summarized),
+                "year_distribution": dict(sorted(self.years.items())),
+                "top_authors": [{"name": a, "count": c} for a, c in top],
+                "version": self.version,
+                "updated": self.updated_at,
+                "reconciled_at": self.reconciled_at,
+            }
+            self._rendered = (self.version, data)
+        return data
+
+    def status(self) -> dict:
+        return {"loaded": self.loaded, "papers": len(self), "summarized": self.summarized,
+                "version": self.version, "updated": self.updated_at,
+                "reconciled_at": self.reconciled_at}
+
+
+# Process-wide /stats counters
+stats_accumulator = StatsAccumulator()
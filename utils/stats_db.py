@@ -0,0 +1,198 @@
+# utils/stats_db.py
+"""
+Open ME/CFS — Stats Loaders
+---------------------------
+/stats from the in-process accumulator (utils.stats_accumulator), built
+from the search index and reconciled against the paper_stats RPC; the
+biomarker aggregates come from the materialized views of
+12_stats_rpcs.sql, refreshed (debounced) after writes.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+from utils.db import supabase, iter_rows
+from utils.search_db import load_search_index
+from utils.search_index import search_index
+from utils.stats_accumulator import stats_accumulator
+
+# /stats is served from utils.stats_accumulator; the database is only asked
+# to confirm it every STATS_RECONCILE_INTERVAL seconds.
+STATS_RECONCILE_INTERVAL = 600
+
+# The biomarker aggregates read materialized views (12_stats_rpcs.sql).
+# Writers call schedule_stats_refresh(); a burst of writes shares one refresh.
+STATS_REFRESH_DELAY = 60  # seconds
+
+_stats_lock = threading.Lock()
+_stats_reconciling = threading.Event()
+_stats_checked_at = 0.0
+_stats_written_at = 0.0
+
+_stats_refresh_timer: threading.Timer | None = None
+_stats_refresh_lock = threading.Lock()
+
+
+# ------------------------------------------------------------
+# 📊 /stats accumulator
+# ------------------------------------------------------------
+def _summarized_pmids():
+    return (r.get("paper_pmid") for r in iter_rows("paper_summaries", "id, paper_pmid", key="id"))
+
+
+def load_stats(force: bool = False):
+    """Build the stats accumulator from the search index's papers once (or again when forced)."""
+    global _stats_checked_at
+    if stats_accumulator.loaded and not force:
+        return stats_accumulator
+    load_search_index()
+    with _stats_lock:
+        if stats_accumulator.loaded and not force:
+            return stats_accumulator
+        # Scan first: the accumulator only locks (and blocks /stats) for the swap
+        summarized = list(_summarized_pmids())
+        stats_accumulator.rebuild(list(search_index.docs.values()), summarized)
+        _stats_checked_at = time.time()
+    print(f"📊 Stats accumulator built: {len(stats_accumulator)} papers.")
+    return stats_accumulator
+
+
+def index_stats_paper(paper: dict, refresh_views: bool = True):
+    """Count a synced/imported paper and schedule a views refresh."""
+    if stats_accumulator.loaded:
+        stats_accumulator.upsert_paper(paper)
+    if refresh_views:
+        schedule_stats_refresh()
+
+
+def index_stats_summary(summary: dict, refresh_views: bool = True):
+    """Count a newly summarised paper and schedule a views refresh."""
+    if stats_accumulator.loaded:
+        stats_accumulator.add_summary(summary.get("paper_pmid"))
+    if refresh_views:
+        schedule_stats_refresh()
+
+
+def reconcile_stats():
+    """
+    Compare the accumulator with the paper_stats RPC (papers, years, authors,
+    summarised papers); on any difference (e.g. an out-of-process import)
+    reload papers and rebuild. Skipped while this process's own writes may
+    not be in the stats views yet.
+    """
+    global _stats_checked_at
+    _stats_checked_at = time.time()
+    if time.time() - _stats_written_at < 2 * STATS_REFRESH_DELAY:
+        return False
+    ours = stats_accumulator.snapshot()
+    theirs = supabase.rpc("paper_stats", {"p_authors": 10}).execute().data or {}
+    drift = (
+        ours["total_papers"] != theirs.get("total_papers", 0)
+        or ours["year_distribution"] != {int(y): c for y, c in (theirs.get("year_distribution") or {}).items()}
+        or [a["count"] for a in ours["top_authors"]] != [a["count"] for a in theirs.get("top_authors") or []]
+        or ours["summarized_papers"] != theirs.get("summarized_papers", 0)
+    )
+    if drift:
+        print("📊 Stats drifted from the database — rebuilding.")
+        load_search_index(force=True)
+        load_stats(force=True)
+    else:
+        stats_accumulator.mark_reconciled()
+    return drift
+
+
+def _reconcile_stats_in_background():
+    if _stats_reconciling.is_set():
+        return
+    _stats_reconciling.set()
+
+    def run():
+        try:
+            reconcile_stats()
+        except Exception as e:
+            print(f"⚠️ Stats reconcile failed: {e}")
+        finally:
+            _stats_reconciling.clear()
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def get_stats():
+    """Aggregate counts and trends for /stats (current, O(1) per call)"""
+    try:
+        load_stats()
+    except Exception as e:
+        print(f"⚠️ Stats load failed: {e}")
+    if stats_accumulator.loaded and time.time() - _stats_checked_at > STATS_RECONCILE_INTERVAL:
+        _reconcile_stats_in_background()
+
+    stats = stats_accumulator.snapshot()
+    if not stats["total_papers"]:
+        return {
+            "message": "No papers found",
+            **stats,
+            "updated": stats["updated"] or datetime.utcnow().isoformat(),
+        }
+    return stats
+
+
+def get_metadata():
+    """Return basic dataset metadata summary (safe for CI)"""
+    try:
+        stats = get_stats()
+        if not stats or "message" in stats:
+            return {
+                "message": "No dataset metadata found. Try re-importing.",
+                "file_name": None,
+                "record_count": 0,
+            }
+
+        return {
+            "file_name": "mecfs_papers_summarized.json",
+            "source": "Supabase",
+            "record_count": stats.get("total_papers", 0),
+            "last_updated": stats.get("updated"),
+            "top_authors": stats.get("top_authors", []),
+        }
+    except Exception as e:
+        return {"message": f"Metadata retrieval failed: {str(e)}"}
+
+
+# ------------------------------------------------------------
+# 🧪 Biomarker aggregates (materialized views)
+# ------------------------------------------------------------
+def top_biomarkers(limit: int = 20) -> list[dict]:
+    """[{"biomarker", "count"}] — most mentioned biomarkers across summaries."""
+    return supabase.rpc("top_biomarkers", {"p_limit": limit}).execute().data or []
+
+
+def biomarker_mechanisms(limit: int | None = None) -> list[dict]:
+    """[{"biomarker", "count", "mechanisms"}] from mechanism_edges, most supported first."""
+    return supabase.rpc("biomarker_mechanisms", {"p_limit": limit}).execute().data or []
+
+
+def refresh_stats_views():
+    supabase.rpc("refresh_stats_views", {}).execute()
+
+
+def schedule_stats_refresh(delay: float = STATS_REFRESH_DELAY):
+    """Refresh the stats views `delay` seconds after the first write of a burst."""
+    global _stats_refresh_timer, _stats_written_at
+    _stats_written_at = time.time()
+
+    def run():
+        global _stats_refresh_timer
+        with _stats_refresh_lock:
+            _stats_refresh_timer = None
+        try:
+            refresh_stats_views()
+        except Exception as e:
+            print(f"⚠️ Stats view refresh failed: {e}")
+
+    with _stats_refresh_lock:
+        if _stats_refresh_timer is not None:
+            return
+        _stats_refresh_timer = threading.Timer(delay, run)
+        _stats_refresh_timer.daemon = True
+        _stats_refresh_timer.start()
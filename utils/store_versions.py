@@ -0,0 +1,209 @@
+# utils/store_versions.py
+"""
+Open ME/CFS — Cross-Worker Store Refresh
+----------------------------------------
+The search index, suggestions, /stats accumulator, graph store and
+co-occurrence counts are per-process copies. Writes made by this process
+are applied in place (utils.indexing); writes by other uvicorn workers or
+scripts are picked up here. Every STORE_VERSION_INTERVAL seconds the
+store_changes() RPC (17_store_changes.sql) lists the papers, summaries
+and papers' edges changed since the previous call by any other writer,
+and just those rows are fetched and applied. A table with more than
+DELTA_LIMIT changed rows (a bulk import), or with deleted papers or
+summaries, has its stores rebuilt instead (aside, then swapped in).
+
+The ANN index, vector store, neighbour lists and cluster model are files
+under data/ and already reload on a newer mtime, so every worker on the
+same host sees them without this.
+"""
+
+import threading
+import time
+from collections import defaultdict
+
+from utils.db import supabase, STORE_WRITER
+from utils.search_db import SEARCH_COLUMNS, load_search_index, load_suggest_index
+from utils.graph_db import SUMMARY_GRAPH_COLUMNS, load_graph_store
+from utils.stats_db import load_stats
+from utils.indexing import index_paper, index_summary
+from utils.search_index import search_index
+from utils.suggest import suggest_index
+from utils.stats_accumulator import stats_accumulator
+from utils.graph_store import graph_store, DEFAULT_SOURCE
+
+STORE_VERSION_INTERVAL = 60  # seconds
+
+# Changed rows per table applied one by one; beyond that, rebuild
+DELTA_LIMIT = 1000
+# Keys per `in.(...)` filter, keeping the request URL short
+FETCH_CHUNK = 200
+PAGE_SIZE = 1000
+
+# Old log rows are deleted once in a while (by whichever worker gets there)
+PRUNE_INTERVAL = 3600  # seconds
+
+# name → (store, loader), in rebuild order: the search index first
+# (suggestions, /stats and the co-occurrence years read it)
+STORES = {
+    "search": (search_index, load_search_index),
+    "suggest": (suggest_index, load_suggest_index),
+    "stats": (stats_accumulator, load_stats),
+    "graph": (graph_store, load_graph_store),
+}
+
+# store_changes() table → the stores built from it
+DEPENDENTS = {
+    "papers": {"search", "suggest", "stats"},
+    "paper_summaries": {"suggest", "stats", "graph"},
+    "mechanism_edges": {"graph"},
+}
+
+EDGE_COLUMNS = "id, paper_pmid, source, mechanism:mechanism_nodes(name), biomarker:biomarker_nodes(name)"
+
+_cursor: str | None = None
+_pruned_at = 0.0
+_rebuilding = threading.Event()
+
+
+# ------------------------------------------------------------
+# 📥 Row deltas
+# ------------------------------------------------------------
+def _fetch(table: str, columns: str, key: str, values: list, order: str) -> list[dict]:
+    """Rows whose `key` is in `values`, in bounded requests."""
+    rows = []
+    for i in range(0, len(values), FETCH_CHUNK):
+        chunk, start = values[i:i + FETCH_CHUNK], 0
+        while True:
+            page = (supabase.table(table).select(columns).in_(key, chunk).order(order)
+                    .range(start, start + PAGE_SIZE - 1).execute().data or [])
+            rows.extend(page)
+            if len(page) < PAGE_SIZE:
+                break
+            start += PAGE_SIZE
+    return rows
+
+
+def _apply_papers(pmids: list) -> bool:
+    rows = _fetch("papers", SEARCH_COLUMNS, "pmid", pmids, "pmid")
+    if len(rows) < len(pmids):
+        return False  # deleted papers: rebuild
+    for paper in rows:
+        index_paper(paper, refresh_views=False)
+    return True
+
+
+def _apply_summaries(ids: list) -> bool:
+    rows = _fetch("paper_summaries", SUMMARY_GRAPH_COLUMNS, "id", ids, "id")
+    if len(rows) < len(ids):
+        return False  # deleted summaries: rebuild
+    for row in rows:
+        # Rows of a transaction still running at the previous check are
+        # listed again; the graph store knows the ones already applied
+        if not graph_store.has_summary(row["id"]):
+            index_summary(row, refresh_views=False)
+    return True
+
+
+def _apply_edges(pmids: list) -> bool:
+    if not graph_store.loaded:
+        return True  # read in full on first use
+    by_paper = defaultdict(lambda: defaultdict(list))
+    for row in _fetch("mechanism_edges", EDGE_COLUMNS, "paper_pmid", pmids, "id"):
+        by_paper[row["paper_pmid"]][row.get("source") or DEFAULT_SOURCE].append({
+            "mechanism": (row.get("mechanism") or {}).get("name"),
+            "biomarker": (row.get("biomarker") or {}).get("name"),
+        })
+    for pmid in pmids:
+        fetched = by_paper.get(pmid, {})
+        for source in set(graph_store.paper_sources(pmid)) | set(fetched):
+            graph_store.replace_paper_edges(pmid, fetched.get(source, []), source)
+    return True
+
+
+APPLY = {
+    "papers": _apply_papers,
+    "paper_summaries": _apply_summaries,
+    "mechanism_edges": _apply_edges,
+}
+
+
+# ------------------------------------------------------------
+# 🔄 Watcher
+# ------------------------------------------------------------
+def _rebuild(names):
+    """Rebuild the loaded stores among `names` (each aside, then swapped in)."""
+    for name, (store, load) in STORES.items():
+        if name in names and store.loaded:
+            load(force=True)
+
+
+def rebuild_stores_in_background() -> bool:
+    """
+    Rebuild every loaded store in a background thread; readers keep the old
+    copies until each swap. Returns False if a rebuild is already running.
+    """
+    if _rebuilding.is_set():
+        return False
+    _rebuilding.set()
+
+    def run():
+        try:
+            _rebuild(STORES)
+            print("🔄 Stores rebuilt.")
+        except Exception as e:
+            print(f"⚠️ Store rebuild failed: {e}")
+        finally:
+            _rebuilding.clear()
+
+    threading.Thread(target=run, daemon=True).start()
+    return True
+
+
+def check_store_versions():
+    """
+    Apply other writers' changes since the previous check (the first call
+    only takes the cursor). Returns the tables that changed.
+    """
+    global _cursor
+    res = supabase.rpc("store_changes", {
+        "p_after": _cursor, "p_writer": STORE_WRITER, "p_limit": DELTA_LIMIT,
+    }).execute().data or {}
+    changes = res.get("changes") or {}
+
+    stale = set()
+    for table in ("papers", "paper_summaries", "mechanism_edges"):  # years before summaries
+        if table not in changes:
+            continue
+        keys = changes[table]
+        if keys is None or not APPLY[table](keys):
+            stale |= DEPENDENTS[table]
+    _rebuild(stale)
+    _cursor = res.get("xmin")  # only once applied, so a failed check is retried
+
+    if changes:
+        detail = ", ".join(f"{t} ({'rebuilt' if changes[t] is None else len(changes[t])})"
+                           for t in changes)
+        print(f"🔄 Applied other workers' writes: {detail}.")
+    return sorted(changes)
+
+
+def _prune():
+    global _pruned_at
+    if time.time() - _pruned_at > PRUNE_INTERVAL:
+        _pruned_at = time.time()
+        supabase.rpc("prune_store_changes", {}).execute()
+
+
+def _watch_loop():
+    while True:
+        time.sleep(STORE_VERSION_INTERVAL)
+        try:
+            check_store_versions()
+            _prune()
+        except Exception as e:
+            print(f"⚠️ Store change check failed: {e}")
+
+
+def start_watcher():
+    """Background checker (started from main.py on app startup)."""
+    threading.Thread(target=_watch_loop, daemon=True).start()
@@ -0,0 +1,222 @@
+# utils/suggest.py
+"""
+Open ME/CFS — Autocomplete Index
+--------------------------------
+Compressed (radix) trie over paper titles, keywords, mechanism names and
+biomarker names for /papers/suggest.
+
+Every node caches the top-K suggestions of its subtree, so a keystroke is
+one walk down the trie (O(len(prefix))) plus a slice — no scan, no DB.
+
+Titles are inserted once per word start, so "encephalo" also completes
+"Myalgic encephalomyelitis …". Vocabulary terms are weighted by how many
+papers/summaries mention them; titles get a small recency bonus.
+"""
+
+import heapq
+import threading
+
+from utils.search_index import tokenize
+
+# Size of the cached completion list at every node (= max `limit`)
+TOP_K = 10
+
+# Titles are only completable from their first few characters per word start
+MAX_KEY_LENGTH = 64
+
+
+def normalize(text) -> str:
+    return " ".join(tokenize(text))
+
+
+def _common_prefix_len(a: str, b: str) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+class _Node:
+    __slots__ = ("children", "entries", "top")
+
+    def __init__(self):
+        self.children: dict[str, tuple[str, "_Node"]] = {}  # first char → (edge label, child)
+        self.entries: dict[tuple, float] = {}  # suggestion id → weight (keys ending here)
+        self.top: list[tuple[float, tuple]] = []  # best-first [(weight, sid)], deduped
+
+
+class SuggestIndex:
+    """Radix trie with per-node cached top-K completions."""
+
+    def __init__(self, k: int = TOP_K):
+        self.k = k
+        self.root = _Node()
+        self.payloads: dict[tuple, dict] = {}  # sid → suggestion body
+        self.keys: dict[tuple, set[str]] = {}  # sid → trie keys it was inserted under
+        self.weights: dict[tuple, float] = {}
+        self.loaded = False
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.payloads)
+
+    # --------------------------------------------------------
+    # 🌳 Trie internals
+    # --------------------------------------------------------
+    def _walk(self, key: str, create: bool) -> list[_Node] | None:
+        """Nodes from root to the node spelling `key` (splitting edges if creating)."""
+        node, rest, path = self.root, key, [self.root]
+        while rest:
+            edge = node.children.get(rest[0])
+            if edge is None:
+                if not create:
+                    return None
+                child = _Node()
+                node.children[rest[0]] = (rest, child)
+                path.append(child)
+                return path
+            label, child = edge
+            common = len(label) if rest.startswith(
+                label) else _common_prefix_len(label, rest)
+            if common < len(label):
+                if not create:
+                    # Prefix ends inside this edge → the child subtree is the answer
+                    if common == len(rest):
+                        path.append(child)
+                        return path
+                    return None
+                mid = _Node()
+                mid.children[label[common]] = (label[common:], child)
+                mid.top = list(child.top)
+                node.children[rest[0]] = (label[:common], mid)
+                child = mid
+            node, rest = child, rest[common:]
+            path.append(node)
+        return path
+
+    def _recompute(self, node: _Node):
+        best: dict[tuple, float] = dict(node.entries)
+        for _, child in node.children.values():
+            for w, sid in child.top:
+                if w > best.get(sid, float("-inf")):
+                    best[sid] = w
+        node.top = heapq.nlargest(
+            self.k, ((w, sid) for sid, w in best.items()))
+
+    def _finalize(self, node: _Node):
+        """Post-order top-K computation after a bulk build."""
+        stack, order = [node], []
+        while stack:
+            n = stack.pop()
+            order.append(n)
+            stack.extend(child for _, child in n.children.values())
+        for n in reversed(order):
+            self._recompute(n)
+
+    def _insert_key(self, key: str, sid: tuple, weight: float, bulk: bool):
+        path = self._walk(key, create=True)
+        path[-1].entries[sid] = weight
+        if bulk:
+            return
+        for node in reversed(path):
+            self._recompute(node)
+
+    def _delete_key(self, key: str, sid: tuple):
+        path = self._walk(key, create=True)
+        path[-1].entries.pop(sid, None)
+        for node in reversed(path):
+            self._recompute(node)
+
+    # --------------------------------------------------------
+    # ✏️ Writes
+    # --------------------------------------------------------
+    def put(self, sid: tuple, text: str, weight: float, keys: set[str],
+            payload: dict, bulk: bool = False):
+        """Insert or re-weight one suggestion under the given trie keys."""
+        keys = {k[:MAX_KEY_LENGTH] for k in keys if k}
+        if not keys:
+            return
+        with self._lock:
+            for key in self.keys.get(sid, set()) - keys:
+                self._delete_key(key, sid)
+            for key in keys:
+                self._insert_key(key, sid, weight, bulk)
+            self.keys[sid] = keys
+            self.weights[sid] = weight
+            self.payloads[sid] = {"title": text, **payload}
+
+    def remove(self, sid: tuple):
+        with self._lock:
+            for key in self.keys.pop(sid, set()):
+                self._delete_key(key, sid)
+            self.payloads.pop(sid, None)
+            self.weights.pop(sid, None)
+
+    def add_paper(self, paper: dict, bulk: bool = False):
+        """Index a paper title at every word start."""
+        pmid, title = paper.get("pmid"), (paper.get("title") or "").strip()
+        if not pmid or not title:
+            return
+        words = normalize(title).split()
+        keys = {" ".join(words[i:]) for i in range(len(words))}
+        year = paper.get("year") or 0
+        recency = min(max(int(year) - 1990, 0), 40) / 100 if year else 0.0
+        self.put(("title", str(pmid)), title, 1.0 + recency, keys,
+                 {"type": "title", "pmid": str(pmid)}, bulk=bulk)
+
+    def add_term(self, kind: str, text: str, count: float = 1, bulk: bool = False):
+        """Add `count` mentions of a keyword / mechanism / biomarker."""
+        text = (text or "").strip()
+        key = normalize(text)
+        if not key:
+            return
+        sid = (kind, key)
+        with self._lock:
+            weight = self.weights.get(sid, 0) + count
+            if weight <= 0:
+                self.remove(sid)
+                return
+            payload = self.payloads.get(sid, {"title": text})
+            self.put(sid, payload["title"], weight, {key},
+                     {"type": kind, "pmid": None}, bulk=bulk)
+
+    def rebuild(self, papers, terms):
+        """
+        Replace the whole trie.
+        papers: iterable of paper dicts; terms: iterable of (kind, text).
+        """
+        fresh = SuggestIndex(self.k)
+        for p in papers:
+            fresh.add_paper(p, bulk=True)
+            for kw in p.get("keywords") or []:
+                fresh.add_term("keyword", kw, bulk=True)
+        for kind, text in terms:
+            fresh.add_term(kind, text, bulk=True)
+        fresh._finalize(fresh.root)
+        with self._lock:
+            self.root = fresh.root
+            self.payloads = fresh.payloads
+            self.keys = fresh.keys
+            self.weights = fresh.weights
+            self.loaded = True
+
+    # --------------------------------------------------------
+    # 🔍 Reads
+    # --------------------------------------------------------
+    def suggest(self, prefix: str, limit: int = 5) -> list[dict]:
+        key = normalize(prefix)
+        if not key:
+            return []
+        with self._lock:
+            path = self._walk(key, create=False)
+            if not path:
+                return []
+            return [
+                {**self.payloads[sid], "score": round(w, 3)}
+                for w, sid in path[-1].top[:limit]
+            ]
+
+
+# Process-wide autocomplete index
+suggest_index = SuggestIndex()
@@ -0,0 +1,195 @@
+# utils/vector_db.py
+"""
+Open ME/CFS — Vector Index Loaders
+----------------------------------
+Loads, builds and updates the ANN index (utils.ann_index), maps the
+exported embedding store (utils.vector_store) and answers "more like
+this" from stored embeddings (utils.neighbors), with no OpenAI call.
+"""
+
+import os
+import threading
+
+import numpy as np
+from cachetools import TTLCache
+
+from utils.db import supabase, iter_rows, infer_year
+from utils.ann_index import ann_index, parse_embedding
+from utils.vector_store import vector_store, export_store, DEFAULT_DIR as VECTOR_STORE_DIR
+from utils.neighbors import neighbor_lists, digest, DEFAULT_PATH as NEIGHBORS_PATH, K as NEIGHBORS_K
+
+ANN_SNAPSHOT_PATH = os.getenv(
+    "ANN_SNAPSHOT_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                 "data", "ann_index.npz"),
+)
+
+_ann_index_lock = threading.Lock()
+_vector_store_lock = threading.Lock()
+
+# pmid → (vector digest, [(score, pmid)]); a changed embedding changes the digest
+_similar_cache = TTLCache(maxsize=5000, ttl=3600)
+
+
+# ------------------------------------------------------------
+# 🧭 Vector search (IVF-flat ANN, see utils.ann_index)
+# ------------------------------------------------------------
+def load_ann_index(force: bool = False, build: bool = True):
+    """
+    Load the ANN index from its snapshot (reloading when another process,
+    e.g. generate_embeddings, has written a newer one). With no snapshot,
+    or when forced, rebuild from papers.embedding and save one.
+    """
+    with _ann_index_lock:
+        snapshot = os.path.exists(ANN_SNAPSHOT_PATH)
+        if snapshot and not force:
+            mtime = os.path.getmtime(ANN_SNAPSHOT_PATH)
+            if not ann_index.loaded or mtime > (ann_index.snapshot_mtime or 0):
+                ann_index.load(ANN_SNAPSHOT_PATH)
+                print(f"🧭 ANN index loaded: {len(ann_index)} vectors.")
+            return ann_index
+        if ann_index.loaded and not force:
+            return ann_index
+        if not build:
+            return ann_index
+
+        if load_vector_store().loaded:
+            # Vectors from the mmap store; only the small metadata comes from Supabase
+            meta = {str(p["pmid"]): p for p in iter_rows("papers", "pmid, year, cluster")}
+            rows = (
+                (pmid, vector_store.vector(pmid),
+                 infer_year(meta.get(pmid, {})), meta.get(pmid, {}).get("cluster"))
+                for pmid in vector_store.pmids
+            )
+        else:
+            rows = (
+                (p["pmid"], parse_embedding(p.get("embedding")),
+                 infer_year(p), p.get("cluster"))
+                for p in iter_rows("papers", "pmid, year, cluster, embedding", page_size=500)
+                if p.get("embedding") is not None
+            )
+        ann_index.rebuild(rows)
+        ann_index.save(ANN_SNAPSHOT_PATH)
+    print(f"🧭 ANN index built: {len(ann_index)} vectors, {ann_index.nlist} lists.")
+    return ann_index
+
+
+def index_embeddings(rows: list[dict], save: bool = True):
+    """
+    Add freshly written embeddings ({pmid, embedding, year, cluster}) to the
+    ANN index and persist the snapshot so running servers pick them up.
+    Bulk writers pass save=False and call save_ann_index() once in a while.
+    Without a snapshot yet, the next full build will include them anyway.
+    """
+    if not ann_index.loaded and not os.path.exists(ANN_SNAPSHOT_PATH):
+        return
+    load_ann_index(build=False)
+    with _ann_index_lock:
+        for r in rows:
+            ann_index.upsert(r["pmid"], parse_embedding(r["embedding"]),
+                             year=infer_year(r), cluster=r.get("cluster"))
+            _similar_cache.pop(str(r["pmid"]), None)
+    if save:
+        save_ann_index()
+
+
+def save_ann_index():
+    """Write the in-memory ANN index to its snapshot (no-op before the first build)."""
+    with _ann_index_lock:
+        if ann_index.loaded:
+            ann_index.save(ANN_SNAPSHOT_PATH)
+
+
+def load_vector_store():
+    """Map the exported embedding store (re-mapped after a new export); no-op if absent."""
+    meta_path = os.path.join(VECTOR_STORE_DIR, "meta.json")
+    with _vector_store_lock:
+        if os.path.exists(meta_path):
+            mtime = os.path.getmtime(meta_path)
+            if not vector_store.loaded or mtime > (vector_store.mtime or 0):
+                vector_store.load(VECTOR_STORE_DIR)
+                print(f"🗜️ Vector store mapped: {len(vector_store)} × {vector_store.dim} "
+                      f"({vector_store.meta.get('quantization')}).")
+    return vector_store
+
+
+def export_vector_store(quantization: str = "int8"):
+    """Stream papers.embedding from Supabase into the mmap store."""
+    rows = (
+        (p["pmid"], parse_embedding(p.get("embedding")))
+        for p in iter_rows("papers", "pmid, embedding", page_size=500)
+        if p.get("embedding") is not None
+    )
+    n = export_store(rows, VECTOR_STORE_DIR, quantization,
+                     model="text-embedding-3-small")
+    print(f"🗜️ Exported {n} embeddings to {VECTOR_STORE_DIR} ({quantization}).")
+    return n
+
+
+# ------------------------------------------------------------
+# 🧲 More like this (stored embeddings only, no OpenAI call)
+# ------------------------------------------------------------
+def load_neighbor_lists():
+    """Load (or reload after a new bulk run) the precomputed neighbour lists, if any."""
+    if os.path.exists(NEIGHBORS_PATH):
+        mtime = os.path.getmtime(NEIGHBORS_PATH)
+        if not neighbor_lists.loaded or mtime > (neighbor_lists.mtime or 0):
+            neighbor_lists.load(NEIGHBORS_PATH)
+    return neighbor_lists
+
+
+def paper_vector(pmid: str):
+    """A paper's normalised embedding: ANN index, mmap store, then Supabase."""
+    load_ann_index(build=False)  # a full build only runs in the startup warm-up
+    vector = ann_index.vector(pmid)
+    if vector is None and load_vector_store().loaded:
+        vector = vector_store.vector(pmid)
+    if vector is not None:
+        return vector
+    rows = supabase.table("papers").select(
+        "embedding").eq("pmid", pmid).limit(1).execute().data or []
+    vector = parse_embedding(rows[0].get("embedding")) if rows else None
+    if vector is None or not len(vector):
+        return None
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _live_neighbors(vector, pmid: str, k: int):
+    """
+    Top-k papers other than `pmid` → (hits, source) from whatever is ready:
+    the ANN index, else a brute-force scan of the mmap store, else match_papers.
+    """
+    if ann_index.loaded:
+        hits, source = ann_index.search(vector, k=k + 1), "ann"
+    elif vector_store.loaded:
+        hits, source = vector_store.search(vector, k=k + 1), "store"
+    else:
+        rows = supabase.rpc("match_papers", {
+            "query_embedding": vector.tolist(), "match_count": k + 1}).execute().data or []
+        hits = [(float(r.get("similarity") or 0), str(r["pmid"])) for r in rows if r.get("pmid")]
+        source = "rpc"
+    return [h for h in hits if h[1] != pmid][:k], source
+
+
+def similar_papers(pmid: str, limit: int = 10):
+    """
+    Nearest neighbours of a stored paper → ([(score, pmid)], source).
+    None if the paper has no embedding.
+    """
+    pmid = str(pmid)
+    vector = paper_vector(pmid)
+    if vector is None:
+        return None
+    d = digest(vector)
+
+    cached = _similar_cache.get(pmid)
+    if cached and cached[0] == d and len(cached[1]) >= limit:
+        return cached[1][:limit], "cache"
+
+    hits = load_neighbor_lists().get(pmid, d, max(limit, NEIGHBORS_K))
+    source = "precomputed"
+    if hits is None:
+        hits, source = _live_neighbors(vector, pmid, max(limit, NEIGHBORS_K))
+    _similar_cache[pmid] = (d, hits)
+    return hits[:limit], source
@@ -0,0 +1,244 @@
+# utils/vector_store.py
+"""
+Open ME/CFS — Memory-mapped Embedding Store
+-------------------------------------------
+Compact on-disk copy of `papers.embedding` so vector consumers don't have
+to download and JSON-parse 1536 floats per paper.
+
+    data/vector_store/
+      meta.json         dim, count, quantization, model
+      pmids.npy         row → pmid
+      codes.npy         int8 (per-row scale) or float16 matrix, L2-normalised
+      scales.npy        float32 per-row int8 scale (int8 only)
+      vectors.npy       float32 matrix, only touched for re-scoring
+
+Files are opened with `mmap_mode="r"`: loading is instant and uvicorn
+workers share one copy in the OS page cache. A search scans the quantized
+codes in blocks (the resident set is 1/4 or 1/2 of float32), then
+re-scores the best `k × rerank` candidates against float32 rows.
+
+Export with:
+    python -m utils.vector_store [--quantization int8|float16]
+"""
+
+import json
+import mmap
+import os
+import shutil
+import threading
+
+import numpy as np
+
+QUANTIZATIONS = ("int8", "float16")
+
+# Candidates re-scored in float32 per requested result
+RERANK_FACTOR = 4
+
+# Rows converted to float32 at a time while scanning codes
+SCAN_BLOCK = 1024
+
+DEFAULT_DIR = os.getenv(
+    "VECTOR_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                 "data", "vector_store"),
+)
+
+
+def quantize(vectors: np.ndarray, quantization: str):
+    """L2-normalised float32 rows → (codes, scales or None)."""
+    if quantization == "float16":
+        return vectors.astype(np.float16), None
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.round(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def export_store(rows, path: str = DEFAULT_DIR, quantization: str = "int8",
+                 model: str | None = None, chunk: int = 4096) -> int:
+    """
+    Write a store from an iterable of (pmid, vector) pairs, streaming in
+    chunks so the export never holds the corpus in memory. The new files
+    are swapped in with a directory rename, so readers never see a mix.
+    """
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"quantization must be one of {QUANTIZATIONS}")
+    tmp = f"{path}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    pmids, buf, parts = [], [], []
+    dim = None
+
+    def flush():
+        block = np.asarray(buf, dtype=np.float32)
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        block /= norms
+        part = os.path.join(tmp, f"part{len(parts)}.npy")
+        np.save(part, block)
+        parts.append(part)
+        buf.clear()
+
+    for pmid, vector in rows:
+        if vector is None or not len(vector):
+            continue
+        if dim is None:
+            dim = len(vector)
+        elif len(vector) != dim:
+            print(f"⚠️ Skipping {pmid}: {len(vector)} dims, expected {dim}")
+            continue
+        pmids.append(str(pmid))
+        buf.append(vector)
+        if len(buf) >= chunk:
+            flush()
+    if buf:
+        flush()
+
+    n, dim = len(pmids), dim or 0
+    vectors = np.lib.format.open_memmap(
+        os.path.join(tmp, "vectors.npy"), mode="w+", dtype=np.float32, shape=(n, dim))
+    codes = np.lib.format.open_memmap(
+        os.path.join(tmp, "codes.npy"), mode="w+",
+        dtype=np.int8 if quantization == "int8" else np.float16, shape=(n, dim))
+    scales = np.ones(n, dtype=np.float32)
+    row = 0
+    for part in parts:
+        block = np.load(part)
+        c, s = quantize(block, quantization)
+        vectors[row:row + len(block)] = block
+        codes[row:row + len(block)] = c
+        if s is not None:
+            scales[row:row + len(block)] = s
+        row += len(block)
+        os.remove(part)
+    vectors.flush()
+    codes.flush()
+    del vectors, codes
+
+    np.save(os.path.join(tmp, "pmids.npy"), np.asarray(pmids, dtype=str))
+    if quantization == "int8":
+        np.save(os.path.join(tmp, "scales.npy"), scales)
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump({"count": n, "dim": dim, "quantization": quantization,
+                   "model": model}, f)
+
+    old = f"{path}.old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+    return n
+
+
+class VectorStore:
+    """Read-only, memory-mapped view of an exported store."""
+
+    def __init__(self):
+        self.meta: dict = {}
+        self.pmids: list[str] = []
+        self.rows: dict[str, int] = {}
+        self.loaded = False
+        self.mtime = None
+        self._codes = None
+        self._scales = None
+        self._vectors = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.pmids)
+
+    @property
+    def dim(self) -> int:
+        return self.meta.get("dim", 0)
+
+    def load(self, path: str = DEFAULT_DIR):
+        meta_path = os.path.join(path, "meta.json")
+        with open(meta_path) as f:
+            meta = json.load(f)
+        pmids = [str(p) for p in np.load(os.path.join(path, "pmids.npy"))]
+        codes = np.load(os.path.join(path, "codes.npy"), mmap_mode="r")
+        vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        if hasattr(mmap, "MADV_RANDOM") and getattr(vectors, "_mmap", None):
+            # Re-scoring reads scattered rows: skip kernel readahead
+            vectors._mmap.madvise(mmap.MADV_RANDOM)
+        scales = np.load(os.path.join(path, "scales.npy")) \
+            if meta["quantization"] == "int8" else None
+        with self._lock:
+            self.meta, self.pmids = meta, pmids
+            self.rows = {p: i for i, p in enumerate(pmids)}
+            self._codes, self._scales, self._vectors = codes, scales, vectors
+            self.loaded = True
+            self.mtime = os.path.getmtime(meta_path)
+
+    # --------------------------------------------------------
+    # 🔍 Reads
+    # --------------------------------------------------------
+    def vector(self, pmid) -> np.ndarray | None:
+        """Full-precision (normalised) vector for one paper."""
+        row = self.rows.get(str(pmid))
+        return None if row is None else np.asarray(self._vectors[row])
+
+    def matrix(self, rows=None) -> np.ndarray:
+        """float32 rows (all by default), in the order given — a copy, for bulk consumers."""
+        if rows is None:
+            return np.asarray(self._vectors, dtype=np.float32)
+        rows = np.asarray(rows, dtype=np.int64)
+        order = np.argsort(rows, kind="stable")
+        out = np.empty((len(rows), self.dim), dtype=np.float32)
+        out[order] = self._vectors[rows[order]]  # read the file sequentially
+        return out
+
+    def approximate_scores(self, query: np.ndarray, rows: np.ndarray | None = None) -> np.ndarray:
+        """Quantized dot products, scanned block by block."""
+        n = len(self.pmids) if rows is None else len(rows)
+        out = np.empty(n, dtype=np.float32)
+        for start in range(0, n, SCAN_BLOCK):
+            stop = min(start + SCAN_BLOCK, n)
+            idx = slice(start, stop) if rows is None else rows[start:stop]
+            block = np.asarray(self._codes[idx], dtype=np.float32) @ query
+            if self._scales is not None:
+                block *= self._scales[idx]
+            out[start:stop] = block
+        return out
+
+    def search(self, query, k: int = 10, rerank: int = RERANK_FACTOR,
+               rows: np.ndarray | None = None) -> list[tuple[float, str]]:
+        """Top-k (cosine similarity, pmid): quantized scan + float32 re-score."""
+        if not self.pmids:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        scores = self.approximate_scores(query, rows)
+        candidates = min(len(scores), max(k, k * rerank))
+        top = np.argpartition(-scores, candidates - 1)[:candidates] \
+            if len(scores) > candidates else np.arange(len(scores))
+        ids = top if rows is None else np.asarray(rows)[top]
+        ids = np.sort(ids)  # sequential reads from the float32 file
+        exact = np.asarray(self._vectors[ids], dtype=np.float32) @ query
+        best = np.argsort(-exact, kind="stable")[:k]
+        return [(float(exact[i]), self.pmids[ids[i]]) for i in best]
+
+    def status(self) -> dict:
+        return {
+            **self.meta,
+            "codes_mb": round(self._codes.nbytes / 2**20, 1) if self.loaded else 0,
+            "float32_mb": round(self._vectors.nbytes / 2**20, 1) if self.loaded else 0,
+        }
+
+
+# Process-wide (read-only) embedding store
+vector_store = VectorStore()
+
+
+if __name__ == "__main__":
+    import argparse
+    from utils.vector_db import export_vector_store
+
+    parser = argparse.ArgumentParser(description="Export papers.embedding to the mmap store")
+    parser.add_argument("--quantization", choices=QUANTIZATIONS, default="int8")
+    args = parser.parse_args()
+    export_vector_store(args.quantization)